@@ -0,0 +1,163 @@
+"""
+Benchmark: concurrent cart writes on a SQLite file database
+
+Runs ``--workers`` processes (as gunicorn would), each writing to its own
+user's cart for ``--seconds``, first with SQLite's default journal settings
+and then with the pragmas from ``server/config.py`` (WAL,
+synchronous=NORMAL, busy_timeout, mmap_size). Reports operations per
+second and failures for each.
+
+``--layer http`` drives the API (add to cart, update the item, count the
+cart); ``--layer sql`` runs the same writes as one small transaction each,
+without Flask, to isolate the database.
+
+    python benchmarks/bench_cart_writes.py --workers 8 --seconds 10 --layer sql
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRODUCTS = 200
+
+MODES = {
+    'before: sqlite defaults': {'SQLITE_JOURNAL_MODE': '', 'SQLITE_SYNCHRONOUS': '',
+                                'SQLITE_BUSY_TIMEOUT_MS': '', 'SQLITE_MMAP_SIZE': ''},
+    'after: WAL + NORMAL + busy_timeout': {},
+}
+
+CART_UPSERT = """
+    INSERT INTO cart_items (user_id, product_id, quantity, created_at, updated_at)
+    VALUES (:user_id, :product_id, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = quantity + 1, updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def make_app(database_url, settings):
+    # Settings are read when server.config is imported, so every app
+    # below is created in a fresh process
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.update(settings)
+    from server.app import create_app
+    return create_app('production')
+
+
+def seed(database_url, users, results):
+    app = make_app(database_url, {})
+    from flask_jwt_extended import create_access_token
+    from server.models.database import db, Category, Product, User
+
+    with app.app_context():
+        db.create_all()
+        category = Category(name='Benchmark')
+        db.session.add(category)
+        db.session.flush()
+        db.session.add_all([
+            Product(name=f'Cart Product {i}', price=10 + i, sku=f'CART-{i}', stock_quantity=1_000_000,
+                    category_id=category.id)
+            for i in range(PRODUCTS)
+        ])
+        accounts = [User(email=f'cart{i}@example.com', password_hash='x', first_name='Cart', last_name=str(i))
+                    for i in range(users)]
+        db.session.add_all(accounts)
+        db.session.commit()
+        product_ids = [product.id for product in Product.query.with_entities(Product.id)]
+        clients = [(user.id, create_access_token(identity=user.id, additional_claims=user.jwt_claims()))
+                   for user in accounts]
+        db.engine.dispose()
+    results.put((product_ids, clients))
+
+
+def http_worker(database_url, settings, user_id, token, product_ids, seconds, results):
+    app = make_app(database_url, settings)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    rng = random.Random(user_id)
+    ok = failed = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        response = client.post('/api/cart/add', json={'product_id': rng.choice(product_ids), 'quantity': 1},
+                               headers=headers)
+        responses = [response, client.get('/api/cart/count', headers=headers)]
+        if response.status_code < 300:
+            item_id = response.get_json()['data']['id']
+            responses.append(client.put(f'/api/cart/update/{item_id}', json={'quantity': 2}, headers=headers))
+        for response in responses:
+            if response.status_code < 300:
+                ok += 1
+            else:
+                failed += 1
+    results.put((ok, failed))
+
+
+def sql_worker(database_url, settings, user_id, token, product_ids, seconds, results):
+    app = make_app(database_url, settings)
+    from sqlalchemy import text
+    from server.models.database import db
+
+    upsert = text(CART_UPSERT)
+    count = text('SELECT COUNT(*) FROM cart_items WHERE user_id = :user_id')
+    rng = random.Random(user_id)
+    ok = failed = 0
+    with app.app_context():
+        engine = db.engine
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(upsert, {'user_id': user_id, 'product_id': rng.choice(product_ids)})
+                with engine.connect() as conn:
+                    conn.execute(count, {'user_id': user_id}).scalar()
+                ok += 1
+            except Exception:
+                failed += 1
+    results.put((ok, failed))
+
+
+def run(label, settings, args):
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(dir=args.dir), 'bench_cart.db')
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+
+    seeder = context.Process(target=seed, args=(database_url, args.workers, results))
+    seeder.start()
+    product_ids, clients = results.get()
+    seeder.join()
+
+    target = http_worker if args.layer == 'http' else sql_worker
+    processes = [
+        context.Process(target=target, args=(database_url, settings, user_id, token, product_ids,
+                                             args.seconds, results))
+        for user_id, token in clients
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    ok = sum(result[0] for result in totals)
+    failed = sum(result[1] for result in totals)
+    print(f'{label:38s} {ok / args.seconds:8.0f} ops/s  {failed:6d} failed')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--layer', choices=['http', 'sql'], default='http')
+    parser.add_argument('--dir', help='Directory for the database files (default: system temp dir)')
+    args = parser.parse_args()
+    print(f'{args.workers} worker processes, {args.seconds:g}s, {args.layer} layer')
+    for label, settings in MODES.items():
+        run(label, settings, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: bulk product import through POST /api/products/bulk
+
+Posts an NDJSON feed of ``--products`` rows twice, once into an empty
+catalog (all inserts) and once more with every price changed (all
+updates), and reports rows per second. Uses DATABASE_URL (PostgreSQL
+recommended) or a temporary SQLite file; the products table is emptied
+first, so point it at a scratch database.
+
+    DATABASE_URL=postgresql://localhost/shop_bench python benchmarks/bench_import.py --products 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def feed(count, category_id, price_offset=0):
+    for i in range(count):
+        yield json.dumps({
+            'sku': f'BENCH-{i:07d}', 'name': f'Bench Product {i}', 'description': 'Imported by benchmark',
+            'price': f'{10 + i % 990 + price_offset}.99', 'stock_quantity': i % 50,
+            'brand': f'Brand {i % 40}', 'category_id': category_id, 'specifications': {'colour': 'black'}
+        }) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_import.db')
+
+    from flask_jwt_extended import create_access_token
+    from server.app import create_app
+    from server.models.database import db, Category, Product, User, UserRole
+
+    app = create_app('production')
+    if args.batch_size:
+        app.config['PRODUCT_IMPORT_BATCH_SIZE'] = args.batch_size
+    with app.app_context():
+        db.create_all()
+        Product.query.delete()
+        category = Category.query.filter_by(name='Benchmark').first() or Category(name='Benchmark')
+        db.session.add(category)
+        admin = User.query.filter_by(email='bench-import@example.com').first() or User(
+            email='bench-import@example.com', password_hash='x', first_name='Import', last_name='Admin',
+            role=UserRole.ADMIN)
+        db.session.add(admin)
+        db.session.commit()
+        category_id = category.id
+        token = create_access_token(identity=admin.id, additional_claims=admin.jwt_claims())
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    print(f'{args.products} products, batch size {app.config["PRODUCT_IMPORT_BATCH_SIZE"]}, '
+          f'{app.config["SQLALCHEMY_DATABASE_URI"].split(":")[0]}')
+    for label, price_offset in (('insert', 0), ('update', 1)):
+        body = ''.join(feed(args.products, category_id, price_offset)).encode()
+        started = time.perf_counter()
+        response = client.post('/api/products/bulk', data=body, content_type='application/x-ndjson',
+                               headers=headers)
+        elapsed = time.perf_counter() - started
+        report = response.get_json()['data']
+        print(f'{label:7s} {elapsed:7.2f} s  {args.products / elapsed:9.0f} rows/s  '
+              f'created={report["created"]} updated={report["updated"]} failed={report["failed"]}')
+
+
+if __name__ == '__main__':
+    main()
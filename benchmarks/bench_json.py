@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: cost per product of serializing a product page
+
+Compares the previous path (``to_dict`` converting every Decimal/datetime
+with ``float()``/``isoformat()``, then Flask's default json provider) with
+``to_dict`` returning raw values through the providers in
+``server/json_provider.py``.
+
+    python benchmarks/bench_json.py --products 100 --repeat 200
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from server.json_provider import StdlibJSONProvider, OrjsonProvider, orjson
+from server.models.database import Category, Product
+
+
+def make_products(count):
+    category = Category(id=1, name='Smartphones')
+    now = datetime(2026, 10, 18, 12, 0, 0, 123456)
+    return [
+        Product(
+            id=i, name=f'Phone {i}', description='A very capable smartphone ' * 4,
+            price=Decimal('599.99') + i, sale_price=Decimal('549.99') if i % 3 == 0 else None,
+            sku=f'PHONE-{i:05d}', stock_quantity=i % 40, brand='Brand', model=f'M{i}',
+            warranty_months=12, is_active=True, is_featured=i % 10 == 0, views_count=i * 7,
+            sales_count=i, image_urls=[f'https://cdn.example.com/p/{i}.jpg'],
+            specifications={'ram': '8GB', 'storage': '256GB'}, category=category, category_id=1,
+            created_at=now - timedelta(days=i), updated_at=now
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_to_dict(product):
+    """Product.to_dict as it was before models handed over raw values"""
+    data = product.to_dict()
+    data['price'] = float(product.price)
+    data['sale_price'] = float(product.sale_price) if product.sale_price else None
+    data['current_price'] = float(product.current_price)
+    data['created_at'] = product.created_at.isoformat()
+    data['updated_at'] = product.updated_at.isoformat()
+    return data
+
+
+def payload(products, to_dict):
+    return {'success': True, 'message': 'Products retrieved successfully',
+            'data': {'products': [to_dict(product) for product in products]}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    products = make_products(args.products)
+    cases = [('before: float()/isoformat() + flask json', DefaultJSONProvider(app), legacy_to_dict),
+             ('after: raw values + stdlib provider', StdlibJSONProvider(app), Product.to_dict)]
+    if orjson is not None:
+        cases.append(('after: raw values + orjson provider', OrjsonProvider(app), Product.to_dict))
+    else:
+        print('orjson not installed; skipping the orjson provider')
+
+    def per_product(run):
+        best = min(timeit.repeat(run, number=args.repeat, repeat=5)) / args.repeat
+        return best / args.products * 1e6
+
+    print(f'{"":45s} {"to_dict + dumps":>17s} {"dumps only":>17s}')
+    baseline = None
+    with app.app_context():
+        for label, provider, to_dict in cases:
+            prepared = payload(products, to_dict)
+            total = per_product(lambda: provider.dumps(payload(products, to_dict)))
+            dumps_only = per_product(lambda: provider.dumps(prepared))
+            baseline = baseline or total
+            print(f'{label:45s} {total:7.2f} us ({baseline / total:3.1f}x) {dumps_only:7.2f} us/product')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: login throughput of one worker process
+
+Runs one app (as one gunicorn gthread worker) with ``--threads`` request
+threads logging in for ``--seconds``, while a probe thread calls
+GET /api/health to show how much password hashing delays other requests.
+Each mode is a hashing setting from ``server/config.py``; reports logins
+per second, login p95, 503s from a full hashing queue and the probe's p95.
+
+    python benchmarks/bench_login.py --threads 8 --seconds 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'benchmark123'
+
+MODES = {
+    'pbkdf2 600k, on the request thread': {'PASSWORD_HASH_WORKERS': '0'},
+    'pbkdf2 600k, 2 hashing threads': {},
+    'pbkdf2 100k, 2 hashing threads': {'PASSWORD_PBKDF2_ITERATIONS': '100000'},
+    'bcrypt 12, 2 hashing threads': {'PASSWORD_HASH_METHOD': 'bcrypt'},
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def worker(database_url, settings, threads, seconds, results):
+    # Settings are read when server.config is imported, so every mode
+    # runs in a fresh process
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.update(settings)
+    from server.app import create_app
+    from server.models.database import db, User
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        for i in range(threads):
+            user = User(email=f'login{i}@example.com', first_name='Login', last_name=str(i))
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+
+    deadline = time.perf_counter() + seconds
+    latencies, statuses, probe_latencies = [], [], []
+
+    def log_in(i):
+        client = app.test_client()
+        body = {'email': f'login{i}@example.com', 'password': PASSWORD}
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = client.post('/api/auth/login', json=body).status_code
+            latencies.append(time.perf_counter() - started)
+            statuses.append(status)
+
+    def probe():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client.get('/api/health')
+            probe_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    pool = [threading.Thread(target=log_in, args=(i,)) for i in range(threads)]
+    pool.append(threading.Thread(target=probe))
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    ok = sum(1 for status in statuses if status == 200)
+    busy = sum(1 for status in statuses if status == 503)
+    results.put((ok, busy, len(statuses) - ok - busy, percentile(latencies, 0.95),
+                 percentile(probe_latencies, 0.95)))
+
+
+def run(label, settings, args):
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(dir=args.dir), 'bench_login.db')
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=worker, args=(database_url, settings, args.threads, args.seconds, results))
+    process.start()
+    ok, busy, failed, login_p95, probe_p95 = results.get()
+    process.join()
+    print(f'{label:36s} {ok / args.seconds:7.1f} logins/s  p95 {login_p95 * 1000:7.0f} ms  '
+          f'{busy:5d} busy  {failed:4d} failed  health p95 {probe_p95 * 1000:6.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8, help='Request threads (gunicorn --threads)')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--dir', help='Directory for the database files (default: system temp dir)')
+    args = parser.parse_args()
+    print(f'1 worker process, {args.threads} request threads, {args.seconds:g}s, {os.cpu_count()} CPUs')
+    for label, settings in MODES.items():
+        run(label, settings, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""
+Load test: the API's hot paths under gunicorn
+
+Seeds a database (DATABASE_URL, or a temporary SQLite file) with a catalog
+and one user per client, starts gunicorn on ``server.run:app`` and drives
+each scenario with ``--concurrency`` keep-alive clients for ``--duration``
+seconds. For every scenario it reports throughput, p50/p95/p99 latency and
+the SQL statements per request (read from the ``Server-Timing`` header, so
+``QUERY_INSTRUMENTATION`` must stay on).
+
+``--output`` writes the results as JSON together with the commit and the
+settings; ``--compare`` prints the change against an earlier JSON file, so
+two commits can be compared on the same machine:
+
+    python benchmarks/load_test.py --workers 4 --concurrency 16 --output before.json
+    git checkout my-branch
+    python benchmarks/load_test.py --workers 4 --concurrency 16 --compare before.json
+
+``--url`` targets a server that is already running instead; DATABASE_URL
+must then point at its database so the benchmark users can be seeded.
+Extra app settings are passed to gunicorn with ``--env``, e.g.
+``--env RESPONSE_CACHE_TTL=0`` to measure uncached catalog reads.
+"""
+
+import argparse
+import http.client
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'loadtest-password'
+ADMIN_EMAIL = 'loadtest-admin@example.com'
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Tyrell']
+SEARCH_TERMS = ['phone', 'laptop', 'camera', 'headphones', 'Acme', 'Hooli', 'pro', 'wireless']
+KINDS = ['Phone', 'Laptop', 'Camera', 'Headphones', 'Tablet', 'Monitor']
+SHIPPING_ADDRESS = {
+    'type': 'shipping', 'first_name': 'Load', 'last_name': 'Test', 'address_line_1': '1 Bench St',
+    'city': 'Testville', 'state': 'TS', 'postal_code': '12345', 'country': 'Testland'
+}
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+Sample = namedtuple('Sample', 'status latency queries db_ms')
+
+
+# Seeding (in a child process: server.config reads the environment on import)
+
+def _user_email(index):
+    return f'loadtest{index}@example.com'
+
+
+def seed(database_url, products, users, results):
+    os.environ['DATABASE_URL'] = database_url
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from server.app import create_app
+    from server.models.database import db, Category, Product, User, UserRole
+
+    app = create_app('production')
+    with app.app_context():
+        db.create_all()
+        password_hash = generate_password_hash(PASSWORD)
+        if not User.query.filter_by(email=ADMIN_EMAIL).first():
+            rng = random.Random(0)
+            categories = [Category(name=f'Load Test {kind}s') for kind in KINDS]
+            db.session.add_all(categories)
+            db.session.flush()
+            db.session.execute(insert(Product), [
+                {
+                    'name': f'{rng.choice(BRANDS)} {KINDS[i % len(KINDS)]} {"Pro " if i % 3 == 0 else ""}{i}',
+                    'description': f'Wireless {KINDS[i % len(KINDS)].lower()} for load testing',
+                    'price': round(rng.uniform(20, 2000), 2), 'sku': f'LOAD-{i:06d}',
+                    'stock_quantity': 10_000_000, 'brand': rng.choice(BRANDS),
+                    'category_id': categories[i % len(KINDS)].id, 'is_featured': i % 25 == 0,
+                }
+                for i in range(products)
+            ])
+            db.session.add(User(email=ADMIN_EMAIL, password_hash=password_hash, first_name='Load',
+                                last_name='Admin', role=UserRole.ADMIN))
+            db.session.commit()
+
+        existing = {email for (email,) in db.session.query(User.email).filter(User.email.like('loadtest%'))}
+        missing = [index for index in range(users) if _user_email(index) not in existing]
+        if missing:
+            db.session.execute(insert(User), [
+                {'email': _user_email(index), 'password_hash': password_hash, 'first_name': 'Load',
+                 'last_name': str(index)}
+                for index in missing
+            ])
+            db.session.commit()
+
+        product_ids = [product_id for (product_id,) in
+                       db.session.query(Product.id).filter(Product.sku.like('LOAD-%'), Product.is_active.is_(True))]
+        pages = max(1, math.ceil(Product.query.filter_by(is_active=True).count() / 20))
+        db.engine.dispose()
+    results.put((product_ids, pages))
+
+
+# gunicorn
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(args, database_url):
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_ENV='production')
+    env.update(setting.split('=', 1) for setting in args.env)
+    command = [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+               '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'server.run:app']
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'gunicorn exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/health')
+            if connection.getresponse().status == 200:
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit('gunicorn did not become healthy within 60s')
+
+
+# Clients
+
+class Session:
+    """One keep-alive connection acting as one user"""
+
+    def __init__(self, base_url, email, product_ids, pages, seed_value):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.connection = None
+        self.rng = random.Random(seed_value)
+        self.product_ids = product_ids
+        self.pages = pages
+        self.admin_headers = {}
+        self.headers = self._login(email)
+
+    def _login(self, email):
+        status, body, _ = self.request('POST', '/api/auth/login', {'email': email, 'password': PASSWORD})
+        if status != 200:
+            raise SystemExit(f'Login failed for {email}: {status} {body[:200]!r}')
+        return {'Authorization': f"Bearer {json.loads(body)['data']['access_token']}"}
+
+    def login_admin(self):
+        self.admin_headers = self._login(ADMIN_EMAIL)
+
+    def request(self, method, path, payload=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read(), response.getheader('Server-Timing', '')
+            except (http.client.HTTPException, OSError):
+                # The server closed the keep-alive connection; reconnect once
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def measure(self, method, path, payload=None, headers=None):
+        started = time.perf_counter()
+        try:
+            status, _, server_timing = self.request(method, path, payload, headers or self.headers)
+        except (http.client.HTTPException, OSError):
+            return Sample(599, time.perf_counter() - started, None, None)
+        latency = time.perf_counter() - started
+        match = SERVER_TIMING_DB.search(server_timing)
+        if match:
+            return Sample(status, latency, int(match.group(2)), float(match.group(1)))
+        return Sample(status, latency, None, None)
+
+    def product_id(self):
+        return self.rng.choice(self.product_ids)
+
+
+# Scenarios, run in this order; each returns the Sample of its measured request
+
+def product_list(session):
+    return session.measure('GET', f'/api/products?page={session.rng.randint(1, session.pages)}&per_page=20')
+
+
+def product_search(session):
+    return session.measure('GET', f'/api/products/search?q={session.rng.choice(SEARCH_TERMS)}')
+
+
+def product_detail(session):
+    return session.measure('GET', f'/api/products/{session.product_id()}')
+
+
+def cart_add(session):
+    return session.measure('POST', '/api/cart/add', {'product_id': session.product_id(), 'quantity': 1})
+
+
+def cart_get(session):
+    return session.measure('GET', '/api/cart')
+
+
+def checkout(session):
+    for _ in range(3):
+        session.request('POST', '/api/cart/add', {'product_id': session.product_id(), 'quantity': 1},
+                        session.headers)
+    return session.measure('POST', '/api/orders/create',
+                           {'payment_method': 'credit_card', 'shipping_address': SHIPPING_ADDRESS})
+
+
+def order_history(session):
+    return session.measure('GET', '/api/orders')
+
+
+def admin_analytics(session):
+    path = session.rng.choice(['/api/admin/analytics/dashboard', '/api/admin/analytics/orders',
+                               '/api/admin/analytics/revenue'])
+    return session.measure('GET', path, headers=session.admin_headers)
+
+
+SCENARIOS = {
+    'product_list': product_list,
+    'product_search': product_search,
+    'product_detail': product_detail,
+    'cart_add': cart_add,
+    'cart_get': cart_get,
+    'checkout': checkout,
+    'order_history': order_history,
+    'admin_analytics': admin_analytics,
+}
+
+
+def run_scenario(scenario, sessions, duration, warmup):
+    samples = [[] for _ in sessions]
+    start = threading.Barrier(len(sessions) + 1)
+
+    def drive(session, results):
+        for _ in range(warmup):
+            scenario(session)
+        start.wait()
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            results.append(scenario(session))
+
+    threads = [threading.Thread(target=drive, args=(session, results))
+               for session, results in zip(sessions, samples)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return [sample for results in samples for sample in results], time.perf_counter() - started
+
+
+# Reporting
+
+def percentile(values, percent):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    db_ms = [sample.db_ms for sample in samples if sample.db_ms is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample.status >= 400),
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            **{f'p{p}': round(percentile(latencies, p), 2) if latencies else None for p in (50, 95, 99)},
+            'max': round(latencies[-1], 2) if latencies else None,
+        },
+        'sql_statements': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+        'db_ms_mean': round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    print(f'{"scenario":16s} {"req/s":>9s} {"p50 ms":>9s} {"p95 ms":>9s} {"p99 ms":>9s} {"SQL":>6s} {"errors":>7s}')
+    for name, result in results.items():
+        latency = result['latency_ms']
+        sql = result['sql_statements']['mean']
+        print(f'{name:16s} {result["throughput_rps"]:9.1f} {latency["p50"] or 0:9.2f} {latency["p95"] or 0:9.2f} '
+              f'{latency["p99"] or 0:9.2f} {sql if sql is not None else "-":>6} {result["errors"]:7d}')
+        before = (baseline or {}).get(name)
+        if before:
+            print(f'{"  vs baseline":16s} {_change(before["throughput_rps"], result["throughput_rps"]):>9s} '
+                  + ' '.join(f'{_change(before["latency_ms"][p], latency[p]):>9s}' for p in ('p50', 'p95', 'p99'))
+                  + f' {_change(before["sql_statements"]["mean"], sql):>6s}')
+
+
+def _change(before, after):
+    if not before or after is None:
+        return '-'
+    return f'{(after - before) / before * 100:+.0f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='Comma-separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (one user each)')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per client first')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--products', type=int, default=2000, help='Products to seed into an empty database')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='App setting passed to gunicorn (repeatable)')
+    parser.add_argument('--url', help='Benchmark a running server instead of starting gunicorn')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for request parameters')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Earlier --output file to compare against')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        if args.url:
+            parser.error('--url needs DATABASE_URL pointing at the server\'s database')
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load_test.db')
+
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    seeder = context.Process(target=seed, args=(database_url, args.products, args.concurrency, queue))
+    seeder.start()
+    product_ids, pages = queue.get()
+    seeder.join()
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server, base_url = start_gunicorn(args, database_url)
+    try:
+        sessions = [Session(base_url, _user_email(index), product_ids, pages, args.seed * 10_000 + index)
+                    for index in range(args.concurrency)]
+        if 'admin_analytics' in scenarios:
+            for session in sessions:
+                session.login_admin()
+
+        print(f'{base_url}: {args.concurrency} clients, {args.duration:g}s per scenario, '
+              f'{args.workers} workers x {args.threads} threads, {urlsplit(database_url).scheme}')
+        results = {}
+        for name in scenarios:
+            samples, elapsed = run_scenario(SCENARIOS[name], sessions, args.duration, args.warmup)
+            results[name] = summarize(samples, elapsed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['scenarios']
+    print_table(results, baseline)
+
+    if args.output:
+        report = {
+            'commit': _git('rev-parse', 'HEAD'),
+            'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'database': urlsplit(database_url).scheme,
+            'settings': {
+                'concurrency': args.concurrency, 'duration': args.duration, 'warmup': args.warmup,
+                'workers': args.workers, 'threads': args.threads, 'products': args.products,
+                'env': args.env, 'seed': args.seed, 'url': args.url,
+            },
+            'scenarios': results,
+        }
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
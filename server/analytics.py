@@ -0,0 +1,134 @@
+"""
+Analytics service shared by the admin dashboard and order statistics
+
+Each entity is summarised with a single conditional-aggregation query
+(``SUM(CASE WHEN ... THEN 1 ELSE 0 END)``) instead of one COUNT per figure,
+and results are cached per app for ``ANALYTICS_CACHE_TTL`` seconds.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from server.cache import app_cache
+from server.models.database import db, User, Product, Order, Category, OrderStatus, PaymentStatus
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_if(column, condition):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def _cache():
+    return app_cache('analytics', 'ANALYTICS_CACHE_TTL', 30)
+
+
+def user_aggregates(now):
+    thirty_days_ago = now - timedelta(days=30)
+    seven_days_ago = now - timedelta(days=7)
+    row = db.session.query(
+        func.count(User.id).label('total'),
+        _count_if(User.is_active == True).label('active'),
+        _count_if(User.created_at >= thirty_days_ago).label('new_30d'),
+        _count_if(User.created_at >= seven_days_ago).label('new_7d')
+    ).one()
+    return dict(row._mapping)
+
+
+def product_aggregates():
+    row = db.session.query(
+        func.count(Product.id).label('total'),
+        _count_if(Product.is_active == True).label('active'),
+        _count_if((Product.is_featured == True) & (Product.is_active == True)).label('featured'),
+        _count_if((Product.is_active == True) & (Product.stock_quantity == 0)).label('out_of_stock')
+    ).one()
+    return dict(row._mapping)
+
+
+def category_aggregates():
+    row = db.session.query(
+        func.count(Category.id).label('total'),
+        _count_if(Category.is_active == True).label('active')
+    ).one()
+    return dict(row._mapping)
+
+
+def order_aggregates(now):
+    """Order counts per status and time window, plus revenue figures, in one query"""
+    thirty_days_ago = now - timedelta(days=30)
+    seven_days_ago = now - timedelta(days=7)
+    yesterday = now - timedelta(days=1)
+    completed = Order.payment_status == PaymentStatus.COMPLETED
+
+    columns = [
+        func.count(Order.id).label('total'),
+        _count_if(Order.created_at >= thirty_days_ago).label('orders_30d'),
+        _count_if(Order.created_at >= seven_days_ago).label('orders_7d'),
+        _count_if(Order.created_at >= yesterday).label('orders_today'),
+        _sum_if(Order.total_amount, completed).label('revenue_total'),
+        _sum_if(Order.total_amount, completed & (Order.created_at >= thirty_days_ago)).label('revenue_30d'),
+        _sum_if(Order.total_amount, completed & (Order.created_at >= seven_days_ago)).label('revenue_7d'),
+        _sum_if(Order.total_amount, Order.payment_status == PaymentStatus.PENDING).label('revenue_pending'),
+    ]
+    columns.extend(
+        _count_if(Order.status == status).label(f'status_{status.value}')
+        for status in OrderStatus
+    )
+    row = db.session.query(*columns).one()
+    return dict(row._mapping)
+
+
+def dashboard_summary():
+    """Figures for GET /api/admin/analytics/dashboard"""
+    def compute():
+        now = datetime.utcnow()
+        users = user_aggregates(now)
+        products = product_aggregates()
+        orders = order_aggregates(now)
+        categories = category_aggregates()
+        return {
+            'users': users,
+            'products': products,
+            'orders': {
+                'total': orders['total'],
+                'orders_30d': orders['orders_30d'],
+                'orders_7d': orders['orders_7d'],
+                'orders_today': orders['orders_today'],
+                'pending': orders['status_pending'],
+                'processing': orders['status_processing'],
+                'shipped': orders['status_shipped']
+            },
+            'revenue': {
+                'total': float(orders['revenue_total']),
+                'revenue_30d': float(orders['revenue_30d']),
+                'revenue_7d': float(orders['revenue_7d']),
+                'pending': float(orders['revenue_pending'])
+            },
+            'categories': categories
+        }
+    return _cache().get_or_set('dashboard', compute)
+
+
+def order_statistics():
+    """Figures for GET /api/orders/stats"""
+    def compute():
+        orders = order_aggregates(datetime.utcnow())
+        return {
+            'orders': {
+                'total': orders['total'],
+                'pending': orders['status_pending'],
+                'confirmed': orders['status_confirmed'],
+                'shipped': orders['status_shipped'],
+                'delivered': orders['status_delivered'],
+                'cancelled': orders['status_cancelled'],
+                'recent_30_days': orders['orders_30d']
+            },
+            'revenue': {
+                'total': float(orders['revenue_total']),
+                'pending': float(orders['revenue_pending']),
+                'recent_30_days': float(orders['revenue_30d'])
+            }
+        }
+    return _cache().get_or_set('order_statistics', compute)
+
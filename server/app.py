@@ -8,6 +8,14 @@ from flask_migrate import Migrate
 from server.config import config
 from server.models.database import db
 from server.models import *
+from server.view_counter import ViewCounter
+from server.instrumentation import QueryInstrumentation
+from server.metrics import Metrics
+from server.replicas import ReplicaRouter
+from server.passwords import PasswordHasher
+from server.json_provider import json_provider
+from server.db_engine import configure_engines
+from server.rollup import backfill_sales_rollup_command
 
 from server.routes.auth import auth_bp
 from server.routes.products import products_bp
@@ -39,10 +47,22 @@ def create_app(config_name=None):
     # Prevent 308 redirects
     app.url_map.strict_slashes = False
 
+    # Fast JSON for responses and JSON columns
+    app.json = json_provider(app)
+    engine_options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    engine_options.setdefault("json_serializer", app.json.dumps)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+
     # Initialize extensions
     db.init_app(app)
+    configure_engines(app)
+    ReplicaRouter(app)
     jwt = JWTManager(app)
     migrate = Migrate(app, db)
+    ViewCounter(app)
+    QueryInstrumentation(app)
+    Metrics(app)
+    PasswordHasher(app)
 
     # ✅ FIXED CORS: Added 5174 origin and clarified defaults
     origins_env = os.getenv(
@@ -77,6 +97,9 @@ def create_app(config_name=None):
     app.register_blueprint(addresses_bp, url_prefix="/api/addresses")
     app.register_blueprint(admin_bp, url_prefix="/api/admin")
 
+    # CLI commands
+    app.cli.add_command(backfill_sales_rollup_command)
+
     # Root endpoint
     @app.route("/", methods=["GET"])
     def index():
@@ -0,0 +1,227 @@
+"""
+In-process caches shared by the API
+
+Caches are stored per application in ``app.extensions`` so that separate
+app instances (e.g. one per test) never see each other's entries.
+
+``cached_response`` adds HTTP response caching for public GET endpoints:
+bodies are stored in a byte-bounded LRU (or any backend configured with
+``RESPONSE_CACHE_BACKEND``), served with a strong ETag and
+``Cache-Control``, and conditional requests are answered with
+``304 Not Modified`` without running the view.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from flask import current_app, make_response, request
+from werkzeug.utils import import_string
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping whose entries expire after ``ttl`` seconds"""
+
+    def __init__(self, ttl=60, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value for key, computing it with factory() on a miss"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+def app_cache(name, ttl_config=None, default_ttl=60, maxsize=1024):
+    """Get (or lazily create) a named TTL cache bound to the current app"""
+    caches = current_app.extensions.setdefault('ttl_caches', {})
+    cache = caches.get(name)
+    if cache is None:
+        ttl = current_app.config.get(ttl_config, default_ttl) if ttl_config else default_ttl
+        cache = caches.setdefault(name, TTLCache(ttl=ttl, maxsize=maxsize))
+    return cache
+
+
+def invalidate_caches(*names):
+    """Clear the named caches of the current app (all of them if no names given)"""
+    caches = current_app.extensions.get('ttl_caches', {})
+    for name, cache in list(caches.items()):
+        if not names or name in names:
+            cache.clear()
+
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'etag', 'mimetype'])
+
+
+class LRUByteCache:
+    """Thread-safe LRU cache bounded by the total size of its response bodies.
+
+    This is the default response cache backend. Other backends need the
+    same ``get(key)``, ``set(key, value, ttl)`` and ``delete_prefix(prefix)``
+    methods.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        size = len(value.body)
+        # Never let one response evict most of the cache
+        if ttl <= 0 or size > self.max_bytes // 4:
+            return
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (time.monotonic() + ttl, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._data)))
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1].body)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+def response_cache():
+    """Response cache backend of the current app"""
+    backend = current_app.extensions.get('response_cache')
+    if backend is None:
+        factory = current_app.config.get('RESPONSE_CACHE_BACKEND')
+        if factory:
+            if isinstance(factory, str):
+                factory = import_string(factory)
+            backend = factory(current_app)
+        else:
+            backend = LRUByteCache(current_app.config.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+        backend = current_app.extensions.setdefault('response_cache', backend)
+    return backend
+
+
+def _response_cache_key(namespace):
+    args = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+    return f'{namespace}:{request.path}?{args}'
+
+
+def _cached(entry, status, max_age):
+    response = make_response(entry.body if status == 200 else b'', status)
+    if status == 200:
+        response.mimetype = entry.mimetype
+    response.set_etag(entry.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def cached_response(namespace, on_hit=None):
+    """Cache successful responses of a public GET view.
+
+    Entries live for ``RESPONSE_CACHE_TTL`` seconds (0 disables caching) and
+    are keyed on the path and sorted query arguments. ``on_hit`` is called
+    with the view's arguments whenever the view itself is skipped, for side
+    effects such as counting product views.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            max_age = current_app.config.get('RESPONSE_CACHE_TTL', 0)
+            if max_age <= 0:
+                return f(*args, **kwargs)
+
+            cache = response_cache()
+            key = _response_cache_key(namespace)
+            entry = cache.get(key)
+            if entry is not None:
+                if on_hit is not None:
+                    on_hit(*args, **kwargs)
+                status = 304 if request.if_none_match.contains(entry.etag) else 200
+                response = _cached(entry, status, max_age)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            body = response.get_data()
+            entry = CachedResponse(body, hashlib.sha256(body).hexdigest()[:32], response.mimetype)
+            cache.set(key, entry, max_age)
+
+            status = 304 if request.if_none_match.contains(entry.etag) else 200
+            response = _cached(entry, status, max_age)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return decorated_function
+    return decorator
+
+
+def invalidate_responses(*namespaces):
+    """Drop cached responses of the given namespaces (call after commit)"""
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        for namespace in namespaces:
+            cache.delete_prefix(f'{namespace}:')
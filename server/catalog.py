@@ -0,0 +1,27 @@
+"""
+Catalog-wide figures shared by the category and product routes
+
+Active product counts per category come from one grouped COUNT, cached per
+app for ``CATEGORY_COUNT_CACHE_TTL`` seconds and dropped whenever a product
+is created, updated or deleted.
+"""
+
+from sqlalchemy import func
+from server.cache import app_cache, invalidate_caches
+from server.models.database import db, Product
+
+
+def category_product_counts():
+    """Mapping of category id to its number of active products"""
+    def compute():
+        rows = db.session.query(
+            Product.category_id,
+            func.count(Product.id)
+        ).filter(Product.is_active == True).group_by(Product.category_id).all()
+        return dict(rows)
+    return app_cache('category_counts', 'CATEGORY_COUNT_CACHE_TTL', 300).get_or_set('active', compute)
+
+
+def invalidate_category_counts():
+    """Forget cached counts after products change (call after commit)"""
+    invalidate_caches('category_counts')
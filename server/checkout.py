@@ -0,0 +1,158 @@
+"""
+Checkout engine
+
+Turns a user's cart into an order in a single transaction: the affected
+products are locked in id order, stock is decremented for all of them with
+one conditional UPDATE, order items are bulk inserted and everything is
+committed once. The daily sales rollup is updated in the same transaction.
+"""
+
+from sqlalchemy import case, func, insert, update
+from sqlalchemy.orm import selectinload
+from server.cache import invalidate_responses
+from server.models.database import db, CartItem, Order, OrderItem, Product
+from server.rollup import record_order_placed
+from server.utils import (generate_order_number, calculate_tax, calculate_shipping,
+                          validate_stock_quantity, ValidationError)
+
+
+class CheckoutError(ValidationError):
+    """Raised when a cart cannot be turned into an order"""
+
+
+def _stock_adjustment(quantities):
+    """CASE expression mapping product id to its quantity"""
+    return case(quantities, value=Product.__table__.c.id)
+
+
+def place_order(user_id, shipping_address, billing_address, payment_method, notes=None):
+    """Create an order from the user's cart, decrementing stock atomically.
+
+    Raises CheckoutError (after rolling back) if the cart is empty or any
+    product is unavailable or out of stock.
+    """
+    try:
+        cart_items = CartItem.query.filter_by(user_id=user_id).all()
+        if not cart_items:
+            raise CheckoutError('Cart is empty')
+
+        quantities = {item.product_id: item.quantity for item in cart_items}
+
+        # Lock every product row in id order so concurrent checkouts can't deadlock
+        products = Product.query.options(selectinload(Product.category)).filter(
+            Product.id.in_(quantities)
+        ).order_by(Product.id).with_for_update(of=Product).all()
+        products_by_id = {product.id: product for product in products}
+
+        for product_id, quantity in quantities.items():
+            product = products_by_id.get(product_id)
+            if product is None or not product.is_active:
+                name = product.name if product else f'#{product_id}'
+                raise CheckoutError(f'Product {name} is no longer available')
+            validate_stock_quantity(product, quantity)
+
+        # Calculate totals
+        line_totals = {
+            product_id: products_by_id[product_id].current_price * quantity
+            for product_id, quantity in quantities.items()
+        }
+        subtotal = sum(line_totals.values())
+        tax_amount = calculate_tax(subtotal)
+        shipping_amount = calculate_shipping(subtotal)
+        total_amount = subtotal + tax_amount + shipping_amount
+
+        order = Order(
+            order_number=generate_order_number(),
+            user_id=user_id,
+            subtotal=subtotal,
+            tax_amount=tax_amount,
+            shipping_amount=shipping_amount,
+            total_amount=total_amount,
+            shipping_address=shipping_address,
+            billing_address=billing_address,
+            payment_method=payment_method,
+            notes=notes
+        )
+        db.session.add(order)
+        db.session.flush()  # Get order ID
+
+        # Decrement stock for every product in one statement; the stock guard
+        # makes the statement touch fewer rows if anything was oversold
+        products_table = Product.__table__
+        adjustment = _stock_adjustment(quantities)
+        result = db.session.execute(
+            update(products_table)
+            .where(
+                products_table.c.id.in_(quantities),
+                products_table.c.is_active == True,
+                products_table.c.stock_quantity >= adjustment
+            )
+            .values(
+                stock_quantity=products_table.c.stock_quantity - adjustment,
+                sales_count=func.coalesce(products_table.c.sales_count, 0) + adjustment
+            )
+        )
+        if result.rowcount != len(quantities):
+            raise CheckoutError('Not enough stock to complete the order')
+
+        db.session.execute(insert(OrderItem), [
+            {
+                'order_id': order.id,
+                'product_id': product_id,
+                'quantity': quantity,
+                'unit_price': products_by_id[product_id].current_price,
+                'total_price': line_totals[product_id],
+                'product_snapshot': products_by_id[product_id].to_dict()  # Store product details
+            }
+            for product_id, quantity in sorted(quantities.items())
+        ])
+
+        category_lines = {}
+        for product_id, quantity in quantities.items():
+            category_id = products_by_id[product_id].category_id
+            units, revenue = category_lines.get(category_id, (0, 0))
+            category_lines[category_id] = (units + quantity, revenue + line_totals[product_id])
+        record_order_placed(order, [
+            (category_id, units, revenue) for category_id, (units, revenue) in category_lines.items()
+        ])
+
+        # Clear cart
+        CartItem.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+
+        db.session.commit()
+        # Cached product responses include stock
+        invalidate_responses('catalog')
+        return order
+
+    except ValidationError as e:
+        db.session.rollback()
+        if isinstance(e, CheckoutError):
+            raise
+        raise CheckoutError(e.message, e.field)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def restore_order_stock(order):
+    """Return an order's items to stock with a single UPDATE.
+
+    The caller commits and then calls ``invalidate_responses('catalog')``.
+    """
+    quantities = {}
+    for item in order.order_items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    if not quantities:
+        return
+
+    products_table = Product.__table__
+    adjustment = _stock_adjustment(quantities)
+    sales_count = func.coalesce(products_table.c.sales_count, 0) - adjustment
+    db.session.execute(
+        update(products_table)
+        .where(products_table.c.id.in_(quantities))
+        .values(
+            stock_quantity=products_table.c.stock_quantity + adjustment,
+            sales_count=case((sales_count < 0, 0), else_=sales_count)
+        )
+    )
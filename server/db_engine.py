@@ -0,0 +1,53 @@
+"""
+Per-connection database setup
+
+SQLite connections get the pragmas configured by ``SQLITE_JOURNAL_MODE``,
+``SQLITE_SYNCHRONOUS``, ``SQLITE_BUSY_TIMEOUT_MS`` and ``SQLITE_MMAP_SIZE``
+as soon as they are opened.
+"""
+
+from sqlalchemy import event
+from server.models.database import db
+
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_MODES = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+
+
+def sqlite_pragmas(config):
+    """PRAGMA statements for the configured SQLite settings"""
+    pragmas = []
+    journal_mode = (config.get('SQLITE_JOURNAL_MODE') or '').upper()
+    if journal_mode:
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f'Unknown SQLITE_JOURNAL_MODE {journal_mode!r}')
+        pragmas.append(f'PRAGMA journal_mode={journal_mode}')
+    synchronous = (config.get('SQLITE_SYNCHRONOUS') or '').upper()
+    if synchronous:
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f'Unknown SQLITE_SYNCHRONOUS {synchronous!r}')
+        pragmas.append(f'PRAGMA synchronous={synchronous}')
+    for name, key in (('busy_timeout', 'SQLITE_BUSY_TIMEOUT_MS'), ('mmap_size', 'SQLITE_MMAP_SIZE')):
+        value = config.get(key)
+        if value not in (None, ''):
+            pragmas.append(f'PRAGMA {name}={int(value)}')
+    return pragmas
+
+
+def configure_engines(app):
+    """Register connect-time setup on the app's engines"""
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name != 'sqlite':
+                continue
+
+            @event.listens_for(engine, 'connect')
+            def apply_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                try:
+                    for pragma in pragmas:
+                        cursor.execute(pragma)
+                finally:
+                    cursor.close()
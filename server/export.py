@@ -0,0 +1,115 @@
+"""
+Order export
+
+Streams orders with their line items as CSV (one row per line item) or
+NDJSON (one order per line, items nested). Orders, items and product SKUs
+come from a single joined SELECT read with ``yield_per``, so the database
+driver hands rows over in batches and memory stays flat however many
+orders match. Each batch is encoded into one chunk of the response.
+"""
+
+import csv
+import io
+from datetime import datetime, time, timedelta
+from flask import current_app
+from sqlalchemy import select
+from server.models.database import db, Order, OrderItem, Product
+
+EXPORT_BATCH_SIZE = 1000
+
+ORDER_COLUMNS = [
+    Order.id.label('order_id'),
+    Order.order_number,
+    Order.user_id,
+    Order.status,
+    Order.payment_status,
+    Order.currency,
+    Order.subtotal,
+    Order.tax_amount,
+    Order.shipping_amount,
+    Order.coupon_discount,
+    Order.total_amount,
+    Order.payment_method,
+    Order.created_at,
+]
+ITEM_COLUMNS = [
+    OrderItem.id.label('item_id'),
+    OrderItem.product_id,
+    Product.sku,
+    Product.name.label('product_name'),
+    OrderItem.quantity,
+    OrderItem.unit_price,
+    OrderItem.total_price,
+]
+ORDER_FIELDS = [column.key for column in ORDER_COLUMNS]
+ITEM_FIELDS = [column.key for column in ITEM_COLUMNS]
+
+
+def export_query(start_date=None, end_date=None, status=None, payment_status=None):
+    """One row per order item (orders without items get one row of NULL items)"""
+    query = select(*ORDER_COLUMNS, *ITEM_COLUMNS).select_from(Order).outerjoin(
+        OrderItem, OrderItem.order_id == Order.id
+    ).outerjoin(
+        Product, Product.id == OrderItem.product_id
+    )
+    if start_date:
+        query = query.where(Order.created_at >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.where(Order.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+    if status:
+        query = query.where(Order.status == status)
+    if payment_status:
+        query = query.where(Order.payment_status == payment_status)
+    # Items of an order must be adjacent for NDJSON grouping
+    return query.order_by(Order.created_at, Order.id, OrderItem.id)
+
+
+def _batches(query, batch_size):
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, 'value', value)
+
+
+def stream_csv(query, batch_size=EXPORT_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ORDER_FIELDS + ITEM_FIELDS)
+    yield buffer.getvalue()
+
+    for batch in _batches(query, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+
+def stream_ndjson(query, batch_size=EXPORT_BATCH_SIZE):
+    dumps = current_app.json.dumps
+    order = None
+    for batch in _batches(query, batch_size):
+        lines = []
+        for row in batch:
+            mapping = row._mapping
+            if order is None or order['order_id'] != mapping['order_id']:
+                if order is not None:
+                    lines.append(dumps(order))
+                order = {field: mapping[field] for field in ORDER_FIELDS}
+                order['items'] = []
+            if mapping['item_id'] is not None:
+                order['items'].append({field: mapping[field] for field in ITEM_FIELDS})
+        if lines:
+            lines.append('')
+            yield '\n'.join(lines)
+    if order is not None:
+        yield dumps(order) + '\n'
@@ -0,0 +1,162 @@
+"""
+SQL instrumentation
+
+A listener on every SQLAlchemy engine times each statement and hands it to
+the collectors active in the current context: one per request while
+``QUERY_INSTRUMENTATION`` is on, plus any opened with ``collect_queries()``
+(the tests' ``count_queries`` fixture). For each request the statement
+count and database time are sent as a ``Server-Timing`` header and logged
+as one JSON line on the ``server.instrumentation`` logger.
+
+Statements are grouped by shape (the SQL text, with expanded ``IN`` lists
+collapsed). A shape run ``N_PLUS_ONE_THRESHOLD`` or more times in one
+request is reported as a likely N+1 query; with ``N_PLUS_ONE_RAISE`` set
+(as in testing) the request fails with ``NPlusOneDetected`` instead.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_collectors = ContextVar('query_collectors', default=())
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+
+
+class NPlusOneDetected(RuntimeError):
+    """Raised when a request repeats a statement shape too often"""
+
+
+def statement_shape(statement):
+    """SQL text with expanded IN (...) parameter lists collapsed to one"""
+    return _PLACEHOLDER_LIST.sub('(?)', statement)
+
+
+class QueryStats:
+    """Statements executed while it is active, with their total duration"""
+
+    def __init__(self):
+        self.statements = []
+        self.parameters = []
+        self.duration = 0.0
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def record(self, statement, parameters, duration):
+        self.statements.append(statement)
+        self.parameters.append(parameters)
+        self.duration += duration
+
+    def shapes(self):
+        return Counter(statement_shape(statement) for statement in self.statements)
+
+    def repeated(self, threshold):
+        """(shape, count) for shapes executed at least ``threshold`` times"""
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
+
+
+@contextmanager
+def collect_queries():
+    """Collect the statements run in this context, e.g. ``with collect_queries() as stats``"""
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _collectors.get():
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'query_started', None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    for stats in _collectors.get():
+        stats.record(statement, parameters, duration)
+
+
+def _listen():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class QueryInstrumentation:
+    """Per-request statement counts, Server-Timing headers and N+1 detection"""
+
+    def __init__(self, app=None):
+        self.threshold = 10
+        self.raise_on_repeat = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 10)
+        self.raise_on_repeat = app.config.get('N_PLUS_ONE_RAISE', False)
+        app.extensions['query_instrumentation'] = self
+        _listen()
+        if app.config.get('QUERY_INSTRUMENTATION', True):
+            app.before_request(self._start)
+            app.after_request(self._finish)
+            app.teardown_request(self._stop)
+
+    def _start(self):
+        g.request_started = time.perf_counter()
+        g.query_stats = QueryStats()
+        g.query_stats_token = _collectors.set(_collectors.get() + (g.query_stats,))
+
+    def _stop(self, exc=None):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _collectors.reset(token)
+
+    def _finish(self, response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={elapsed * 1000:.2f}, db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+        )
+
+        repeated = self.repeated(stats)
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2),
+            'db_queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 2),
+            'repeated_queries': len(repeated)
+        }))
+        if repeated:
+            self._report(repeated)
+        return response
+
+    def repeated(self, stats):
+        return stats.repeated(self.threshold) if self.threshold else []
+
+    def _report(self, repeated):
+        details = '; '.join(f'{count}x {shape}' for shape, count in repeated)
+        message = f'Possible N+1 queries in {request.method} {request.path}: {details}'
+        if self.raise_on_repeat:
+            raise NPlusOneDetected(message)
+        logger.warning(message)
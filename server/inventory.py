@@ -0,0 +1,114 @@
+"""
+Bulk inventory updates
+
+Stock, price and sale price are set (``stock_quantity``) or adjusted
+(``stock_quantity_delta``) per SKU for many products at once. Each batch
+locks its products with one ``SELECT ... FOR UPDATE``, drops items whose
+product is missing, whose ``expected_updated_at`` no longer matches or
+that would go negative, and applies the rest in a single
+``UPDATE products ... FROM (VALUES ...)``. SQLite has no ``VALUES`` column
+aliases, so there the same UPDATE is run as one executemany.
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import Integer, Numeric, String, bindparam, cast, column, func, select, update, values
+from server.models.database import db, Product
+
+INVENTORY_FIELDS = {
+    'stock_quantity': Integer,
+    'price': Numeric(10, 2),
+    'sale_price': Numeric(10, 2),
+}
+INVENTORY_BATCH_SIZE = 1000
+
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _new_value(item, field, current):
+    if item.get(field) is not None:
+        return item[field]
+    delta = item.get(f'{field}_delta')
+    if delta is None:
+        return current
+    return (current or 0) + delta
+
+
+def _parameters(item):
+    """One VALUES row: the SKU, then an absolute value and a delta per field"""
+    row = {'sku': item['sku']}
+    for field in INVENTORY_FIELDS:
+        row[field] = item.get(field)
+        row[f'{field}_delta'] = item.get(f'{field}_delta')
+    return row
+
+
+def _assignments(source, now):
+    """SET clause computing each field from a VALUES row (or bound parameters)"""
+    assignments = {'updated_at': now}
+    for field, type_ in INVENTORY_FIELDS.items():
+        current = getattr(Product, field)
+        # The absolute value, else current + delta, else unchanged
+        assignments[field] = func.coalesce(
+            cast(source[field], type_),
+            func.coalesce(current, 0) + cast(source[f'{field}_delta'], type_),
+            current
+        )
+    return assignments
+
+
+def _apply(rows, now):
+    columns = [column('sku', String)]
+    for field, type_ in INVENTORY_FIELDS.items():
+        columns += [column(field, type_), column(f'{field}_delta', type_)]
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        names = [c.name for c in columns]
+        inventory = values(*columns, name='inventory').data([tuple(row[name] for name in names) for row in rows])
+        db.session.execute(
+            update(Product).where(Product.sku == inventory.c.sku).values(_assignments(inventory.c, now))
+        )
+    else:
+        params = {c.name: bindparam(f'b_{c.name}', type_=c.type) for c in columns}
+        statement = update(Product.__table__).where(Product.__table__.c.sku == params['sku'])
+        db.session.execute(
+            statement.values(_assignments(params, now)),
+            [{f'b_{name}': value for name, value in row.items()} for row in rows]
+        )
+
+
+def update_inventory(items):
+    """Apply validated inventory items; returns a summary. Caller commits."""
+    summary = {'updated': 0, 'not_found': [], 'conflicts': [], 'rejected': []}
+    now = datetime.utcnow()
+    for start in range(0, len(items), INVENTORY_BATCH_SIZE):
+        batch = items[start:start + INVENTORY_BATCH_SIZE]
+        current = {
+            row.sku: row for row in db.session.execute(
+                select(Product.sku, Product.updated_at, *[getattr(Product, field) for field in INVENTORY_FIELDS])
+                .where(Product.sku.in_([item['sku'] for item in batch]))
+                .order_by(Product.id)
+                .with_for_update()
+            )
+        }
+
+        rows = []
+        for item in batch:
+            product = current.get(item['sku'])
+            if product is None:
+                summary['not_found'].append(item['sku'])
+            elif 'expected_updated_at' in item and _naive_utc(item['expected_updated_at']) != product.updated_at:
+                summary['conflicts'].append(item['sku'])
+            elif any((_new_value(item, field, getattr(product, field)) or 0) < 0 for field in INVENTORY_FIELDS):
+                summary['rejected'].append(item['sku'])
+            else:
+                rows.append(_parameters(item))
+
+        if rows:
+            _apply(rows, now)
+            summary['updated'] += len(rows)
+    summary['updated_at'] = now if summary['updated'] else None
+    return summary
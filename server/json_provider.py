@@ -0,0 +1,77 @@
+"""
+JSON provider for API responses
+
+Uses orjson when it is installed and the standard library otherwise. Both
+serialize ``Decimal`` as a number, dates and datetimes as ISO 8601 strings
+and enums as their value, so model ``to_dict()`` methods hand over column
+values as they are instead of converting each one. The same ``dumps`` is
+used for JSON columns (order addresses, product snapshots).
+"""
+
+import decimal
+import enum
+import uuid
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, enum.Enum):
+        return o.value
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's json-module provider with API-friendly Decimal, datetime and enum output"""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson-backed provider; calls with json-module options use the stdlib"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._dumpb(obj, pretty), mimetype=self.mimetype)
+
+    def _dumpb(self, obj, pretty=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+def json_provider(app):
+    """Provider selected by ``JSON_PROVIDER``: 'orjson', 'stdlib' or 'auto'"""
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER is orjson but orjson is not installed')
+    if choice == 'orjson' or (choice == 'auto' and orjson is not None):
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
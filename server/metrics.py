@@ -0,0 +1,271 @@
+"""
+Prometheus metrics
+
+``GET /metrics`` serves request counts, latency, response size and SQL
+statement histograms per blueprint and endpoint, requests in progress,
+unhandled exceptions and database pool usage (connections checked out and
+time spent waiting to check one out) in the Prometheus text format.
+
+Values are kept in plain dicts behind one lock per process. When
+``METRICS_MULTIPROC_DIR`` is set (one directory shared by all gunicorn
+workers, emptied on deploy), every worker writes a JSON snapshot of its
+values there at most every ``METRICS_SNAPSHOT_INTERVAL`` seconds and at
+exit, and ``/metrics`` adds up the snapshots of all workers. Gauges are
+only taken from workers that are still running.
+"""
+
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from flask import Response, current_app, g, request
+from server.models.database import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by route and status code'),
+    'http_request_exceptions_total': ('counter', 'Requests that raised an unhandled exception'),
+    'http_request_duration_seconds': ('histogram', 'Time to handle a request'),
+    'http_response_size_bytes': ('histogram', 'Response body size (streamed responses excluded)'),
+    'http_request_db_queries': ('histogram', 'SQL statements executed per request'),
+    'http_requests_in_progress': ('gauge', 'Requests currently being handled'),
+    'db_pool_checkout_seconds': ('histogram', 'Time spent checking a connection out of the pool'),
+    'db_pool_checked_out': ('gauge', 'Connections currently checked out of the pool'),
+    'db_pool_size': ('gauge', 'Configured pool size'),
+}
+BUCKETS = {
+    'http_request_duration_seconds': LATENCY_BUCKETS,
+    'http_response_size_bytes': SIZE_BUCKETS,
+    'http_request_db_queries': QUERY_BUCKETS,
+    'db_pool_checkout_seconds': POOL_WAIT_BUCKETS,
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    """Per-process metric values and the /metrics endpoint"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.multiproc_dir = None
+        self.snapshot_interval = 5
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._last_snapshot = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.multiproc_dir = app.config.get('METRICS_MULTIPROC_DIR')
+        self.snapshot_interval = app.config.get('METRICS_SNAPSHOT_INTERVAL', 5)
+        app.extensions['metrics'] = self
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                self._time_checkouts(engine, bind or 'default')
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            atexit.register(self.write_snapshot)
+
+    # Recording
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name, labels=(), value=0, amount=None):
+        key = (name, labels)
+        with self._lock:
+            if amount is not None:
+                value = self._gauges.get(key, 0) + amount
+            self._gauges[key] = value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        buckets = BUCKETS[name]
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            index = len(buckets)
+            for position, bound in enumerate(buckets):
+                if value <= bound:
+                    index = position
+                    break
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def _time_checkouts(self, engine, bind):
+        raw_connection = engine.raw_connection
+        labels = (('bind', bind),)
+
+        def timed_raw_connection():
+            started = time.perf_counter()
+            connection = raw_connection()
+            self.observe('db_pool_checkout_seconds', labels, time.perf_counter() - started)
+            return connection
+
+        engine.raw_connection = timed_raw_connection
+
+    def _route_labels(self):
+        return (('blueprint', request.blueprint or ''), ('endpoint', request.endpoint or 'unmatched'),
+                ('method', request.method))
+
+    def _start(self):
+        g.metrics_started = time.perf_counter()
+        self.set_gauge('http_requests_in_progress', amount=1)
+
+    def _finish(self, response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        labels = self._route_labels()
+        self.inc('http_requests_total', labels + (('status', str(response.status_code)),))
+        self.observe('http_request_duration_seconds', labels, time.perf_counter() - started)
+        if not response.is_streamed and response.content_length is not None:
+            self.observe('http_response_size_bytes', labels, response.content_length)
+        stats = g.get('query_stats')
+        if stats is not None:
+            self.observe('http_request_db_queries', labels, stats.count)
+        return response
+
+    def _teardown(self, exc=None):
+        if g.pop('metrics_started', None) is None:
+            return
+        self.set_gauge('http_requests_in_progress', amount=-1)
+        if exc is not None:
+            self.inc('http_request_exceptions_total', self._route_labels())
+        if self.multiproc_dir and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.write_snapshot()
+
+    # Multi-process snapshots
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self._counters.items()],
+                'gauges': [[name, labels, value] for (name, labels), value in self._gauges.items()],
+                'histograms': [[name, labels, list(data[0]), data[1], data[2]]
+                               for (name, labels), data in self._histograms.items()],
+            }
+
+    def write_snapshot(self):
+        self._last_snapshot = time.monotonic()
+        path = os.path.join(self.multiproc_dir, f'metrics-{os.getpid()}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temporary, path)
+
+    def _snapshots(self):
+        """Snapshots of every worker; this process contributes its live values"""
+        snapshots = [(os.getpid(), self.snapshot())]
+        if not self.multiproc_dir:
+            return snapshots
+        for path in glob.glob(os.path.join(self.multiproc_dir, 'metrics-*.json')):
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+            if pid == os.getpid():
+                continue
+            try:
+                with open(path) as snapshot_file:
+                    snapshots.append((pid, json.load(snapshot_file)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def _pool_gauges(self):
+        gauges = {}
+        for bind, engine in db.engines.items():
+            labels = (('bind', bind or 'default'),)
+            pool = engine.pool
+            if hasattr(pool, 'checkedout'):
+                gauges[('db_pool_checked_out', labels)] = pool.checkedout()
+            if hasattr(pool, 'size'):
+                gauges[('db_pool_size', labels)] = pool.size()
+        return gauges
+
+    # Exposition
+
+    def collect(self):
+        """Merged (counters, gauges, histograms) across workers"""
+        counters, gauges, histograms = {}, {}, {}
+        for pid, snapshot in self._snapshots():
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            if pid == os.getpid() or _pid_running(pid):
+                for name, labels, value in snapshot['gauges']:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+            for name, labels, bucket_counts, total, count in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(bucket_counts), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], bucket_counts)]
+                merged[1] += total
+                merged[2] += count
+        gauges.update(self._pool_gauges())
+        return counters, gauges, histograms
+
+    def render(self):
+        counters, gauges, histograms = self.collect()
+        series = {}
+        for (name, labels), value in list(counters.items()) + list(gauges.items()):
+            series.setdefault(name, []).append((labels, [f'{name}{_labels(labels)} {value}']))
+        for (name, labels), (bucket_counts, total, count) in histograms.items():
+            lines = []
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS[name] + ('+Inf',), bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+            series.setdefault(name, []).append((labels, lines))
+
+        output = []
+        for name, (metric_type, help_text) in METRICS.items():
+            output.append(f'# HELP {name} {help_text}')
+            output.append(f'# TYPE {name} {metric_type}')
+            for _, lines in sorted(series.get(name, []), key=lambda item: item[0]):
+                output.extend(lines)
+        return '\n'.join(output) + '\n'
+
+    def metrics_view(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(self.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
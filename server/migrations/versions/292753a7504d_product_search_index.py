@@ -0,0 +1,98 @@
+"""product search index
+
+Revision ID: 292753a7504d
+Revises: cdcf6a4e03e1
+Create Date: 2026-10-18 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '292753a7504d'
+down_revision = 'cdcf6a4e03e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        # Weighted tsvector kept current by a trigger, searched through a GIN index
+        op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        op.execute("""
+            CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(NEW.brand, '')), 'B') ||
+                    setweight(to_tsvector('simple', coalesce(NEW.model, '')), 'B') ||
+                    setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("DROP TRIGGER IF EXISTS products_search_vector_trigger ON products")
+        op.execute("""
+            CREATE TRIGGER products_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF name, description, brand, model ON products
+            FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+        """)
+        op.execute("""
+            UPDATE products SET search_vector =
+                setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(brand, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(model, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+        """)
+        op.execute("CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)")
+
+    elif bind.dialect.name == 'sqlite':
+        # FTS5 external-content table mirroring products via triggers
+        op.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, brand, model,
+                content='products', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name, description, brand, model)
+                VALUES (new.id, new.name, new.description, new.brand, new.model);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description, brand, model)
+                VALUES ('delete', old.id, old.name, old.description, old.brand, old.model);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS products_fts_au
+            AFTER UPDATE OF name, description, brand, model ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name, description, brand, model)
+                VALUES ('delete', old.id, old.name, old.description, old.brand, old.model);
+                INSERT INTO products_fts(rowid, name, description, brand, model)
+                VALUES (new.id, new.name, new.description, new.brand, new.model);
+            END
+        """)
+        op.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+        op.execute("DROP TRIGGER IF EXISTS products_search_vector_trigger ON products")
+        op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
+        op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS products_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS products_fts_ai")
+        op.execute("DROP TABLE IF EXISTS products_fts")
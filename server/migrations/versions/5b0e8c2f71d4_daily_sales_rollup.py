@@ -0,0 +1,45 @@
+"""daily sales rollup
+
+Revision ID: 5b0e8c2f71d4
+Revises: 292753a7504d
+Create Date: 2026-10-18 11:03:27.904316
+
+Run ``flask backfill-sales-rollup`` after upgrading to populate the table
+from existing orders.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0e8c2f71d4'
+down_revision = '292753a7504d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The paymentstatus enum type already exists for orders.payment_status
+    payment_status = sa.Enum(
+        'PENDING', 'COMPLETED', 'FAILED', 'REFUNDED', name='paymentstatus'
+    ).with_variant(
+        postgresql.ENUM('PENDING', 'COMPLETED', 'FAILED', 'REFUNDED', name='paymentstatus', create_type=False),
+        'postgresql'
+    )
+    op.create_table('daily_sales_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sales_date', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('payment_status', payment_status, nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sales_date', 'category_id', 'payment_status', name='unique_daily_sales_rollup')
+    )
+
+
+def downgrade():
+    op.drop_table('daily_sales_rollup')
@@ -0,0 +1,84 @@
+"""foreign key and filter indexes
+
+Revision ID: a41f6d9c3e27
+Revises: 5b0e8c2f71d4
+Create Date: 2026-10-18 13:26:08.417552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f6d9c3e27'
+down_revision = '5b0e8c2f71d4'
+branch_labels = None
+depends_on = None
+
+
+# Partial index predicates (other databases get full indexes)
+ACTIVE = {
+    'postgresql_where': sa.text('is_active = true'),
+    'sqlite_where': sa.text('is_active = 1'),
+}
+ACTIVE_FEATURED = {
+    'postgresql_where': sa.text('is_active = true AND is_featured = true'),
+    'sqlite_where': sa.text('is_active = 1 AND is_featured = 1'),
+}
+
+
+def upgrade():
+    # Storefront listings only read active products
+    op.create_index('ix_products_category_id', 'products', ['category_id'])
+    op.create_index('ix_products_active_created_at', 'products', ['created_at', 'id'],
+                    **ACTIVE)
+    op.create_index('ix_products_active_category_created_at', 'products', ['category_id', 'created_at', 'id'],
+                    **ACTIVE)
+    op.create_index('ix_products_active_price', 'products', ['price', 'id'],
+                    **ACTIVE)
+    op.create_index('ix_products_active_featured', 'products', ['created_at'],
+                    **ACTIVE_FEATURED)
+
+    op.create_index('ix_cart_items_product_id', 'cart_items', ['product_id'])
+    op.create_index('ix_addresses_user_id_type', 'addresses', ['user_id', 'type'])
+
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', sa.text('created_at DESC')])
+    op.create_index('ix_orders_created_at', 'orders', ['created_at'])
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'])
+    op.create_index('ix_orders_payment_status_created_at', 'orders', ['payment_status', 'created_at'])
+    op.create_index('ix_orders_coupon_id', 'orders', ['coupon_id'])
+
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'])
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id'])
+
+    op.create_index('ix_wishlist_items_product_id', 'wishlist_items', ['product_id'])
+    op.create_index('ix_product_reviews_product_id', 'product_reviews', ['product_id'])
+    op.create_index('ix_product_reviews_order_id', 'product_reviews', ['order_id'])
+    op.create_index('ix_coupon_usage_coupon_id', 'coupon_usage', ['coupon_id'])
+    op.create_index('ix_coupon_usage_order_id', 'coupon_usage', ['order_id'])
+
+
+def downgrade():
+    op.drop_index('ix_coupon_usage_order_id', table_name='coupon_usage')
+    op.drop_index('ix_coupon_usage_coupon_id', table_name='coupon_usage')
+    op.drop_index('ix_product_reviews_order_id', table_name='product_reviews')
+    op.drop_index('ix_product_reviews_product_id', table_name='product_reviews')
+    op.drop_index('ix_wishlist_items_product_id', table_name='wishlist_items')
+
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+
+    op.drop_index('ix_orders_coupon_id', table_name='orders')
+    op.drop_index('ix_orders_payment_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_created_at', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+
+    op.drop_index('ix_addresses_user_id_type', table_name='addresses')
+    op.drop_index('ix_cart_items_product_id', table_name='cart_items')
+
+    op.drop_index('ix_products_active_featured', table_name='products')
+    op.drop_index('ix_products_active_price', table_name='products')
+    op.drop_index('ix_products_active_category_created_at', table_name='products')
+    op.drop_index('ix_products_active_created_at', table_name='products')
+    op.drop_index('ix_products_category_id', table_name='products')
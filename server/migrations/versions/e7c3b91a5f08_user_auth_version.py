@@ -0,0 +1,26 @@
+"""user auth version
+
+Revision ID: e7c3b91a5f08
+Revises: a41f6d9c3e27
+Create Date: 2026-10-18 14:41:52.063197
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3b91a5f08'
+down_revision = 'a41f6d9c3e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('auth_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('auth_version')
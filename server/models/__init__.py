@@ -16,6 +16,7 @@ from .database import (
     CouponStatus,
     DiscountType,
     ReviewStatus,
+    DailySalesRollup,
     DatabaseUtils
 )
 
@@ -37,5 +38,6 @@ __all__ = [
     'CouponStatus',
     'DiscountType',
     'ReviewStatus',
+    'DailySalesRollup',
     'DatabaseUtils'
 ]
\ No newline at end of file
@@ -5,13 +5,32 @@ Fixed the Coupon-Order relationship issue
 
 from datetime import datetime, timedelta
 from decimal import Decimal
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import func, and_, or_
+from flask_sqlalchemy.session import Session
+from sqlalchemy import func, and_, or_, case
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.sql.selectable import Select, CompoundSelect
 import enum
+from server.passwords import password_hasher
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to the read replica chosen for the
+    current request (see ``server.replicas``); flushes, DML, ``FOR UPDATE``
+    and everything outside a replica-read request use the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context()
+                and isinstance(clause, (Select, CompoundSelect))
+                and getattr(clause, '_for_update_arg', None) is None):
+            read_engine = g.get('db_read_engine')
+            if read_engine is not None:
+                return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 Base = db.Model
 
 # Enums
@@ -61,6 +80,9 @@ class User(db.Model):
     phone = db.Column(db.String(20))
     role = db.Column(db.Enum(UserRole), nullable=False, default=UserRole.CUSTOMER)
     is_active = db.Column(db.Boolean, default=True)
+    # Bumped whenever role or active status changes, invalidating the
+    # role claims of previously issued access tokens
+    auth_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -70,10 +92,18 @@ class User(db.Model):
     addresses = db.relationship('Address', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher().verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash predates the current hashing settings"""
+        return password_hasher().needs_rehash(self.password_hash)
+    
+    def jwt_claims(self):
+        """Additional access token claims checked by admin_required/manager_required"""
+        return {'role': self.role.value, 'auth_version': self.auth_version}
     
     def to_dict(self):
         return {
@@ -82,10 +112,10 @@ class User(db.Model):
             'first_name': self.first_name,
             'last_name': self.last_name,
             'phone': self.phone,
-            'role': self.role.value,
+            'role': self.role,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Category(db.Model):
@@ -101,15 +131,21 @@ class Category(db.Model):
     # Relationships
     products = db.relationship('Product', backref='category', lazy=True)
     
-    def to_dict(self):
+    def active_product_count(self):
+        return Product.query.filter_by(category_id=self.id, is_active=True).count()
+    
+    def to_dict(self, product_count=None):
+        """Serialize; pass product_count when it is already known (see server.catalog)"""
+        if product_count is None:
+            product_count = self.active_product_count()
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'image_url': self.image_url,
             'is_active': self.is_active,
-            'product_count': len(self.products),
-            'created_at': self.created_at.isoformat()
+            'product_count': product_count,
+            'created_at': self.created_at
         }
 
 class Product(db.Model):
@@ -139,10 +175,29 @@ class Product(db.Model):
     cart_items = db.relationship('CartItem', backref='product', lazy=True)
     order_items = db.relationship('OrderItem', backref='product', lazy=True)
     
-    @property
+    # Storefront queries only ever list active products, so the listing
+    # indexes are partial
+    __table_args__ = (
+        db.Index('ix_products_category_id', category_id),
+        db.Index('ix_products_active_created_at', created_at, id,
+                 postgresql_where=is_active == True, sqlite_where=is_active == True),
+        db.Index('ix_products_active_category_created_at', category_id, created_at, id,
+                 postgresql_where=is_active == True, sqlite_where=is_active == True),
+        db.Index('ix_products_active_price', price, id,
+                 postgresql_where=is_active == True, sqlite_where=is_active == True),
+        db.Index('ix_products_active_featured', created_at,
+                 postgresql_where=(is_active == True) & (is_featured == True),
+                 sqlite_where=(is_active == True) & (is_featured == True)),
+    )
+    
+    @hybrid_property
     def current_price(self):
         return self.sale_price if self.sale_price else self.price
     
+    @current_price.expression
+    def current_price(cls):
+        return case((func.coalesce(cls.sale_price, 0) != 0, cls.sale_price), else_=cls.price)
+    
     @property
     def is_in_stock(self):
         return self.stock_quantity > 0
@@ -152,9 +207,9 @@ class Product(db.Model):
             'id': self.id,
             'name': self.name,
             'description': self.description,
-            'price': float(self.price),
-            'sale_price': float(self.sale_price) if self.sale_price else None,
-            'current_price': float(self.current_price),
+            'price': self.price,
+            'sale_price': self.sale_price or None,
+            'current_price': self.current_price,
             'sku': self.sku,
             'stock_quantity': self.stock_quantity,
             'image_urls': self.image_urls or [],
@@ -169,8 +224,8 @@ class Product(db.Model):
             'sales_count': self.sales_count,
             'category_id': self.category_id,
             'category_name': self.category.name if self.category else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class CartItem(db.Model):
@@ -183,7 +238,10 @@ class CartItem(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_user_product_cart'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='unique_user_product_cart'),
+        db.Index('ix_cart_items_product_id', 'product_id'),
+    )
     
     @property
     def total_price(self):
@@ -195,9 +253,9 @@ class CartItem(db.Model):
             'user_id': self.user_id,
             'product': self.product.to_dict(),
             'quantity': self.quantity,
-            'total_price': float(self.total_price),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'total_price': self.total_price,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Address(db.Model):
@@ -219,6 +277,8 @@ class Address(db.Model):
     is_default = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (db.Index('ix_addresses_user_id_type', 'user_id', 'type'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -234,7 +294,7 @@ class Address(db.Model):
             'country': self.country,
             'phone': self.phone,
             'is_default': self.is_default,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
 
 class Order(db.Model):
@@ -267,19 +327,27 @@ class Order(db.Model):
     order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     # Note: coupon relationship is defined in Coupon model
     
+    __table_args__ = (
+        db.Index('ix_orders_user_id_created_at', user_id, created_at.desc()),
+        db.Index('ix_orders_created_at', created_at),
+        db.Index('ix_orders_status_created_at', status, created_at),
+        db.Index('ix_orders_payment_status_created_at', payment_status, created_at),
+        db.Index('ix_orders_coupon_id', coupon_id),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
             'order_number': self.order_number,
             'user_id': self.user_id,
             'coupon_id': self.coupon_id,
-            'coupon_discount': float(self.coupon_discount) if self.coupon_discount else 0,
-            'status': self.status.value,
-            'payment_status': self.payment_status.value,
-            'subtotal': float(self.subtotal),
-            'tax_amount': float(self.tax_amount),
-            'shipping_amount': float(self.shipping_amount),
-            'total_amount': float(self.total_amount),
+            'coupon_discount': self.coupon_discount or 0,
+            'status': self.status,
+            'payment_status': self.payment_status,
+            'subtotal': self.subtotal,
+            'tax_amount': self.tax_amount,
+            'shipping_amount': self.shipping_amount,
+            'total_amount': self.total_amount,
             'currency': self.currency,
             'shipping_address': self.shipping_address,
             'billing_address': self.billing_address,
@@ -288,11 +356,34 @@ class Order(db.Model):
             'notes': self.notes,
             'items': [item.to_dict() for item in self.order_items],
             'coupon': self.coupon.to_dict() if self.coupon else None,
-            'shipped_at': self.shipped_at.isoformat() if self.shipped_at else None,
-            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'shipped_at': self.shipped_at,
+            'delivered_at': self.delivered_at,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+    def to_summary_dict(self, include_items=False):
+        """Order history entry; items come from their product snapshots"""
+        summary = {
+            'id': self.id,
+            'order_number': self.order_number,
+            'user_id': self.user_id,
+            'status': self.status,
+            'payment_status': self.payment_status,
+            'subtotal': self.subtotal,
+            'coupon_discount': self.coupon_discount or 0,
+            'total_amount': self.total_amount,
+            'currency': self.currency,
+            'coupon_code': self.coupon.code if self.coupon else None,
+            'item_count': len(self.order_items),
+            'total_items': sum(item.quantity for item in self.order_items),
+            'shipped_at': self.shipped_at,
+            'delivered_at': self.delivered_at,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
+        if include_items:
+            summary['items'] = [item.to_summary_dict() for item in self.order_items]
+        return summary
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
@@ -305,14 +396,33 @@ class OrderItem(db.Model):
     total_price = db.Column(db.Numeric(10, 2), nullable=False)
     product_snapshot = db.Column(db.JSON)  # Store product details at time of order
     
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_product_id', 'product_id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
             'product_id': self.product_id,
             'product': self.product.to_dict() if self.product else self.product_snapshot,
             'quantity': self.quantity,
-            'unit_price': float(self.unit_price),
-            'total_price': float(self.total_price)
+            'unit_price': self.unit_price,
+            'total_price': self.total_price
+        }
+
+    def to_summary_dict(self):
+        """Line item as ordered, without loading the live product"""
+        snapshot = self.product_snapshot or {}
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'name': snapshot.get('name'),
+            'sku': snapshot.get('sku'),
+            'image_url': (snapshot.get('image_urls') or [None])[0],
+            'quantity': self.quantity,
+            'unit_price': self.unit_price,
+            'total_price': self.total_price
         }
 
 # Extended Models (from the previous database extension)
@@ -329,14 +439,17 @@ class WishlistItem(db.Model):
     user = db.relationship('User', backref=db.backref('wishlist_items', lazy=True))
     product = db.relationship('Product', backref=db.backref('wishlist_items', lazy=True))
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_user_product_wishlist'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='unique_user_product_wishlist'),
+        db.Index('ix_wishlist_items_product_id', 'product_id'),
+    )
     
     def to_dict(self):
         return {
             'id': self.id,
             'user_id': self.user_id,
             'product': self.product.to_dict() if self.product else None,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
 
 class ProductReview(db.Model):
@@ -361,7 +474,11 @@ class ProductReview(db.Model):
     product = db.relationship('Product', backref=db.backref('reviews', lazy=True))
     order = db.relationship('Order', backref=db.backref('reviews', lazy=True))
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='unique_user_product_review'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='unique_user_product_review'),
+        db.Index('ix_product_reviews_product_id', 'product_id'),
+        db.Index('ix_product_reviews_order_id', 'order_id'),
+    )
     
     def to_dict(self):
         return {
@@ -372,11 +489,11 @@ class ProductReview(db.Model):
             'rating': self.rating,
             'title': self.title,
             'comment': self.comment,
-            'status': self.status.value,
+            'status': self.status,
             'is_verified_purchase': self.is_verified_purchase,
             'helpful_count': self.helpful_count,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
 class Coupon(db.Model):
@@ -432,18 +549,18 @@ class Coupon(db.Model):
             'code': self.code,
             'name': self.name,
             'description': self.description,
-            'discount_type': self.discount_type.value,
-            'discount_value': float(self.discount_value),
-            'minimum_order_amount': float(self.minimum_order_amount),
-            'maximum_discount_amount': float(self.maximum_discount_amount) if self.maximum_discount_amount else None,
+            'discount_type': self.discount_type,
+            'discount_value': self.discount_value,
+            'minimum_order_amount': self.minimum_order_amount,
+            'maximum_discount_amount': self.maximum_discount_amount or None,
             'usage_limit': self.usage_limit,
             'usage_limit_per_user': self.usage_limit_per_user,
             'used_count': self.used_count,
-            'status': self.status.value,
+            'status': self.status,
             'is_valid': self.is_valid,
-            'valid_from': self.valid_from.isoformat(),
-            'valid_until': self.valid_until.isoformat(),
-            'created_at': self.created_at.isoformat()
+            'valid_from': self.valid_from,
+            'valid_until': self.valid_until,
+            'created_at': self.created_at
         }
 
 # Additional table to track coupon usage per user (optional but recommended)
@@ -463,7 +580,41 @@ class CouponUsage(db.Model):
     coupon = db.relationship('Coupon', backref=db.backref('usage_records', lazy=True))
     order = db.relationship('Order', backref=db.backref('coupon_usage', lazy=True))
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'coupon_id', 'order_id', name='unique_user_coupon_order'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'coupon_id', 'order_id', name='unique_user_coupon_order'),
+        db.Index('ix_coupon_usage_coupon_id', 'coupon_id'),
+        db.Index('ix_coupon_usage_order_id', 'order_id'),
+    )
+
+class DailySalesRollup(db.Model):
+    """Pre-aggregated daily sales, maintained incrementally by server.rollup"""
+    __tablename__ = 'daily_sales_rollup'
+    
+    # category_id 0 holds whole-order totals (total_amount incl. tax and shipping);
+    # other rows hold line-item totals for one category
+    ALL_CATEGORIES = 0
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sales_date = db.Column(db.Date, nullable=False)
+    category_id = db.Column(db.Integer, nullable=False, default=ALL_CATEGORIES)
+    payment_status = db.Column(db.Enum(PaymentStatus), nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('sales_date', 'category_id', 'payment_status', name='unique_daily_sales_rollup'),
+    )
+    
+    def to_dict(self):
+        return {
+            'sales_date': self.sales_date,
+            'category_id': self.category_id,
+            'payment_status': self.payment_status,
+            'order_count': self.order_count,
+            'units': self.units,
+            'revenue': self.revenue
+        }
 
 # Database utility functions
 class DatabaseUtils:
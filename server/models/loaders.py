@@ -0,0 +1,33 @@
+"""
+Eager-loading strategies for list endpoints
+
+Each helper returns the loader options a route should pass to
+``query.options(...)`` so that serializing the results with ``to_dict()``
+runs a fixed number of SQL statements instead of one per row.
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+from .database import Product, Order, OrderItem, Coupon
+
+
+def product_options():
+    """Products with their category (Product.to_dict reads category.name)"""
+    return (joinedload(Product.category),)
+
+
+def order_options():
+    """Orders with coupon, line items and each item's product and category"""
+    return (
+        joinedload(Order.coupon),
+        selectinload(Order.order_items)
+        .joinedload(OrderItem.product)
+        .joinedload(Product.category),
+    )
+
+
+def order_summary_options():
+    """Orders with coupon code and line items for Order.to_summary_dict (no product rows)"""
+    return (
+        joinedload(Order.coupon).load_only(Coupon.code),
+        selectinload(Order.order_items),
+    )
@@ -0,0 +1,139 @@
+"""
+Password hashing
+
+Passwords are hashed with ``PASSWORD_HASH_METHOD`` ("pbkdf2" or "bcrypt")
+at the cost set by ``PASSWORD_PBKDF2_ITERATIONS`` or
+``PASSWORD_BCRYPT_ROUNDS``. Hashes made with other settings (including
+Werkzeug's defaults) still verify, and login replaces them with a hash at
+the current settings.
+
+Hashing runs on a pool of ``PASSWORD_HASH_WORKERS`` threads per process.
+Both hashlib's PBKDF2 and bcrypt release the GIL, so with gthread workers
+the other request threads keep running meanwhile. At most
+``PASSWORD_HASH_QUEUE`` further calls wait for a thread; beyond that
+``HashingBusy`` is raised and the routes answer 503 instead of piling up
+requests behind a login burst. ``PASSWORD_HASH_WORKERS = 0`` hashes on
+the request thread, unbounded.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+from server.utils import error_response
+
+METHODS = {'pbkdf2', 'bcrypt'}
+BCRYPT_HASH = re.compile(r'\$2[abxy]\$\d{2}\$[./A-Za-z0-9]{53}')
+
+
+class HashingBusy(Exception):
+    """Every hashing thread is busy and the wait queue is full"""
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded thread pool"""
+
+    def __init__(self, app=None):
+        self.method = 'pbkdf2'
+        self.pbkdf2_iterations = 600_000
+        self.bcrypt_rounds = 12
+        self.workers = 0
+        self.queue = 0
+        self._slots = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        method = (app.config.get('PASSWORD_HASH_METHOD') or 'pbkdf2').lower()
+        if method not in METHODS:
+            raise ValueError(f'Unknown PASSWORD_HASH_METHOD {method!r}')
+        self.method = method
+        self.pbkdf2_iterations = app.config.get('PASSWORD_PBKDF2_ITERATIONS', 600_000)
+        self.bcrypt_rounds = app.config.get('PASSWORD_BCRYPT_ROUNDS', 12)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.queue = app.config.get('PASSWORD_HASH_QUEUE', 16)
+        if self.workers > 0:
+            self._slots = threading.BoundedSemaphore(self.workers + self.queue)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        """Hash a password with the configured method and cost"""
+        return self._run(self._hash, password)
+
+    def verify(self, password_hash, password):
+        """Check a password against a hash made with any supported settings"""
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a hash was made with other settings than the current ones"""
+        if password_hash.startswith('$2'):
+            return self.method != 'bcrypt' or _bcrypt_rounds(password_hash) != self.bcrypt_rounds
+        return self.method != 'pbkdf2' or password_hash.split('$', 1)[0] != self._pbkdf2_method()
+
+    def _pbkdf2_method(self):
+        return f'pbkdf2:sha256:{self.pbkdf2_iterations}'
+
+    def _hash(self, password):
+        if self.method == 'bcrypt':
+            salt = bcrypt.gensalt(self.bcrypt_rounds)
+            return bcrypt.hashpw(password.encode('utf-8'), salt).decode('ascii')
+        return generate_password_hash(password, method=self._pbkdf2_method())
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self._pool().submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def _pool(self):
+        # Threads do not survive a fork; each gunicorn worker starts its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+
+def _verify(password_hash, password):
+    if password_hash.startswith('$2'):
+        # bcrypt panics rather than raising on malformed hashes
+        if not BCRYPT_HASH.fullmatch(password_hash):
+            return False
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('ascii'))
+    return check_password_hash(password_hash, password)
+
+
+def _bcrypt_rounds(password_hash):
+    try:
+        return int(password_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+_default_hasher = PasswordHasher()
+
+
+def password_hasher():
+    """The current app's hasher, or one with default settings outside an app"""
+    if has_app_context():
+        hasher = current_app.extensions.get('password_hasher')
+        if hasher is not None:
+            return hasher
+    return _default_hasher
+
+
+def hashing_busy_response():
+    """503 for a request turned away by a full hashing queue"""
+    response, status_code = error_response('Too many sign-in requests, please try again shortly', 503)
+    response.headers['Retry-After'] = '1'
+    return response, status_code
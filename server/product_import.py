@@ -0,0 +1,191 @@
+"""
+Bulk product import
+
+Rows come from a JSON array, a CSV upload or NDJSON (one product per line);
+CSV and NDJSON bodies are read from the request stream as they arrive.
+Rows are validated with ``ProductCreateSchema`` and written in batches of
+``PRODUCT_IMPORT_BATCH_SIZE``: categories and existing SKUs are looked up
+with one ``IN`` query per batch, and the batch is upserted with
+``INSERT ... ON CONFLICT (sku) DO UPDATE`` and committed. Invalid rows are
+skipped and reported by row number; an existing product only has the
+columns present in its row overwritten.
+"""
+
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import islice
+from flask import current_app
+from marshmallow import ValidationError
+from sqlalchemy import select
+from server.models.database import db, Category, Product
+from server.schemas import ProductCreateSchema
+from server.utils import dialect_insert
+
+JSON_CSV_FIELDS = ('image_urls', 'specifications')
+MAX_REPORTED_ERRORS = 1000
+IMPORT_READ_BUFFER = 64 * 1024
+
+
+class ImportFormatError(ValueError):
+    """Raised when the import body cannot be read at all"""
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    for row in reader:
+        # Blank cells mean "not given"; list and dict columns hold JSON
+        data = {key: value for key, value in row.items() if key and value not in ('', None)}
+        for field in JSON_CSV_FIELDS:
+            if field in data:
+                try:
+                    data[field] = json.loads(data[field])
+                except ValueError:
+                    data[field] = ValidationError({field: ['Not valid JSON.']})
+        yield data
+
+
+def _ndjson_rows(stream):
+    loads = current_app.json.loads
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            yield ValidationError({'_schema': ['Not valid JSON.']})
+
+
+def _buffered(stream):
+    # The WSGI input stream is unbuffered, so iterating over its lines
+    # would read it a byte at a time
+    if isinstance(stream, io.RawIOBase):
+        return io.BufferedReader(stream, IMPORT_READ_BUFFER)
+    return stream
+
+
+def read_import_rows(request):
+    """Iterate over the raw product rows in an import request"""
+    mimetype = request.mimetype
+    if mimetype == 'application/json':
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('products')
+        if not isinstance(data, list):
+            raise ImportFormatError('Expected a JSON array of products')
+        return iter(data)
+    if mimetype == 'text/csv':
+        return _csv_rows(_buffered(request.stream))
+    if mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return _ndjson_rows(_buffered(request.stream))
+    raise ImportFormatError('Content type must be application/json, text/csv or application/x-ndjson')
+
+
+class ProductImport:
+    """Validates and upserts product rows batch by batch"""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or current_app.config.get('PRODUCT_IMPORT_BATCH_SIZE', 1000)
+        self.schema = ProductCreateSchema()
+        self.known_categories = set()
+        self.seen_skus = {}
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        numbered = enumerate(rows, start=1)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                break
+            self._import_batch(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
+
+    def _fail(self, row_number, row, messages):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            sku = row.get('sku') if isinstance(row, dict) else None
+            self.errors.append({'row': row_number, 'sku': sku, 'errors': messages})
+
+    def _validate(self, batch):
+        valid = []
+        for row_number, row in batch:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValidationError({'_schema': ['Each product must be an object.']})
+                for value in row.values():
+                    if isinstance(value, ValidationError):
+                        raise value
+                data = self.schema.load(row)
+            except ValidationError as e:
+                self._fail(row_number, row, e.messages)
+                continue
+
+            first_row = self.seen_skus.setdefault(data['sku'], row_number)
+            if first_row != row_number:
+                self._fail(row_number, row, {'sku': [f'Duplicate SKU; already imported from row {first_row}.']})
+                continue
+            valid.append((row_number, data))
+        return valid
+
+    def _check_categories(self, valid):
+        wanted = {data['category_id'] for _, data in valid} - self.known_categories
+        if wanted:
+            self.known_categories.update(db.session.scalars(
+                select(Category.id).where(Category.id.in_(wanted))
+            ))
+        checked = []
+        for row_number, data in valid:
+            if data['category_id'] in self.known_categories:
+                checked.append(data)
+            else:
+                self._fail(row_number, data, {'category_id': ['Category not found.']})
+        return checked
+
+    def _import_batch(self, batch):
+        first_error = len(self.errors)
+        products = self._check_categories(self._validate(batch))
+        self.errors[first_error:] = sorted(self.errors[first_error:], key=lambda error: error['row'])
+        if not products:
+            return
+
+        skus = [data['sku'] for data in products]
+        existing = set(db.session.scalars(select(Product.sku).where(Product.sku.in_(skus))))
+
+        # Rows are grouped by the columns they set, so each group is one
+        # executemany of the same statement
+        groups = {}
+        for data in products:
+            groups.setdefault(tuple(sorted(data)), []).append(data)
+
+        table = Product.__table__
+        now = datetime.utcnow()
+        try:
+            for columns, rows in groups.items():
+                statement = dialect_insert(table)
+                update = {name: statement.excluded[name] for name in columns if name != 'sku'}
+                update['updated_at'] = now
+                statement = statement.on_conflict_do_update(index_elements=[table.c.sku], set_=update)
+                db.session.execute(statement, rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self.updated += len(existing)
+        self.created += len(products) - len(existing)
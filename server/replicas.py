@@ -0,0 +1,152 @@
+"""
+Read-replica routing
+
+Replica URLs from ``DATABASE_REPLICA_URLS`` become the ``replica_*`` binds
+(``server.config.replica_binds``). Views decorated with ``@replica_read``
+pick a healthy replica at random and ``RoutingSession`` sends their plain
+SELECTs to it; writes, flushes and locking reads always go to the primary,
+as does every other view.
+
+Read-your-writes: a request that writes pins its user to the primary for
+``REPLICA_STICKY_SECONDS`` (remembered in this process by user id and in a
+``db_primary_until`` cookie so other workers honour it too). A replica
+that raises a database error is skipped for ``REPLICA_RETRY_INTERVAL``
+seconds and the view is run again on the primary.
+"""
+
+import random
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from server.cache import app_cache
+from server.models.database import db, RoutingSession
+
+STICKY_COOKIE = 'db_primary_until'
+
+
+def _mark_write(*args):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write()
+
+
+def _request_user_id():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # No JWT was verified in this request
+        return None
+
+
+class ReplicaRouter:
+    """Chooses the engine for @replica_read views"""
+
+    def __init__(self, app=None):
+        self.replica_keys = []
+        self.sticky_seconds = 5
+        self.retry_interval = 30
+        self._down_until = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.replica_keys = sorted(key for key in (app.config.get('SQLALCHEMY_BINDS') or {})
+                                   if key.startswith('replica_'))
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        self.retry_interval = app.config.get('REPLICA_RETRY_INTERVAL', 30)
+        app.extensions['replica_router'] = self
+        if not self.replica_keys:
+            return
+
+        if not event.contains(RoutingSession, 'after_flush', _mark_write):
+            event.listen(RoutingSession, 'after_flush', _mark_write)
+            event.listen(RoutingSession, 'do_orm_execute', _mark_dml)
+        app.after_request(self._pin_writers)
+        for key in self.replica_keys:
+            # Replicas mirror the primary's tables; keep create_all/drop_all
+            # (and other apps sharing ``db``) away from them
+            db.metadatas.pop(key, None)
+        with app.app_context():
+            for key in self.replica_keys:
+                self._watch(db.engines[key], key)
+
+    def _watch(self, engine, key):
+        @event.listens_for(engine, 'handle_error')
+        def replica_failed(context):
+            self.mark_down(key)
+            if has_request_context():
+                g.db_replica_failed = True
+
+    def mark_down(self, key):
+        self._down_until[key] = time.monotonic() + self.retry_interval
+
+    def healthy_replicas(self):
+        now = time.monotonic()
+        return [key for key in self.replica_keys if self._down_until.get(key, 0) <= now]
+
+    def _sticky_users(self):
+        return app_cache('replica_sticky', 'REPLICA_STICKY_SECONDS', 5, maxsize=100_000)
+
+    def pinned_to_primary(self):
+        """Whether the current client wrote recently"""
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        try:
+            verify_jwt_in_request(optional=True)
+        except Exception:
+            return False
+        user_id = _request_user_id()
+        return user_id is not None and self._sticky_users().get(user_id) is not None
+
+    def read_engine(self):
+        """Replica engine for this request, or None to use the primary"""
+        healthy = self.healthy_replicas()
+        if not healthy or self.pinned_to_primary():
+            return None
+        return db.engines[random.choice(healthy)]
+
+    def _pin_writers(self, response):
+        if g.pop('db_wrote', False) and self.sticky_seconds > 0:
+            user_id = _request_user_id()
+            if user_id is not None:
+                self._sticky_users().set(user_id, True)
+            response.set_cookie(STICKY_COOKIE, f'{time.time() + self.sticky_seconds:.3f}',
+                                max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
+
+
+def replica_read(f):
+    """Run a read-only view against a read replica when one is usable"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        router = current_app.extensions.get('replica_router')
+        engine = router.read_engine() if router and router.replica_keys else None
+        if engine is None:
+            return f(*args, **kwargs)
+
+        g.db_read_engine = engine
+        try:
+            response = f(*args, **kwargs)
+        except DBAPIError:
+            if not g.get('db_replica_failed'):
+                raise
+            response = None
+        finally:
+            g.pop('db_read_engine', None)
+
+        if g.pop('db_replica_failed', False):
+            # Views turn errors into 500 responses; run it again on the primary
+            db.session.rollback()
+            response = f(*args, **kwargs)
+        return response
+    return decorated_function
@@ -0,0 +1,163 @@
+"""
+Daily sales rollup
+
+``daily_sales_rollup`` holds one row per day × category × payment status
+with order count, units and revenue. Rows with ``category_id`` 0 carry
+whole-order totals (``total_amount``, i.e. including tax and shipping);
+category rows carry line-item totals. The table is kept current with an
+upsert whenever an order is placed or its payment status changes, and can
+be rebuilt from the orders table with ``flask backfill-sales-rollup``.
+"""
+
+from datetime import datetime, time, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, literal, select
+from server.models.database import db, DailySalesRollup, Order, OrderItem, Product
+from server.utils import dialect_insert
+
+ALL_CATEGORIES = DailySalesRollup.ALL_CATEGORIES
+ROLLUP_MEASURES = ('order_count', 'units', 'revenue')
+
+
+def _order_lines(order):
+    """(category_id, units, revenue) for each category in an order"""
+    return db.session.query(
+        Product.category_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.total_price)
+    ).join(Product, Product.id == OrderItem.product_id).filter(
+        OrderItem.order_id == order.id
+    ).group_by(Product.category_id).all()
+
+
+def _delta_rows(order, payment_status, lines, sign):
+    sales_date = order.created_at.date()
+    rows = [{
+        'sales_date': sales_date,
+        'category_id': ALL_CATEGORIES,
+        'payment_status': payment_status,
+        'order_count': sign,
+        'units': sign * sum(units for _, units, _ in lines),
+        'revenue': sign * order.total_amount
+    }]
+    for category_id, units, revenue in sorted(lines, key=lambda line: line[0]):
+        rows.append({
+            'sales_date': sales_date,
+            'category_id': category_id,
+            'payment_status': payment_status,
+            'order_count': sign,
+            'units': sign * units,
+            'revenue': sign * revenue
+        })
+    return rows
+
+
+def _apply_deltas(rows):
+    """Add rows to the rollup with a single INSERT ... ON CONFLICT DO UPDATE"""
+    if not rows:
+        return
+    table = DailySalesRollup.__table__
+    statement = dialect_insert(table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.sales_date, table.c.category_id, table.c.payment_status],
+        set_={name: table.c[name] + statement.excluded[name] for name in ROLLUP_MEASURES}
+    )
+    db.session.execute(statement)
+
+
+def record_order_placed(order, lines=None):
+    """Add a new order to the rollup (caller commits).
+
+    ``lines`` may be passed as (category_id, units, revenue) tuples when the
+    caller already has them; otherwise they are read from the order items.
+    """
+    if lines is None:
+        lines = _order_lines(order)
+    _apply_deltas(_delta_rows(order, order.payment_status, lines, 1))
+
+
+def record_payment_status_change(order, previous_status):
+    """Move an order between payment status buckets (caller commits)"""
+    if previous_status == order.payment_status:
+        return
+    lines = _order_lines(order)
+    _apply_deltas(
+        _delta_rows(order, previous_status, lines, -1) +
+        _delta_rows(order, order.payment_status, lines, 1)
+    )
+
+
+def rebuild_sales_rollup(start_date=None, end_date=None):
+    """Recompute rollup rows for a date range (all dates by default) from orders.
+
+    Returns the number of rollup rows written. Commits.
+    """
+    rollup = DailySalesRollup.__table__
+    sales_date = func.date(Order.created_at)
+
+    order_filters = []
+    rollup_filters = []
+    if start_date:
+        order_filters.append(Order.created_at >= datetime.combine(start_date, time.min))
+        rollup_filters.append(rollup.c.sales_date >= start_date)
+    if end_date:
+        order_filters.append(Order.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        rollup_filters.append(rollup.c.sales_date <= end_date)
+
+    units_per_order = select(
+        OrderItem.order_id,
+        func.sum(OrderItem.quantity).label('units')
+    ).group_by(OrderItem.order_id).subquery()
+
+    order_totals = select(
+        sales_date,
+        literal(ALL_CATEGORIES),
+        Order.payment_status,
+        func.count(Order.id),
+        func.coalesce(func.sum(units_per_order.c.units), 0),
+        func.coalesce(func.sum(Order.total_amount), 0)
+    ).select_from(Order).outerjoin(
+        units_per_order, units_per_order.c.order_id == Order.id
+    ).where(*order_filters).group_by(sales_date, Order.payment_status)
+
+    category_totals = select(
+        sales_date,
+        Product.category_id,
+        Order.payment_status,
+        func.count(func.distinct(Order.id)),
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.total_price)
+    ).select_from(OrderItem).join(
+        Order, Order.id == OrderItem.order_id
+    ).join(
+        Product, Product.id == OrderItem.product_id
+    ).where(*order_filters).group_by(sales_date, Product.category_id, Order.payment_status)
+
+    columns = ['sales_date', 'category_id', 'payment_status'] + list(ROLLUP_MEASURES)
+    try:
+        db.session.execute(rollup.delete().where(*rollup_filters))
+        written = 0
+        for source in (order_totals, category_totals):
+            result = db.session.execute(rollup.insert().from_select(columns, source))
+            written += max(result.rowcount, 0)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return written
+
+
+@click.command('backfill-sales-rollup')
+@click.option('--start', 'start_date', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='First day to rebuild (default: earliest order)')
+@click.option('--end', 'end_date', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Last day to rebuild (default: latest order)')
+@with_appcontext
+def backfill_sales_rollup_command(start_date, end_date):
+    """Rebuild the daily sales rollup from existing orders."""
+    written = rebuild_sales_rollup(
+        start_date.date() if start_date else None,
+        end_date.date() if end_date else None
+    )
+    click.echo(f'Wrote {written} daily sales rollup rows')
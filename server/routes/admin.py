@@ -1,11 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from marshmallow import ValidationError
-from datetime import datetime, timedelta
-from sqlalchemy import func, desc
-from server.models.database import db, User, Product, Order, Category, UserRole, OrderStatus, PaymentStatus, OrderItem, OrderItem
-from server.schemas import AdminUserCreateSchema, PaginationSchema
-from server.utils import success_response, error_response, admin_required, paginate_query
+from marshmallow import ValidationError, EXCLUDE
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, desc, inspect
+from server.models.database import db, User, Product, Order, Category, UserRole, OrderStatus, PaymentStatus, OrderItem, OrderItem, DailySalesRollup
+from server.schemas import AdminUserCreateSchema, PaginationSchema, OrderExportSchema
+from server.utils import success_response, error_response, admin_required, paginate_query, forget_auth_version
+from server.view_counter import get_view_counter
+from server.analytics import dashboard_summary
+from server.export import export_query, stream_csv, stream_ndjson
+from server.replicas import replica_read
+from server.passwords import HashingBusy, hashing_busy_response
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -15,7 +20,8 @@ admin_bp = Blueprint('admin', __name__)
 def get_all_users():
     """Get all users (Admin only)"""
     try:
-        schema = PaginationSchema()
+        # Filters are read from request.args below
+        schema = PaginationSchema(unknown=EXCLUDE)
         pagination_data = schema.load(request.args)
         
         # Optional filters
@@ -96,6 +102,8 @@ def create_user():
         
     except ValidationError as e:
         return error_response('Validation failed', 400, e.messages)
+    except HashingBusy:
+        return hashing_busy_response()
     except Exception as e:
         db.session.rollback()
         return error_response(f'Failed to create user: {str(e)}', 500)
@@ -124,7 +132,13 @@ def update_user(user_id):
                 else:
                     setattr(user, field, data[field])
         
+        # Role or status changes invalidate the claims of issued tokens
+        changes = inspect(user).attrs
+        if changes.role.history.has_changes() or changes.is_active.history.has_changes():
+            user.auth_version += 1
+        
         db.session.commit()
+        forget_auth_version(user.id)
         
         return success_response('User updated successfully', user.to_dict())
         
@@ -142,7 +156,9 @@ def toggle_user_status(user_id):
             return error_response('User not found', 404)
         
         user.is_active = not user.is_active
+        user.auth_version += 1
         db.session.commit()
+        forget_auth_version(user.id)
         
         status = "activated" if user.is_active else "deactivated"
         return success_response(f'User {status} successfully', user.to_dict())
@@ -154,93 +170,11 @@ def toggle_user_status(user_id):
 # Analytics
 @admin_bp.route('/analytics/dashboard', methods=['GET'])
 @admin_required
+@replica_read
 def get_dashboard_analytics():
     """Get dashboard analytics (Admin only)"""
     try:
-        # Date ranges
-        now = datetime.utcnow()
-        thirty_days_ago = now - timedelta(days=30)
-        seven_days_ago = now - timedelta(days=7)
-        yesterday = now - timedelta(days=1)
-        
-        # User stats
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
-        new_users_30d = User.query.filter(User.created_at >= thirty_days_ago).count()
-        new_users_7d = User.query.filter(User.created_at >= seven_days_ago).count()
-        
-        # Product stats
-        total_products = Product.query.count()
-        active_products = Product.query.filter_by(is_active=True).count()
-        featured_products = Product.query.filter_by(is_featured=True, is_active=True).count()
-        out_of_stock = Product.query.filter_by(is_active=True).filter(Product.stock_quantity == 0).count()
-        
-        # Order stats
-        total_orders = Order.query.count()
-        orders_30d = Order.query.filter(Order.created_at >= thirty_days_ago).count()
-        orders_7d = Order.query.filter(Order.created_at >= seven_days_ago).count()
-        orders_today = Order.query.filter(Order.created_at >= yesterday).count()
-        
-        pending_orders = Order.query.filter_by(status=OrderStatus.PENDING).count()
-        processing_orders = Order.query.filter_by(status=OrderStatus.PROCESSING).count()
-        shipped_orders = Order.query.filter_by(status=OrderStatus.SHIPPED).count()
-        
-        # Revenue stats
-        total_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
-        revenue_30d = db.session.query(func.sum(Order.total_amount)).filter(
-            Order.created_at >= thirty_days_ago,
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
-        revenue_7d = db.session.query(func.sum(Order.total_amount)).filter(
-            Order.created_at >= seven_days_ago,
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
-        pending_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-            Order.payment_status == PaymentStatus.PENDING
-        ).scalar() or 0
-        
-        # Category stats
-        total_categories = Category.query.count()
-        active_categories = Category.query.filter_by(is_active=True).count()
-        
-        analytics = {
-            'users': {
-                'total': total_users,
-                'active': active_users,
-                'new_30d': new_users_30d,
-                'new_7d': new_users_7d
-            },
-            'products': {
-                'total': total_products,
-                'active': active_products,
-                'featured': featured_products,
-                'out_of_stock': out_of_stock
-            },
-            'orders': {
-                'total': total_orders,
-                'orders_30d': orders_30d,
-                'orders_7d': orders_7d,
-                'orders_today': orders_today,
-                'pending': pending_orders,
-                'processing': processing_orders,
-                'shipped': shipped_orders
-            },
-            'revenue': {
-                'total': float(total_revenue),
-                'revenue_30d': float(revenue_30d),
-                'revenue_7d': float(revenue_7d),
-                'pending': float(pending_revenue)
-            },
-            'categories': {
-                'total': total_categories,
-                'active': active_categories
-            }
-        }
+        analytics = dashboard_summary()
         
         return success_response('Dashboard analytics retrieved successfully', analytics)
         
@@ -249,9 +183,15 @@ def get_dashboard_analytics():
 
 @admin_bp.route('/analytics/products', methods=['GET'])
 @admin_required
+@replica_read
 def get_product_analytics():
     """Get product analytics (Admin only)"""
     try:
+        # Write buffered product views so most_viewed is current; a replica
+        # may not have them yet, so read from the primary after a flush
+        if get_view_counter().flush():
+            g.db_read_engine = None
+        
         # Top selling products
         top_selling = db.session.query(
             Product.id,
@@ -328,6 +268,7 @@ def get_product_analytics():
 
 @admin_bp.route('/analytics/orders', methods=['GET'])
 @admin_required
+@replica_read
 def get_order_analytics():
     """Get order analytics (Admin only)"""
     try:
@@ -347,14 +288,15 @@ def get_order_analytics():
             func.count(Order.id).label('count')
         ).group_by(Order.payment_status).all()
         
-        # Daily orders for last 30 days
+        # Daily orders for last 30 days, from the daily sales rollup
         daily_orders = db.session.query(
-            func.date(Order.created_at).label('date'),
-            func.count(Order.id).label('order_count'),
-            func.sum(Order.total_amount).label('revenue')
+            DailySalesRollup.sales_date.label('date'),
+            func.sum(DailySalesRollup.order_count).label('order_count'),
+            func.sum(DailySalesRollup.revenue).label('revenue')
         ).filter(
-            Order.created_at >= thirty_days_ago
-        ).group_by(func.date(Order.created_at)).order_by(func.date(Order.created_at)).all()
+            DailySalesRollup.category_id == DailySalesRollup.ALL_CATEGORIES,
+            DailySalesRollup.sales_date >= thirty_days_ago.date()
+        ).group_by(DailySalesRollup.sales_date).order_by(DailySalesRollup.sales_date).all()
         
         # Average order value
         avg_order_value = db.session.query(func.avg(Order.total_amount)).scalar() or 0
@@ -408,6 +350,7 @@ def get_order_analytics():
 
 @admin_bp.route('/analytics/revenue', methods=['GET'])
 @admin_required
+@replica_read
 def get_revenue_analytics():
     """Get revenue analytics (Admin only)"""
     try:
@@ -416,40 +359,44 @@ def get_revenue_analytics():
         current_year = now.year
         current_month = now.month
         
-        # Monthly revenue for current year
-        monthly_revenue = db.session.query(
-            func.extract('month', Order.created_at).label('month'),
-            func.sum(Order.total_amount).label('revenue'),
-            func.count(Order.id).label('order_count')
+        last_month = current_month - 1 if current_month > 1 else 12
+        last_month_year = current_year if current_month > 1 else current_year - 1
+        
+        # Completed revenue per day from the daily sales rollup, back to the
+        # start of last month or of this year, whichever is earlier
+        first_day = min(date(current_year, 1, 1), date(last_month_year, last_month, 1))
+        daily_revenue = db.session.query(
+            DailySalesRollup.sales_date,
+            DailySalesRollup.order_count,
+            DailySalesRollup.revenue
         ).filter(
-            func.extract('year', Order.created_at) == current_year,
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).group_by(func.extract('month', Order.created_at)).all()
+            DailySalesRollup.category_id == DailySalesRollup.ALL_CATEGORIES,
+            DailySalesRollup.payment_status == PaymentStatus.COMPLETED,
+            DailySalesRollup.sales_date >= first_day
+        ).all()
+        
+        # Monthly revenue for current year
+        monthly_totals = {}
+        current_month_revenue = 0
+        last_month_revenue = 0
+        for day in daily_revenue:
+            month_key = (day.sales_date.year, day.sales_date.month)
+            if day.sales_date.year == current_year:
+                revenue, order_count = monthly_totals.get(day.sales_date.month, (0, 0))
+                monthly_totals[day.sales_date.month] = (revenue + day.revenue, order_count + day.order_count)
+            if month_key == (current_year, current_month):
+                current_month_revenue += day.revenue
+            elif month_key == (last_month_year, last_month):
+                last_month_revenue += day.revenue
         
         # Revenue by category
         revenue_by_category = db.session.query(
             Category.name,
-            func.sum(OrderItem.total_price).label('revenue')
-        ).join(Product).join(OrderItem).join(Order).filter(
-            Order.payment_status == PaymentStatus.COMPLETED
+            func.sum(DailySalesRollup.revenue).label('revenue')
+        ).join(Category, Category.id == DailySalesRollup.category_id).filter(
+            DailySalesRollup.payment_status == PaymentStatus.COMPLETED
         ).group_by(Category.name).all()
         
-        # Revenue growth comparison
-        last_month = current_month - 1 if current_month > 1 else 12
-        last_month_year = current_year if current_month > 1 else current_year - 1
-        
-        current_month_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-            func.extract('year', Order.created_at) == current_year,
-            func.extract('month', Order.created_at) == current_month,
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
-        last_month_revenue = db.session.query(func.sum(Order.total_amount)).filter(
-            func.extract('year', Order.created_at) == last_month_year,
-            func.extract('month', Order.created_at) == last_month,
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
         growth_rate = 0
         if last_month_revenue > 0:
             growth_rate = ((current_month_revenue - last_month_revenue) / last_month_revenue) * 100
@@ -457,10 +404,10 @@ def get_revenue_analytics():
         analytics = {
             'monthly_revenue': [
                 {
-                    'month': int(month.month),
-                    'revenue': float(month.revenue or 0),
-                    'order_count': month.order_count
-                } for month in monthly_revenue
+                    'month': month,
+                    'revenue': float(revenue),
+                    'order_count': order_count
+                } for month, (revenue, order_count) in sorted(monthly_totals.items())
             ],
             'revenue_by_category': [
                 {
@@ -470,7 +417,7 @@ def get_revenue_analytics():
             ],
             'current_month_revenue': float(current_month_revenue),
             'last_month_revenue': float(last_month_revenue),
-            'growth_rate': round(growth_rate, 2)
+            'growth_rate': round(float(growth_rate), 2)
         }
         
         return success_response('Revenue analytics retrieved successfully', analytics)
@@ -478,6 +425,38 @@ def get_revenue_analytics():
     except Exception as e:
         return error_response(f'Failed to get revenue analytics: {str(e)}', 500)
     
+# Order export
+@admin_bp.route('/orders/export', methods=['GET'])
+@admin_required
+def export_orders():
+    """Stream orders and their items as CSV or NDJSON (Admin only)"""
+    try:
+        filters = OrderExportSchema().load(request.args)
+    except ValidationError as e:
+        return error_response('Validation failed', 400, e.messages)
+    
+    export_format = filters.pop('format')
+    if filters.get('status'):
+        filters['status'] = OrderStatus(filters['status'])
+    if filters.get('payment_status'):
+        filters['payment_status'] = PaymentStatus(filters['payment_status'])
+    
+    query = export_query(**filters)
+    if export_format == 'ndjson':
+        body, mimetype = stream_ndjson(query), 'application/x-ndjson'
+    else:
+        body, mimetype = stream_csv(query), 'text/csv'
+    
+    filename = f"orders-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
 @admin_bp.route('/categories', methods=['POST'])
 def create_category():
     return jsonify({'success': True, 'message': 'Category created'}), 201
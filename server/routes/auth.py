@@ -3,7 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_tok
 from marshmallow import ValidationError
 from server.models.database import db, User, UserRole
 from server.schemas import UserRegistrationSchema, UserLoginSchema, UserUpdateSchema
-from server.utils import success_response, error_response
+from server.utils import success_response, error_response, remember_auth_version
+from server.passwords import HashingBusy, hashing_busy_response
 import os
 
 auth_bp = Blueprint('auth', __name__)
@@ -43,8 +44,9 @@ def register():
         db.session.commit()
 
         # Create tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=user.jwt_claims())
         refresh_token = create_refresh_token(identity=user.id)
+        remember_auth_version(user)
 
         return success_response(
             'User registered successfully',
@@ -57,6 +59,8 @@ def register():
         )
     except ValidationError as e:
         return error_response('Validation failed', 400, e.messages)
+    except HashingBusy:
+        return hashing_busy_response()
     except Exception as e:
         db.session.rollback()
         return error_response(f'Registration failed: {str(e)}', 500)
@@ -107,9 +111,19 @@ def login():
         if not user.is_active:
             return error_response('Account is deactivated', 403)
 
+        # Upgrade hashes made with older hashing settings
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except HashingBusy:
+                # The old hash still works; upgrade it at a later login
+                pass
+
         # Create tokens
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=user.jwt_claims())
         refresh_token = create_refresh_token(identity=user.id)
+        remember_auth_version(user)
 
         return success_response(
             'Login successful',
@@ -121,6 +135,8 @@ def login():
         )
     except ValidationError as e:
         return error_response('Validation failed', 400, e.messages)
+    except HashingBusy:
+        return hashing_busy_response()
     except Exception as e:
         return error_response(f'Login failed: {str(e)}', 500)
 
@@ -142,7 +158,8 @@ def refresh():
         if not user or not user.is_active:
             return error_response('User not found or inactive', 404)
 
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=user.jwt_claims())
+        remember_auth_version(user)
 
         return success_response(
             'Token refreshed successfully',
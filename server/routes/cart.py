@@ -1,34 +1,69 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 from server.models.database import db, CartItem, Product
 from server.schemas import CartItemSchema
 from server.utils import success_response, error_response, validate_stock_quantity, ValidationError as CustomValidationError
 
 cart_bp = Blueprint('cart', __name__)
 
+def _cart_summary(user_id):
+    """Line count, unit count and subtotal of a user's cart in one aggregate query"""
+    line_count, total_items, subtotal = db.session.query(
+        func.count(CartItem.id),
+        func.coalesce(func.sum(CartItem.quantity), 0),
+        func.coalesce(func.sum(CartItem.quantity * Product.current_price), 0)
+    ).join(CartItem.product).filter(CartItem.user_id == user_id).one()
+    return {
+        'item_count': line_count,
+        'total_items': int(total_items),
+        'subtotal': float(subtotal)
+    }
+
 @cart_bp.route('', methods=['GET'])
 @jwt_required()
 def get_cart():
-    """Get current user's cart items"""
+    """Get current user's cart items.
+
+    ``?fields=summary`` returns only the totals, e.g. for a header badge.
+    """
     try:
         current_user_id = get_jwt_identity()
-        cart_items = CartItem.query.filter_by(user_id=current_user_id).all()
         
-        cart_data = [item.to_dict() for item in cart_items]
+        if request.args.get('fields') == 'summary':
+            return success_response(
+                'Cart retrieved successfully',
+                {'summary': _cart_summary(current_user_id)}
+            )
         
-        # Calculate totals
-        subtotal = sum(item.total_price for item in cart_items)
-        total_items = sum(item.quantity for item in cart_items)
+        # Items, products and categories in one joined query, with cart
+        # totals computed alongside as window aggregates
+        rows = CartItem.query.join(CartItem.product).options(
+            contains_eager(CartItem.product).joinedload(Product.category)
+        ).filter(
+            CartItem.user_id == current_user_id
+        ).add_columns(
+            func.count().over().label('item_count'),
+            func.sum(CartItem.quantity).over().label('total_items'),
+            func.sum(CartItem.quantity * Product.current_price).over().label('subtotal')
+        ).order_by(CartItem.created_at, CartItem.id).all()
+        
+        cart_data = [row.CartItem.to_dict() for row in rows]
+        summary = {'item_count': 0, 'total_items': 0, 'subtotal': 0.0}
+        if rows:
+            summary = {
+                'item_count': rows[0].item_count,
+                'total_items': int(rows[0].total_items),
+                'subtotal': float(rows[0].subtotal)
+            }
         
         return success_response(
             'Cart retrieved successfully',
             {
                 'items': cart_data,
-                'summary': {
-                    'total_items': total_items,
-                    'subtotal': float(subtotal)
-                }
+                'summary': summary
             }
         )
         
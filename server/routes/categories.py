@@ -4,15 +4,24 @@ from marshmallow import ValidationError
 from server.models.database import db, Category
 from server.schemas import CategorySchema
 from server.utils import success_response, error_response, admin_required
+from server.catalog import category_product_counts
+from server.cache import cached_response, invalidate_responses
+from server.replicas import replica_read
 
 categories_bp = Blueprint('categories', __name__, url_prefix='/api/categories')
 
 @categories_bp.route('', methods=['GET'])
+@cached_response('catalog')
+@replica_read
 def get_categories():
     """Get all active categories"""
     try:
         categories = Category.query.filter_by(is_active=True).order_by(Category.name).all()
-        categories_data = [category.to_dict() for category in categories]
+        product_counts = category_product_counts()
+        categories_data = [
+            category.to_dict(product_count=product_counts.get(category.id, 0))
+            for category in categories
+        ]
         
         return success_response('Categories retrieved successfully', categories_data)
         
@@ -20,6 +29,8 @@ def get_categories():
         return error_response(f'Failed to get categories: {str(e)}', 500)
 
 @categories_bp.route('/<int:category_id>', methods=['GET'])
+@cached_response('catalog')
+@replica_read
 def get_category(category_id):
     """Get single category by ID"""
     try:
@@ -28,7 +39,8 @@ def get_category(category_id):
         if not category:
             return error_response('Category not found', 404)
         
-        return success_response('Category retrieved successfully', category.to_dict())
+        product_count = category_product_counts().get(category.id, 0)
+        return success_response('Category retrieved successfully', category.to_dict(product_count=product_count))
         
     except Exception as e:
         return error_response(f'Failed to get category: {str(e)}', 500)
@@ -50,8 +62,9 @@ def create_category():
         category = Category(**data)
         db.session.add(category)
         db.session.commit()
+        invalidate_responses('catalog')
         
-        return success_response('Category created successfully', category.to_dict(), 201)
+        return success_response('Category created successfully', category.to_dict(product_count=0), 201)
         
     except ValidationError as e:
         return error_response('Validation failed', 400, e.messages)
@@ -83,6 +96,7 @@ def update_category(category_id):
                 setattr(category, field, value)
         
         db.session.commit()
+        invalidate_responses('catalog')
         
         return success_response('Category updated successfully', category.to_dict())
         
@@ -101,19 +115,19 @@ def delete_category(category_id):
         if not category:
             return error_response('Category not found', 404)
         
-        # Check if category has products
-        if category.products:
-            active_products = [p for p in category.products if p.is_active]
-            if active_products:
-                return error_response(
-                    f'Cannot delete category with {len(active_products)} active products. '
-                    'Please move or deactivate products first.',
-                    400
-                )
+        # Check if category has active products
+        active_products = category.active_product_count()
+        if active_products:
+            return error_response(
+                f'Cannot delete category with {active_products} active products. '
+                'Please move or deactivate products first.',
+                400
+            )
         
         # Soft delete
         category.is_active = False
         db.session.commit()
+        invalidate_responses('catalog')
         
         return success_response('Category deleted successfully')
         
@@ -132,6 +146,7 @@ def toggle_category_status(category_id):
         
         category.is_active = not category.is_active
         db.session.commit()
+        invalidate_responses('catalog')
         
         status = "activated" if category.is_active else "deactivated"
         return success_response(f'Category {status} successfully', category.to_dict())
@@ -1,12 +1,15 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from marshmallow import ValidationError
+from marshmallow import ValidationError, EXCLUDE
 from datetime import datetime
 from server.models.database import db, Order, OrderItem, CartItem, Product, Address, OrderStatus, PaymentStatus
-from server.schemas import OrderCreateSchema, OrderUpdateSchema, PaginationSchema
-from server.utils import (success_response, error_response, admin_required, manager_required, 
-                  paginate_query, generate_order_number, validate_stock_quantity, 
-                  update_product_stock, calculate_tax, calculate_shipping, ValidationError as CustomValidationError)
+from server.models.loaders import order_options, order_summary_options
+from server.schemas import OrderCreateSchema, OrderUpdateSchema, OrderListSchema
+from server.utils import success_response, error_response, admin_required, manager_required, paginate_query
+from server.checkout import place_order, restore_order_stock, CheckoutError
+from server.cache import invalidate_responses
+from server.analytics import order_statistics
+from server.rollup import record_payment_status_change
 
 orders_bp = Blueprint('orders', __name__)
 
@@ -17,10 +20,12 @@ def get_orders():
     try:
         current_user_id = get_jwt_identity()
         
-        schema = PaginationSchema()
+        schema = OrderListSchema()
         pagination_data = schema.load(request.args)
         
-        query = Order.query.filter_by(user_id=current_user_id).order_by(Order.created_at.desc())
+        query = Order.query.options(*order_summary_options()).filter_by(
+            user_id=current_user_id
+        ).order_by(Order.created_at.desc())
         
         result = paginate_query(
             query,
@@ -28,7 +33,8 @@ def get_orders():
             pagination_data.get('per_page', 20)
         )
         
-        orders_data = [order.to_dict() for order in result['items']]
+        include_items = pagination_data.get('expand') == 'items'
+        orders_data = [order.to_summary_dict(include_items) for order in result['items']]
         
         return success_response(
             'Orders retrieved successfully',
@@ -50,7 +56,7 @@ def get_order(order_id):
     try:
         current_user_id = get_jwt_identity()
         
-        order = Order.query.filter_by(id=order_id, user_id=current_user_id).first()
+        order = Order.query.options(*order_options()).filter_by(id=order_id, user_id=current_user_id).first()
         if not order:
             return error_response('Order not found', 404)
         
@@ -69,21 +75,10 @@ def create_order():
         schema = OrderCreateSchema()
         data = schema.load(request.json)
         
-        # Get cart items
-        cart_items = CartItem.query.filter_by(user_id=current_user_id).all()
-        if not cart_items:
+        # Fail fast on an empty cart before resolving addresses
+        if not CartItem.query.filter_by(user_id=current_user_id).first():
             return error_response('Cart is empty', 400)
         
-        # Validate all cart items and stock quantities
-        for cart_item in cart_items:
-            if not cart_item.product.is_active:
-                return error_response(f'Product {cart_item.product.name} is no longer available', 400)
-            
-            try:
-                validate_stock_quantity(cart_item.product, cart_item.quantity)
-            except CustomValidationError as e:
-                return error_response(e.message, 400)
-        
         # Get addresses
         shipping_address = None
         billing_address = None
@@ -117,51 +112,22 @@ def create_order():
             # Use shipping address as billing address if not provided
             billing_address = shipping_address
         
-        # Calculate totals
-        subtotal = sum(cart_item.total_price for cart_item in cart_items)
-        tax_amount = calculate_tax(subtotal)
-        shipping_amount = calculate_shipping(subtotal)
-        total_amount = subtotal + tax_amount + shipping_amount
-        
-        # Create order
-        order = Order(
-            order_number=generate_order_number(),
-            user_id=current_user_id,
-            subtotal=subtotal,
-            tax_amount=tax_amount,
-            shipping_amount=shipping_amount,
-            total_amount=total_amount,
+        # Lock stock, create the order and its items and clear the cart in one transaction
+        order = place_order(
+            current_user_id,
             shipping_address=shipping_address,
             billing_address=billing_address,
             payment_method=data['payment_method'],
             notes=data.get('notes')
         )
-        
-        db.session.add(order)
-        db.session.flush()  # Get order ID
-        
-        # Create order items and update stock
-        for cart_item in cart_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.product.current_price,
-                total_price=cart_item.total_price,
-                product_snapshot=cart_item.product.to_dict()  # Store product details
-            )
-            db.session.add(order_item)
-            
-            # Update product stock
-            update_product_stock(cart_item.product, cart_item.quantity)
-        
-        # Clear cart
-        CartItem.query.filter_by(user_id=current_user_id).delete()
-        
-        db.session.commit()
+        # Committing expired the cart's products; reload them with the items
+        # in bounded queries rather than refreshing each one on access
+        order = Order.query.options(*order_options()).populate_existing().filter_by(id=order.id).one()
         
         return success_response('Order created successfully', order.to_dict(), 201)
         
+    except CheckoutError as e:
+        return error_response(e.message, 400)
     except ValidationError as e:
         db.session.rollback()
         return error_response('Validation failed', 400, e.messages)
@@ -185,16 +151,16 @@ def cancel_order(order_id):
             return error_response('Order cannot be cancelled at this stage', 400)
         
         # Update order status
+        previous_payment_status = order.payment_status
         order.status = OrderStatus.CANCELLED
         order.payment_status = PaymentStatus.REFUNDED if order.payment_status == PaymentStatus.COMPLETED else order.payment_status
         
         # Restore product stock
-        for order_item in order.order_items:
-            if order_item.product:  # Product still exists
-                order_item.product.stock_quantity += order_item.quantity
-                order_item.product.sales_count = max(0, order_item.product.sales_count - order_item.quantity)
+        restore_order_stock(order)
+        record_payment_status_change(order, previous_payment_status)
         
         db.session.commit()
+        invalidate_responses('catalog')
         
         return success_response('Order cancelled successfully', order.to_dict())
         
@@ -208,7 +174,8 @@ def cancel_order(order_id):
 def get_all_orders():
     """Get all orders (Admin/Manager only)"""
     try:
-        schema = PaginationSchema()
+        # Filters are read from request.args below
+        schema = OrderListSchema(unknown=EXCLUDE)
         pagination_data = schema.load(request.args)
         
         # Optional filters
@@ -216,7 +183,7 @@ def get_all_orders():
         payment_status = request.args.get('payment_status')
         user_id = request.args.get('user_id')
         
-        query = Order.query.order_by(Order.created_at.desc())
+        query = Order.query.options(*order_summary_options()).order_by(Order.created_at.desc())
         
         if status:
             try:
@@ -241,7 +208,8 @@ def get_all_orders():
             pagination_data.get('per_page', 20)
         )
         
-        orders_data = [order.to_dict() for order in result['items']]
+        include_items = pagination_data.get('expand') == 'items'
+        orders_data = [order.to_summary_dict(include_items) for order in result['items']]
         
         return success_response(
             'Orders retrieved successfully',
@@ -284,7 +252,9 @@ def update_order_status(order_id):
         
         if 'payment_status' in data:
             try:
+                previous_payment_status = order.payment_status
                 order.payment_status = PaymentStatus(data['payment_status'])
+                record_payment_status_change(order, previous_payment_status)
             except ValueError:
                 return error_response('Invalid payment status value', 400)
         
@@ -306,49 +276,7 @@ def update_order_status(order_id):
 def get_order_stats():
     """Get order statistics (Admin/Manager only)"""
     try:
-        # Basic stats
-        total_orders = Order.query.count()
-        pending_orders = Order.query.filter_by(status=OrderStatus.PENDING).count()
-        confirmed_orders = Order.query.filter_by(status=OrderStatus.CONFIRMED).count()
-        shipped_orders = Order.query.filter_by(status=OrderStatus.SHIPPED).count()
-        delivered_orders = Order.query.filter_by(status=OrderStatus.DELIVERED).count()
-        cancelled_orders = Order.query.filter_by(status=OrderStatus.CANCELLED).count()
-        
-        # Revenue stats
-        total_revenue = db.session.query(db.func.sum(Order.total_amount)).filter(
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
-        pending_revenue = db.session.query(db.func.sum(Order.total_amount)).filter(
-            Order.payment_status == PaymentStatus.PENDING
-        ).scalar() or 0
-        
-        # Recent orders (last 30 days)
-        from datetime import datetime, timedelta
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_orders = Order.query.filter(Order.created_at >= thirty_days_ago).count()
-        
-        recent_revenue = db.session.query(db.func.sum(Order.total_amount)).filter(
-            Order.created_at >= thirty_days_ago,
-            Order.payment_status == PaymentStatus.COMPLETED
-        ).scalar() or 0
-        
-        stats = {
-            'orders': {
-                'total': total_orders,
-                'pending': pending_orders,
-                'confirmed': confirmed_orders,
-                'shipped': shipped_orders,
-                'delivered': delivered_orders,
-                'cancelled': cancelled_orders,
-                'recent_30_days': recent_orders
-            },
-            'revenue': {
-                'total': float(total_revenue),
-                'pending': float(pending_revenue),
-                'recent_30_days': float(recent_revenue)
-            }
-        }
+        stats = order_statistics()
         
         return success_response('Order statistics retrieved successfully', stats)
         
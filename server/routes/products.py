@@ -1,21 +1,69 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
-from sqlalchemy import or_, and_
+from sqlalchemy import or_
 from server.models.database import db, Product, Category
-from server.schemas import ProductCreateSchema, ProductUpdateSchema, ProductFilterSchema
-from server.utils import success_response, error_response, admin_required, paginate_query, generate_sku
+from server.models.loaders import product_options
+from server.search import apply_product_search
+from server.view_counter import get_view_counter
+from server.catalog import category_product_counts, invalidate_category_counts
+from server.cache import cached_response, invalidate_responses
+from server.replicas import replica_read
+from server.product_import import ProductImport, ImportFormatError, read_import_rows
+from server.inventory import update_inventory
+from server.schemas import (ProductCreateSchema, ProductUpdateSchema, ProductFilterSchema, InventoryItemSchema,
+                            InventoryUpdateSchema, PRODUCT_SORT_FIELDS)
+from server.utils import (success_response, error_response, admin_required, paginate_query,
+                          keyset_paginate_query, generate_sku, ValidationError as CustomValidationError)
 
 products_bp = Blueprint('products', __name__)
 
+def _record_cached_view(product_id):
+    """Count a product view served from the response cache"""
+    get_view_counter().record(product_id)
+
+def _paginate_products(query, params, default_sort_order='asc'):
+    """Sort and paginate a product query using offset or cursor pagination.
+
+    Cursor mode is opt-in: it is used whenever a ``cursor`` argument is
+    present (empty for the first page).
+    """
+    sort_by = params.get('sort_by') or 'created_at'
+    if sort_by not in PRODUCT_SORT_FIELDS:
+        sort_by = 'created_at'
+    sort_order = params.get('sort_order') or default_sort_order
+    order_column = getattr(Product, sort_by)
+    per_page = params.get('per_page', 20)
+
+    if 'cursor' in params:
+        return keyset_paginate_query(
+            query,
+            order_column,
+            Product.id,
+            sort_by,
+            sort_order,
+            cursor=params.get('cursor'),
+            per_page=per_page,
+            include_total=params.get('include_total', False)
+        )
+
+    if sort_order == 'desc':
+        query = query.order_by(order_column.desc())
+    else:
+        query = query.order_by(order_column.asc())
+
+    return paginate_query(query, params.get('page', 1), per_page)
+
 @products_bp.route('', methods=['GET'])
+@cached_response('catalog')
+@replica_read
 def get_products():
     """Get all products with filtering and pagination"""
     try:
         schema = ProductFilterSchema()
         filters = schema.load(request.args)
         
-        query = Product.query.filter_by(is_active=True)
+        query = Product.query.options(*product_options()).filter_by(is_active=True)
         
         # Apply filters
         if filters.get('category_id'):
@@ -46,23 +94,8 @@ def get_products():
                 )
             )
         
-        # Apply sorting
-        sort_by = filters.get('sort_by', 'created_at')
-        sort_order = filters.get('sort_order', 'asc')
-        
-        if hasattr(Product, sort_by):
-            order_column = getattr(Product, sort_by)
-            if sort_order == 'desc':
-                query = query.order_by(order_column.desc())
-            else:
-                query = query.order_by(order_column.asc())
-        
-        # Paginate results
-        result = paginate_query(
-            query,
-            filters.get('page', 1),
-            filters.get('per_page', 20)
-        )
+        # Sort and paginate results
+        result = _paginate_products(query, filters)
         
         products_data = [product.to_dict() for product in result['items']]
         
@@ -76,32 +109,43 @@ def get_products():
         
     except ValidationError as e:
         return error_response('Validation failed', 400, e.messages)
+    except CustomValidationError as e:
+        return error_response(e.message, 400)
     except Exception as e:
         return error_response(f'Failed to get products: {str(e)}', 500)
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@cached_response('catalog', on_hit=_record_cached_view)
+@replica_read
 def get_product(product_id):
     """Get single product by ID"""
     try:
-        product = Product.query.filter_by(id=product_id, is_active=True).first()
+        product = Product.query.options(*product_options()).filter_by(id=product_id, is_active=True).first()
         
         if not product:
             return error_response('Product not found', 404)
         
-        # Increment views count
-        product.views_count += 1
-        db.session.commit()
+        # Count the view without writing; the counter flushes in batches
+        view_counter = get_view_counter()
+        view_counter.record(product.id)
         
-        return success_response('Product retrieved successfully', product.to_dict())
+        product_data = product.to_dict()
+        product_data['views_count'] = (product_data['views_count'] or 0) + view_counter.pending(product.id)
+        
+        return success_response('Product retrieved successfully', product_data)
         
     except Exception as e:
         return error_response(f'Failed to get product: {str(e)}', 500)
 
 @products_bp.route('/featured', methods=['GET'])
+@cached_response('catalog')
+@replica_read
 def get_featured_products():
     """Get featured products"""
     try:
-        products = Product.query.filter_by(is_featured=True, is_active=True).limit(12).all()
+        products = Product.query.options(*product_options()).filter_by(
+            is_featured=True, is_active=True
+        ).limit(12).all()
         products_data = [product.to_dict() for product in products]
         
         return success_response('Featured products retrieved successfully', products_data)
@@ -110,6 +154,8 @@ def get_featured_products():
         return error_response(f'Failed to get featured products: {str(e)}', 500)
 
 @products_bp.route('/categories/<int:category_id>', methods=['GET'])
+@cached_response('catalog')
+@replica_read
 def get_products_by_category(category_id):
     """Get products by category"""
     try:
@@ -120,7 +166,7 @@ def get_products_by_category(category_id):
         schema = ProductFilterSchema()
         filters = schema.load(request.args)
         
-        query = Product.query.filter_by(category_id=category_id, is_active=True)
+        query = Product.query.options(*product_options()).filter_by(category_id=category_id, is_active=True)
         
         # Apply additional filters
         if filters.get('brand'):
@@ -135,30 +181,15 @@ def get_products_by_category(category_id):
         if filters.get('in_stock'):
             query = query.filter(Product.stock_quantity > 0)
         
-        # Apply sorting
-        sort_by = filters.get('sort_by', 'created_at')
-        sort_order = filters.get('sort_order', 'asc')
-        
-        if hasattr(Product, sort_by):
-            order_column = getattr(Product, sort_by)
-            if sort_order == 'desc':
-                query = query.order_by(order_column.desc())
-            else:
-                query = query.order_by(order_column.asc())
-        
-        # Paginate results
-        result = paginate_query(
-            query,
-            filters.get('page', 1),
-            filters.get('per_page', 20)
-        )
+        # Sort and paginate results
+        result = _paginate_products(query, filters)
         
         products_data = [product.to_dict() for product in result['items']]
         
         return success_response(
             f'Products in {category.name} retrieved successfully',
             {
-                'category': category.to_dict(),
+                'category': category.to_dict(product_count=category_product_counts().get(category.id, 0)),
                 'products': products_data,
                 'pagination': result['pagination']
             }
@@ -166,10 +197,13 @@ def get_products_by_category(category_id):
         
     except ValidationError as e:
         return error_response('Validation failed', 400, e.messages)
+    except CustomValidationError as e:
+        return error_response(e.message, 400)
     except Exception as e:
         return error_response(f'Failed to get products by category: {str(e)}', 500)
 
 @products_bp.route('/search', methods=['GET'])
+@replica_read
 def search_products():
     """Search products"""
     try:
@@ -182,28 +216,18 @@ def search_products():
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
         
-        # Build search query
-        search_pattern = f"%{search_term}%"
-        query = Product.query.filter(
-            and_(
-                Product.is_active == True,
-                or_(
-                    Product.name.ilike(search_pattern),
-                    Product.description.ilike(search_pattern),
-                    Product.brand.ilike(search_pattern),
-                    Product.model.ilike(search_pattern)
-                )
-            )
-        )
+        # Build full-text search query
+        query = Product.query.options(*product_options()).filter(Product.is_active == True)
+        query, relevance = apply_product_search(query, search_term)
         
         # Apply optional filters if provided
         category_id = request.args.get('category_id', type=int)
         if category_id:
-            query = query.filter_by(category_id=category_id)
+            query = query.filter(Product.category_id == category_id)
         
         brand = request.args.get('brand')
         if brand:
-            query = query.filter_by(brand=brand)
+            query = query.filter(Product.brand == brand)
         
         min_price = request.args.get('min_price', type=float)
         if min_price:
@@ -213,19 +237,27 @@ def search_products():
         if max_price:
             query = query.filter(Product.price <= max_price)
         
-        # Apply sorting
-        sort_by = request.args.get('sort_by', 'created_at')
-        sort_order = request.args.get('sort_order', 'desc')
-        
-        if hasattr(Product, sort_by):
-            order_column = getattr(Product, sort_by)
-            if sort_order == 'desc':
-                query = query.order_by(order_column.desc())
-            else:
-                query = query.order_by(order_column.asc())
-        
-        # Paginate results
-        result = paginate_query(query, page, per_page)
+        # Sort and paginate results (by relevance unless another sort is requested)
+        sort_by = request.args.get('sort_by') or 'relevance'
+        if sort_by == 'relevance' and relevance is not None:
+            if 'cursor' in request.args:
+                raise CustomValidationError(
+                    'Cursor pagination requires sort_by to be one of: ' + ', '.join(PRODUCT_SORT_FIELDS),
+                    'cursor'
+                )
+            query = query.order_by(relevance.desc(), Product.id.asc())
+            result = paginate_query(query, page, per_page)
+        else:
+            params = {
+                'sort_by': sort_by,
+                'sort_order': request.args.get('sort_order'),
+                'page': page,
+                'per_page': per_page,
+                'include_total': request.args.get('include_total', '').lower() == 'true'
+            }
+            if 'cursor' in request.args:
+                params['cursor'] = request.args.get('cursor')
+            result = _paginate_products(query, params, default_sort_order='desc')
         
         products_data = [product.to_dict() for product in result['items']]
         
@@ -238,6 +270,8 @@ def search_products():
             }
         )
         
+    except CustomValidationError as e:
+        return error_response(e.message, 400)
     except Exception as e:
         return error_response(f'Failed to search products: {str(e)}', 500)
 
@@ -268,6 +302,8 @@ def create_product():
         
         db.session.add(product)
         db.session.commit()
+        invalidate_category_counts()
+        invalidate_responses('catalog')
         
         return success_response('Product created successfully', product.to_dict(), 201)
         
@@ -277,6 +313,60 @@ def create_product():
         db.session.rollback()
         return error_response(f'Failed to create product: {str(e)}', 500)
 
+@products_bp.route('/bulk', methods=['POST'])
+@admin_required
+def bulk_import_products():
+    """Create or update products by SKU from a JSON, CSV or NDJSON body (Admin only)"""
+    product_import = ProductImport()
+    try:
+        report = product_import.run(read_import_rows(request))
+    except ImportFormatError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(f'Failed to import products: {str(e)}', 500, product_import.report())
+    finally:
+        if product_import.created or product_import.updated:
+            invalidate_category_counts()
+            invalidate_responses('catalog')
+    
+    return success_response('Products imported', report)
+
+@products_bp.route('/inventory', methods=['PATCH'])
+@admin_required
+def bulk_update_inventory():
+    """Set or adjust stock, price and sale price for many SKUs (Admin only)"""
+    try:
+        items = InventoryUpdateSchema().load(request.json)['items']
+        
+        item_schema = InventoryItemSchema()
+        valid_items = []
+        invalid = []
+        seen_skus = set()
+        for index, item in enumerate(items):
+            try:
+                data = item_schema.load(item)
+                if data['sku'] in seen_skus:
+                    raise ValidationError({'sku': ['Duplicate SKU in this update.']})
+            except ValidationError as e:
+                invalid.append({'index': index, 'sku': item.get('sku'), 'errors': e.messages})
+                continue
+            seen_skus.add(data['sku'])
+            valid_items.append(data)
+        
+        summary = update_inventory(valid_items)
+        db.session.commit()
+        if summary['updated']:
+            invalidate_responses('catalog')
+        
+        summary['invalid'] = invalid
+        return success_response('Inventory updated', summary)
+        
+    except ValidationError as e:
+        return error_response('Validation failed', 400, e.messages)
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'Failed to update inventory: {str(e)}', 500)
+
 @products_bp.route('/<int:product_id>', methods=['PUT'])
 @admin_required
 def update_product(product_id):
@@ -301,6 +391,8 @@ def update_product(product_id):
                 setattr(product, field, value)
         
         db.session.commit()
+        invalidate_category_counts()
+        invalidate_responses('catalog')
         
         return success_response('Product updated successfully', product.to_dict())
         
@@ -322,6 +414,8 @@ def delete_product(product_id):
         # Soft delete
         product.is_active = False
         db.session.commit()
+        invalidate_category_counts()
+        invalidate_responses('catalog')
         
         return success_response('Product deleted successfully')
         
@@ -1,6 +1,8 @@
-from marshmallow import Schema, fields, validate, validates, ValidationError
+from marshmallow import Schema, fields, validate, validates, validates_schema, ValidationError
 from server.models.database import UserRole, OrderStatus, PaymentStatus
 
+PRODUCT_SORT_FIELDS = ['name', 'price', 'created_at', 'sales_count', 'views_count']
+
 class UserRegistrationSchema(Schema):
     email = fields.Email(required=True)
     password = fields.Str(required=True, validate=validate.Length(min=6))
@@ -62,6 +64,31 @@ class ProductUpdateSchema(Schema):
     is_active = fields.Bool()
     is_featured = fields.Bool()
 
+class InventoryItemSchema(Schema):
+    """One SKU of a bulk inventory update: absolute values or deltas"""
+    sku = fields.Str(required=True, validate=validate.Length(min=1, max=50))
+    stock_quantity = fields.Int(validate=validate.Range(min=0))
+    stock_quantity_delta = fields.Int()
+    price = fields.Decimal(validate=validate.Range(min=0))
+    price_delta = fields.Decimal()
+    sale_price = fields.Decimal(validate=validate.Range(min=0))
+    sale_price_delta = fields.Decimal()
+    # Optimistic concurrency: skip the item if the product changed since
+    expected_updated_at = fields.DateTime()
+    
+    @validates_schema
+    def validate_changes(self, data, **kwargs):
+        changed = False
+        for field in ('stock_quantity', 'price', 'sale_price'):
+            if field in data and f'{field}_delta' in data:
+                raise ValidationError(f'Give either {field} or {field}_delta, not both')
+            changed = changed or field in data or f'{field}_delta' in data
+        if not changed:
+            raise ValidationError('Nothing to update')
+
+class InventoryUpdateSchema(Schema):
+    items = fields.List(fields.Dict(), required=True, validate=validate.Length(min=1, max=10000))
+
 class CartItemSchema(Schema):
     product_id = fields.Int(required=True)
     quantity = fields.Int(required=True, validate=validate.Range(min=1))
@@ -99,10 +126,21 @@ class OrderUpdateSchema(Schema):
     payment_status = fields.Str(validate=validate.OneOf([status.value for status in PaymentStatus]))
     notes = fields.Str()
 
+class OrderExportSchema(Schema):
+    format = fields.Str(validate=validate.OneOf(['csv', 'ndjson']), load_default='csv')
+    start_date = fields.Date()
+    end_date = fields.Date()
+    status = fields.Str(validate=validate.OneOf([status.value for status in OrderStatus]))
+    payment_status = fields.Str(validate=validate.OneOf([status.value for status in PaymentStatus]))
+
 class PaginationSchema(Schema):
     page = fields.Int(validate=validate.Range(min=1), load_default=1)
     per_page = fields.Int(validate=validate.Range(min=1, max=100), load_default=20)
 
+class OrderListSchema(PaginationSchema):
+    # Include each order's line items (from product snapshots)
+    expand = fields.Str(validate=validate.OneOf(['items']))
+
 class ProductFilterSchema(PaginationSchema):
     category_id = fields.Int()
     brand = fields.Str()
@@ -111,5 +149,8 @@ class ProductFilterSchema(PaginationSchema):
     in_stock = fields.Bool()
     featured = fields.Bool()
     search = fields.Str()
-    sort_by = fields.Str(validate=validate.OneOf(['name', 'price', 'created_at', 'sales_count', 'views_count']))
-    sort_order = fields.Str(validate=validate.OneOf(['asc', 'desc']), load_default='asc')
\ No newline at end of file
+    sort_by = fields.Str(validate=validate.OneOf(PRODUCT_SORT_FIELDS))
+    sort_order = fields.Str(validate=validate.OneOf(['asc', 'desc']), load_default='asc')
+    # Keyset pagination: pass an empty cursor for the first page, then next_cursor
+    cursor = fields.Str()
+    include_total = fields.Bool(load_default=False)
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Full-text product search
+
+PostgreSQL databases keep a weighted ``products.search_vector`` tsvector
+column (GIN indexed, maintained by a trigger); SQLite databases use an FTS5
+external-content table ``products_fts`` kept in sync by triggers. Both are
+created alongside the ``products`` table by ``db.create_all()`` and by the
+``product_search_index`` migration for existing databases. Databases without
+either fall back to the original ILIKE matching.
+"""
+
+import logging
+import re
+import weakref
+from sqlalchemy import event, func, text, or_, literal_column, Integer, Float
+from sqlalchemy.exc import DBAPIError
+from server.models.database import db, Product
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, brand, model,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, brand, model)
+        VALUES (new.id, new.name, new.description, new.brand, new.model);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, brand, model)
+        VALUES ('delete', old.id, old.name, old.description, old.brand, old.model);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au
+    AFTER UPDATE OF name, description, brand, model ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, brand, model)
+        VALUES ('delete', old.id, old.name, old.description, old.brand, old.model);
+        INSERT INTO products_fts(rowid, name, description, brand, model)
+        VALUES (new.id, new.name, new.description, new.brand, new.model);
+    END""",
+]
+
+POSTGRES_FTS_DDL = [
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.brand, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.model, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS products_search_vector_trigger ON products",
+    """CREATE TRIGGER products_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, brand, model ON products
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()""",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+# bm25 column weights for name, description, brand, model
+SQLITE_BM25_WEIGHTS = (10.0, 1.0, 5.0, 5.0)
+
+_backend_by_engine = weakref.WeakKeyDictionary()
+
+
+@event.listens_for(Product.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_FTS_DDL:
+            connection.exec_driver_sql(statement)
+    elif dialect == 'sqlite':
+        try:
+            for statement in SQLITE_FTS_DDL:
+                connection.exec_driver_sql(statement)
+        except DBAPIError as exc:
+            # SQLite builds without FTS5 fall back to ILIKE search
+            logger.warning('FTS5 unavailable, product search will use LIKE: %s', exc)
+
+
+@event.listens_for(Product.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS products_fts')
+
+
+def search_backend(engine=None):
+    """Return 'postgresql', 'sqlite' or 'like' for the given (default) engine"""
+    engine = engine or db.engine
+    backend = _backend_by_engine.get(engine)
+    if backend is None:
+        backend = _detect_backend(engine)
+        _backend_by_engine[engine] = backend
+    return backend
+
+
+def _detect_backend(engine):
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            found = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'products' AND column_name = 'search_vector'"
+            )).first()
+            return 'postgresql' if found else 'like'
+        if engine.dialect.name == 'sqlite':
+            found = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+            )).first()
+            return 'sqlite' if found else 'like'
+    return 'like'
+
+
+def search_terms(search_term):
+    """Split a user search string into lower-cased word tokens"""
+    return re.findall(r'\w+', search_term.lower())
+
+
+def apply_product_search(query, search_term):
+    """Restrict a Product query to rows matching search_term.
+
+    Every word must match, and the last characters of each word are
+    treated as a prefix ("sams gal" finds "Samsung Galaxy"). Returns the
+    filtered query and a relevance expression (higher is better), or None
+    when the database has no full-text index.
+    """
+    terms = search_terms(search_term)
+    backend = search_backend() if terms else 'like'
+
+    if backend == 'postgresql':
+        ts_query = func.to_tsquery('simple', ' & '.join(f'{term}:*' for term in terms))
+        search_vector = literal_column('products.search_vector')
+        query = query.filter(search_vector.op('@@')(ts_query))
+        return query, func.ts_rank(search_vector, ts_query)
+
+    if backend == 'sqlite':
+        matches = text(
+            'SELECT rowid AS product_id, bm25(products_fts, {}) AS rank '
+            'FROM products_fts WHERE products_fts MATCH :match'.format(
+                ', '.join(str(weight) for weight in SQLITE_BM25_WEIGHTS)
+            )
+        ).bindparams(
+            match=' '.join(f'"{term}"*' for term in terms)
+        ).columns(product_id=Integer, rank=Float).subquery('product_matches')
+        query = query.join(matches, matches.c.product_id == Product.id)
+        # bm25() is lower for better matches
+        return query, -matches.c.rank
+
+    search_pattern = f"%{search_term}%"
+    query = query.filter(
+        or_(
+            Product.name.ilike(search_pattern),
+            Product.description.ilike(search_pattern),
+            Product.brand.ilike(search_pattern),
+            Product.model.ilike(search_pattern)
+        )
+    )
+    return query, None
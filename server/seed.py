@@ -1,17 +1,59 @@
 """
 Database seeding script for Electronics Shop
-Run this script to populate the database with sample data
+
+    python server/seed.py
+        Drop all tables and create the sample users, categories and products.
+
+    python server/seed.py --products 1000000 --users 200000 --orders 5000000
+        Also generate a large synthetic dataset on top of them (see
+        ``generate_data``). ``--keep`` adds to the existing data instead of
+        starting over; ``--seed`` and ``--end-date`` make the output repeatable.
 """
 
+import argparse
+import csv
+import enum
+import io
 import json
+import os
+import random
+import sys
+import time
+from array import array
+from bisect import bisect
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from app import create_app
-from models import db, User, Category, Product, UserRole
+from itertools import accumulate, islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text, update
+from server.app import create_app
+from server.models.database import (db, User, Category, Product, Order, OrderItem, ProductReview, WishlistItem,
+                                    Coupon, UserRole, OrderStatus, PaymentStatus, ReviewStatus, DiscountType,
+                                    CouponStatus)
+from server.passwords import password_hasher
+from server.rollup import rebuild_sales_rollup
+
+CATEGORIES = [
+    {'name': 'Smartphones', 'description': 'Latest smartphones and mobile devices',
+     'image_url': 'https://example.com/images/smartphones.jpg'},
+    {'name': 'Laptops', 'description': 'Powerful laptops and notebooks',
+     'image_url': 'https://example.com/images/laptops.jpg'},
+    {'name': 'Tablets', 'description': 'Tablets and e-readers',
+     'image_url': 'https://example.com/images/tablets.jpg'},
+    {'name': 'Audio', 'description': 'Headphones, speakers, and audio equipment',
+     'image_url': 'https://example.com/images/audio.jpg'},
+    {'name': 'Gaming', 'description': 'Gaming consoles and accessories',
+     'image_url': 'https://example.com/images/gaming.jpg'},
+    {'name': 'Wearables', 'description': 'Smartwatches and fitness trackers',
+     'image_url': 'https://example.com/images/wearables.jpg'}
+]
 
 
-def seed_database():
+def seed_database(app=None):
     """Seed the database with initial data"""
-    app = create_app()
+    app = app or create_app()
 
     with app.app_context():
         # Clear existing data
@@ -53,23 +95,9 @@ def seed_database():
 
         # Create categories
         print("Creating categories...")
-        categories_data = [
-            {'name': 'Smartphones', 'description': 'Latest smartphones and mobile devices',
-             'image_url': 'https://example.com/images/smartphones.jpg'},
-            {'name': 'Laptops', 'description': 'Powerful laptops and notebooks',
-             'image_url': 'https://example.com/images/laptops.jpg'},
-            {'name': 'Tablets', 'description': 'Tablets and e-readers',
-             'image_url': 'https://example.com/images/tablets.jpg'},
-            {'name': 'Audio', 'description': 'Headphones, speakers, and audio equipment',
-             'image_url': 'https://example.com/images/audio.jpg'},
-            {'name': 'Gaming', 'description': 'Gaming consoles and accessories',
-             'image_url': 'https://example.com/images/gaming.jpg'},
-            {'name': 'Wearables', 'description': 'Smartwatches and fitness trackers',
-             'image_url': 'https://example.com/images/wearables.jpg'}
-        ]
 
         categories = []
-        for cat_data in categories_data:
+        for cat_data in CATEGORIES:
             category = Category(**cat_data)
             categories.append(category)
             db.session.add(category)
@@ -300,5 +328,553 @@ def seed_database():
         print("Created 3 users")
 
 
+# Synthetic data at scale
+
+GENERATED_PASSWORD = 'password123'
+PRODUCT_LINES = {
+    'Smartphones': (['Phone', 'Phone Plus', 'Phone Mini', 'Phone Ultra'],
+                    ['Apple', 'Samsung', 'Google', 'OnePlus', 'Xiaomi', 'Motorola'], 650),
+    'Laptops': (['Notebook', 'Ultrabook', 'Gaming Laptop', 'Chromebook'],
+                ['Apple', 'Dell', 'Lenovo', 'HP', 'Asus', 'Acer'], 1100),
+    'Tablets': (['Tablet', 'Tablet Pro', 'E-Reader'], ['Apple', 'Samsung', 'Amazon', 'Lenovo'], 450),
+    'Audio': (['Headphones', 'Earbuds', 'Speaker', 'Soundbar'], ['Sony', 'Bose', 'JBL', 'Sennheiser', 'Apple'], 180),
+    'Gaming': (['Console', 'Controller', 'Headset', 'Keyboard'], ['Sony', 'Microsoft', 'Nintendo', 'Razer'], 120),
+    'Wearables': (['Smartwatch', 'Fitness Band', 'Smart Ring'], ['Apple', 'Garmin', 'Fitbit', 'Samsung'], 250),
+}
+DEFAULT_PRODUCT_LINE = (['Gadget', 'Accessory', 'Device'], ['Generic', 'Acme', 'Globex'], 100)
+FIRST_NAMES = ['James', 'Mary', 'Wei', 'Aisha', 'Carlos', 'Olga', 'Kenji', 'Fatima', 'Liam', 'Priya', 'Noah',
+               'Sofia', 'Mateo', 'Amara', 'Lucas', 'Yuki', 'Ethan', 'Zara', 'Omar', 'Elena']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Kowalski', 'Nguyen', 'Silva', 'Patel', 'Muller', 'Kim',
+              'Johnson', 'Rossi', 'Haddad', 'Ivanova', 'Tanaka', 'Brown', 'Dubois', 'Santos', 'Ali', 'Jensen']
+CITIES = [('Springfield', 'IL'), ('Austin', 'TX'), ('Portland', 'OR'), ('Denver', 'CO'), ('Madison', 'WI'),
+          ('Raleigh', 'NC'), ('Tucson', 'AZ'), ('Albany', 'NY'), ('Boise', 'ID'), ('Tampa', 'FL')]
+PAYMENT_METHODS = ['credit_card', 'credit_card', 'credit_card', 'debit_card', 'paypal', 'bank_transfer']
+REVIEW_TITLES = {1: 'Disappointed', 2: 'Not great', 3: 'It is okay', 4: 'Very good', 5: 'Excellent'}
+# Relative order volume by month, before the holiday peak and weekend bump
+SEASONALITY = (0.8, 0.75, 0.85, 0.85, 0.9, 0.9, 0.95, 1.0, 0.95, 1.0, 1.35, 1.7)
+# Product and user popularity follow Zipf's law with these exponents
+PRODUCT_ZIPF = 1.07
+USER_ZIPF = 0.8
+ITEMS_PER_ORDER = ([1, 2, 3, 4, 5, 6], [45, 25, 14, 8, 5, 3])
+QUANTITIES = ([1, 2, 3], [85, 12, 3])
+RATINGS = ([1, 2, 3, 4, 5], [5, 5, 10, 30, 50])
+COUPON_RATE = 0.08
+
+
+def _money(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def _zipf_cum_weights(count, exponent):
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def _day_cum_weights(days, end_date):
+    """Cumulative weight of each day: seasonality, holiday peak, weekends and steady growth"""
+    weights = []
+    for offset in range(days):
+        day = end_date - timedelta(days=days - 1 - offset)
+        weight = SEASONALITY[day.month - 1] * (1 + offset / days)
+        if day.weekday() >= 5:
+            weight *= 1.2
+        if (day.month == 11 and day.day >= 24) or (day.month == 12 and day.day <= 20):
+            weight *= 1.8
+        weights.append(weight)
+    return list(accumulate(weights))
+
+
+class BulkWriter:
+    """Chunked inserts: ``COPY`` on PostgreSQL, executemany elsewhere. Commits per chunk."""
+
+    def __init__(self, engine, chunk_size):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.copy = engine.dialect.name == 'postgresql' and engine.dialect.driver in ('psycopg2', 'psycopg')
+
+    def write(self, model, rows):
+        """Insert an iterable of row dicts; returns the number of rows"""
+        table = model.__table__
+        rows = iter(rows)
+        total = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return total
+            if self.copy:
+                self._copy(table, chunk)
+            else:
+                with self.engine.begin() as conn:
+                    conn.execute(table.insert(), chunk)
+            total += len(chunk)
+
+    def _copy(self, table, chunk):
+        columns = list(chunk[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in chunk:
+            writer.writerow([self._copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        statement = f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+        with self.engine.begin() as conn:
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                if self.engine.dialect.driver == 'psycopg2':
+                    cursor.copy_expert(statement, buffer)
+                else:
+                    with cursor.copy(statement) as copy:
+                        copy.write(buffer.getvalue())
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _copy_value(value):
+        # csv writes None as an empty unquoted field, which COPY reads as NULL
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, enum.Enum):
+            return value.name  # SQLAlchemy stores Enum members by name
+        return value
+
+
+class DataGenerator:
+    """Builds a large, skewed dataset with chunked bulk inserts.
+
+    Every table draws from its own random stream derived from ``seed``, so
+    the same arguments and ``end_date`` always produce the same rows, and
+    changing one count leaves the other tables as they were.
+    """
+
+    def __init__(self, seed=42, days=730, end_date=None, chunk_size=10000, log=print):
+        self.seed = seed
+        self.days = days
+        self.end_date = end_date or date.today()
+        self.start = datetime.combine(self.end_date - timedelta(days=days - 1), datetime.min.time())
+        self.writer = BulkWriter(db.engine, chunk_size)
+        self.log = log
+        self._day_weights = _day_cum_weights(days, self.end_date)
+
+    def _rng(self, name):
+        return random.Random(f'{self.seed}:{name}')
+
+    def _next_id(self, model):
+        return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+    def _timestamp(self, rng):
+        """A moment weighted by the seasonal order volume"""
+        day = bisect(self._day_weights, rng.random() * self._day_weights[-1])
+        return self.start + timedelta(days=day, seconds=rng.randrange(86400))
+
+    def _uniform_timestamp(self, rng):
+        return self.start + timedelta(seconds=rng.randrange(self.days * 86400))
+
+    def _timed(self, label, model, rows):
+        started = time.perf_counter()
+        count = self.writer.write(model, rows)
+        elapsed = time.perf_counter() - started
+        self.log(f'{label}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f}/s)')
+        return count
+
+    # Tables
+
+    def categories(self):
+        categories = db.session.execute(select(Category.id, Category.name).order_by(Category.id)).all()
+        if not categories:
+            db.session.add_all(Category(**data) for data in CATEGORIES)
+            db.session.commit()
+            categories = db.session.execute(select(Category.id, Category.name).order_by(Category.id)).all()
+        return categories
+
+    def products(self, count):
+        rng = self._rng('products')
+        categories = self.categories()
+        first_id = self._next_id(Product)
+
+        def rows():
+            for product_id in range(first_id, first_id + count):
+                category_id, category_name = categories[rng.randrange(len(categories))]
+                kinds, brands, median_price = PRODUCT_LINES.get(category_name, DEFAULT_PRODUCT_LINE)
+                brand, kind = rng.choice(brands), rng.choice(kinds)
+                model = f'{kind[0]}{rng.randrange(100, 999)}'
+                price_cents = max(499, int(rng.lognormvariate(0, 0.6) * median_price * 100) // 100 * 100 - 1)
+                on_sale = rng.random() < 0.15
+                created_at = self._uniform_timestamp(rng)
+                yield {
+                    'id': product_id,
+                    'name': f'{brand} {kind} {model}',
+                    'description': f'{brand} {kind.lower()} {model} with {rng.choice(["128GB", "256GB", "512GB", "1TB"])}'
+                                   f' storage and a {rng.choice(["black", "silver", "blue", "white"])} finish',
+                    'price': _money(price_cents),
+                    'sale_price': _money(price_cents * rng.choice([80, 85, 90]) // 100) if on_sale else None,
+                    'sku': f'GEN-{product_id:08d}',
+                    'stock_quantity': 0 if rng.random() < 0.05 else rng.randrange(1, 500),
+                    'image_urls': [f'https://example.com/images/products/{product_id}-{n}.jpg'
+                                   for n in range(rng.randrange(1, 4))],
+                    'specifications': {'Brand': brand, 'Model': model, 'Warranty': '12 months'},
+                    'brand': brand,
+                    'model': model,
+                    'warranty_months': rng.choice([12, 12, 24]),
+                    'is_active': rng.random() >= 0.03,
+                    'is_featured': rng.random() < 0.01,
+                    'views_count': 0,
+                    'sales_count': 0,
+                    'category_id': category_id,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+
+        return self._timed('products', Product, rows())
+
+    def users(self, count):
+        rng = self._rng('users')
+        first_id = self._next_id(User)
+        # One hash for every generated account keeps this fast; they all log in with GENERATED_PASSWORD
+        password_hash = password_hasher().hash(GENERATED_PASSWORD)
+
+        def rows():
+            for user_id in range(first_id, first_id + count):
+                created_at = self._uniform_timestamp(rng)
+                yield {
+                    'id': user_id,
+                    'email': f'user{user_id}@example.com',
+                    'password_hash': password_hash,
+                    'first_name': rng.choice(FIRST_NAMES),
+                    'last_name': rng.choice(LAST_NAMES),
+                    'phone': f'+1555{rng.randrange(10 ** 7):07d}',
+                    'role': UserRole.CUSTOMER,
+                    'is_active': rng.random() >= 0.01,
+                    'auth_version': 1,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+
+        return self._timed('users', User, rows())
+
+    def coupons(self, count):
+        rng = self._rng('coupons')
+        first_id = self._next_id(Coupon)
+
+        def rows():
+            for coupon_id in range(first_id, first_id + count):
+                percentage = rng.random() < 0.7
+                yield {
+                    'id': coupon_id,
+                    'code': f'SAVE{coupon_id:05d}',
+                    'name': f'Promotion {coupon_id}',
+                    'discount_type': DiscountType.PERCENTAGE if percentage else DiscountType.FIXED_AMOUNT,
+                    'discount_value': Decimal(rng.choice([5, 10, 15, 20])) if percentage
+                    else Decimal(rng.choice([10, 20, 50])),
+                    'minimum_order_amount': Decimal(rng.choice([0, 50, 100])),
+                    'maximum_discount_amount': Decimal(100) if percentage else None,
+                    'usage_limit': None,
+                    'usage_limit_per_user': 1,
+                    'used_count': 0,
+                    'status': CouponStatus.ACTIVE,
+                    'valid_from': self.start,
+                    'valid_until': datetime.combine(self.end_date + timedelta(days=365), datetime.min.time()),
+                    'created_at': self.start,
+                }
+
+        return self._timed('coupons', Coupon, rows())
+
+    def _catalog(self):
+        """Active products as parallel arrays, ordered by popularity rank (a seeded shuffle)"""
+        ids, prices, names = array('i'), array('q'), []
+        result = db.session.execute(
+            select(Product.id, func.coalesce(Product.sale_price, Product.price), Product.name, Product.category_id)
+            .where(Product.is_active == True).order_by(Product.id)
+            .execution_options(yield_per=50000)
+        )
+        categories = array('i')
+        for product_id, price, name, category_id in result:
+            ids.append(product_id)
+            prices.append(int(price * 100))
+            names.append(name)
+            categories.append(category_id)
+        order = list(range(len(ids)))
+        self._rng('popularity').shuffle(order)
+        return order, ids, prices, names, categories
+
+    def _customers(self):
+        ids = array('i', db.session.scalars(
+            select(User.id).where(User.role == UserRole.CUSTOMER).order_by(User.id)
+            .execution_options(yield_per=50000)
+        ))
+        ranked = list(ids)
+        self._rng('activity').shuffle(ranked)
+        return ranked
+
+    def orders(self, count):
+        """Orders with 1-6 items each; returns (orders, items) written"""
+        rng = self._rng('orders')
+        ranks, ids, prices, names, categories = self._catalog()
+        customers = self._customers()
+        if not ranks or not customers:
+            self.log('orders: skipped, no active products or customers')
+            return 0, 0
+        product_weights = _zipf_cum_weights(len(ranks), PRODUCT_ZIPF)
+        user_weights = _zipf_cum_weights(len(customers), USER_ZIPF)
+        coupons = db.session.execute(select(Coupon.id, Coupon.discount_type, Coupon.discount_value)).all()
+        addresses = [
+            {'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES),
+             'address_line_1': f'{rng.randrange(1, 9999)} {rng.choice(LAST_NAMES)} St',
+             'city': city, 'state': state, 'postal_code': f'{rng.randrange(10000, 99999)}', 'country': 'US'}
+            for city, state in CITIES for _ in range(100)
+        ]
+        first_order_id = self._next_id(Order)
+        first_item_id = self._next_id(OrderItem)
+        pending_items = []
+        now = datetime.combine(self.end_date, datetime.max.time())
+
+        def line_items():
+            picked = set()
+            for _ in range(rng.choices(*ITEMS_PER_ORDER)[0]):
+                picked.add(ranks[bisect(product_weights, rng.random() * product_weights[-1])])
+            return [(index, rng.choices(*QUANTITIES)[0]) for index in sorted(picked)]
+
+        def order_rows():
+            item_id = first_item_id
+            for order_id in range(first_order_id, first_order_id + count):
+                created_at = self._timestamp(rng)
+                user_id = customers[bisect(user_weights, rng.random() * user_weights[-1])]
+                subtotal = 0
+                for index, quantity in line_items():
+                    line_total = prices[index] * quantity
+                    subtotal += line_total
+                    pending_items.append({
+                        'id': item_id, 'order_id': order_id, 'product_id': ids[index], 'quantity': quantity,
+                        'unit_price': _money(prices[index]), 'total_price': _money(line_total),
+                        'product_snapshot': {'id': ids[index], 'name': names[index], 'sku': f'GEN-{ids[index]:08d}',
+                                             'price': prices[index] / 100, 'category_id': categories[index]},
+                    })
+                    item_id += 1
+
+                coupon_id, discount = None, 0
+                if coupons and rng.random() < COUPON_RATE:
+                    coupon_id, discount_type, value = rng.choice(coupons)
+                    if discount_type == DiscountType.PERCENTAGE:
+                        discount = min(subtotal * int(value) // 100, 10000)
+                    else:
+                        discount = min(int(value * 100), subtotal)
+                taxed = subtotal - discount
+                tax = round(taxed * 0.08)
+                shipping = 0 if taxed >= 10000 else 1000
+
+                age = now - created_at
+                roll = rng.random()
+                shipped_at = delivered_at = None
+                if age < timedelta(days=1):
+                    status = OrderStatus.PENDING if roll < 0.6 else OrderStatus.CONFIRMED
+                elif age < timedelta(days=3):
+                    status = OrderStatus.PROCESSING if roll < 0.5 else OrderStatus.SHIPPED
+                elif roll < 0.04:
+                    status = OrderStatus.CANCELLED
+                elif roll < 0.06:
+                    status = OrderStatus.RETURNED
+                else:
+                    status = OrderStatus.DELIVERED if age >= timedelta(days=7) or roll > 0.5 else OrderStatus.SHIPPED
+                if status in (OrderStatus.SHIPPED, OrderStatus.DELIVERED, OrderStatus.RETURNED):
+                    shipped_at = created_at + timedelta(hours=rng.randrange(12, 72))
+                if status in (OrderStatus.DELIVERED, OrderStatus.RETURNED):
+                    delivered_at = shipped_at + timedelta(hours=rng.randrange(24, 120))
+                if status == OrderStatus.PENDING:
+                    payment_status = PaymentStatus.PENDING
+                elif status == OrderStatus.RETURNED or (status == OrderStatus.CANCELLED and rng.random() < 0.5):
+                    payment_status = PaymentStatus.REFUNDED
+                elif status == OrderStatus.CANCELLED:
+                    payment_status = PaymentStatus.FAILED
+                else:
+                    payment_status = PaymentStatus.COMPLETED
+
+                address = addresses[user_id % len(addresses)]
+                yield {
+                    'id': order_id,
+                    'order_number': f'ORD-{created_at:%Y%m%d}-{order_id:09d}',
+                    'user_id': user_id,
+                    'coupon_id': coupon_id,
+                    'coupon_discount': _money(discount),
+                    'status': status,
+                    'payment_status': payment_status,
+                    'subtotal': _money(subtotal),
+                    'tax_amount': _money(tax),
+                    'shipping_amount': _money(shipping),
+                    'total_amount': _money(taxed + tax + shipping),
+                    'currency': 'USD',
+                    'shipping_address': address,
+                    'billing_address': address,
+                    'payment_method': rng.choice(PAYMENT_METHODS),
+                    'payment_reference': None,
+                    'notes': None,
+                    'shipped_at': shipped_at,
+                    'delivered_at': delivered_at,
+                    'created_at': created_at,
+                    'updated_at': delivered_at or shipped_at or created_at,
+                }
+
+        def order_chunks():
+            # Write each chunk's items right after its orders, keeping memory flat
+            rows = order_rows()
+            while True:
+                chunk = list(islice(rows, self.writer.chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+
+        started = time.perf_counter()
+        order_count = item_count = 0
+        for chunk in order_chunks():
+            order_count += self.writer.write(Order, chunk)
+            item_count += self.writer.write(OrderItem, pending_items)
+            pending_items.clear()
+        elapsed = time.perf_counter() - started
+        self.log(f'orders: {order_count:,} orders with {item_count:,} items in {elapsed:.1f}s '
+                 f'({order_count / max(elapsed, 1e-9):,.0f} orders/s)')
+        return order_count, item_count
+
+    def _pairs(self, name, count, product_exponent):
+        """Distinct (user, product) pairs: active users and popular products, skewed"""
+        rng = self._rng(name)
+        ranks, ids, _, _, _ = self._catalog()
+        customers = self._customers()
+        if not ranks or not customers:
+            return rng, []
+        product_weights = _zipf_cum_weights(len(ranks), product_exponent)
+        user_weights = _zipf_cum_weights(len(customers), USER_ZIPF)
+        model = ProductReview if name == 'reviews' else WishlistItem
+        seen = set(db.session.execute(select(model.user_id, model.product_id)).tuples())
+        pairs = []
+        attempts = 0
+        while len(pairs) < count and attempts < count * 5:
+            attempts += 1
+            pair = (customers[bisect(user_weights, rng.random() * user_weights[-1])],
+                    ids[ranks[bisect(product_weights, rng.random() * product_weights[-1])]])
+            if pair not in seen:
+                seen.add(pair)
+                pairs.append(pair)
+        return rng, pairs
+
+    def reviews(self, count):
+        rng, pairs = self._pairs('reviews', count, PRODUCT_ZIPF)
+        first_id = self._next_id(ProductReview)
+
+        def rows():
+            for review_id, (user_id, product_id) in enumerate(pairs, first_id):
+                rating = rng.choices(*RATINGS)[0]
+                created_at = self._timestamp(rng)
+                yield {
+                    'id': review_id, 'user_id': user_id, 'product_id': product_id, 'order_id': None,
+                    'rating': rating, 'title': REVIEW_TITLES[rating],
+                    'comment': f'{REVIEW_TITLES[rating]}. Rated {rating} out of 5.',
+                    'status': ReviewStatus.APPROVED if rng.random() < 0.9 else ReviewStatus.PENDING,
+                    'is_verified_purchase': rng.random() < 0.7,
+                    'helpful_count': int(rng.paretovariate(1.5)) - 1,
+                    'created_at': created_at, 'updated_at': created_at,
+                }
+
+        return self._timed('reviews', ProductReview, rows())
+
+    def wishlists(self, count):
+        rng, pairs = self._pairs('wishlists', count, 0.9)
+        first_id = self._next_id(WishlistItem)
+        rows = ({'id': item_id, 'user_id': user_id, 'product_id': product_id,
+                 'created_at': self._uniform_timestamp(rng)}
+                for item_id, (user_id, product_id) in enumerate(pairs, first_id))
+        return self._timed('wishlist items', WishlistItem, rows)
+
+    # Derived data
+
+    def finish(self, rollup=True):
+        """Recompute counters from the generated rows, fix sequences and rebuild the sales rollup"""
+        started = time.perf_counter()
+        products, coupons = Product.__table__, Coupon.__table__
+        sold = (select(func.coalesce(func.sum(OrderItem.quantity), 0))
+                .where(OrderItem.product_id == products.c.id).scalar_subquery())
+        reviewed = (select(func.count(ProductReview.id))
+                    .where(ProductReview.product_id == products.c.id).scalar_subquery())
+        used = select(func.count(Order.id)).where(Order.coupon_id == coupons.c.id).scalar_subquery()
+        # Views track sales roughly 40:1, plus browsing that never converts
+        db.session.execute(update(products).values(sales_count=sold, views_count=sold * 40 + reviewed * 25,
+                                                   updated_at=products.c.updated_at))
+        db.session.execute(update(coupons).values(used_count=used))
+        db.session.commit()
+
+        if db.engine.dialect.name == 'postgresql':
+            for model in (User, Category, Product, Coupon, Order, OrderItem, ProductReview, WishlistItem):
+                table = model.__tablename__
+                db.session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+                ))
+            db.session.commit()
+        self.log(f'counters and sequences updated in {time.perf_counter() - started:.1f}s')
+
+        if rollup:
+            started = time.perf_counter()
+            written = rebuild_sales_rollup()
+            self.log(f'sales rollup: {written:,} rows in {time.perf_counter() - started:.1f}s')
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(text('ANALYZE'))
+
+
+def generate_data(products=0, users=0, orders=0, reviews=None, wishlists=None, coupons=None, seed=42,
+                  days=730, end_date=None, chunk_size=10000, rollup=True, log=print):
+    """Add a synthetic dataset to the current app's database.
+
+    Product popularity and customer activity are Zipf-distributed, order
+    dates follow weekly and yearly seasonality (with a holiday peak) over
+    the last ``days`` days, and orders hold 1-6 items. Reviews, wishlist
+    items and coupons default to orders / 10, users * 2 and 50.
+    """
+    generator = DataGenerator(seed=seed, days=days, end_date=end_date, chunk_size=chunk_size, log=log)
+    reviews = orders // 10 if reviews is None else reviews
+    wishlists = users * 2 if wishlists is None else wishlists
+    coupons = (50 if orders else 0) if coupons is None else coupons
+
+    if products:
+        generator.products(products)
+    if users:
+        generator.users(users)
+    if coupons:
+        generator.coupons(coupons)
+    if orders:
+        generator.orders(orders)
+    if reviews:
+        generator.reviews(reviews)
+    if wishlists:
+        generator.wishlists(wishlists)
+    generator.finish(rollup=rollup and bool(orders))
+    return generator
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=0, help='Synthetic products to add')
+    parser.add_argument('--users', type=int, default=0, help='Synthetic customers to add')
+    parser.add_argument('--orders', type=int, default=0, help='Synthetic orders to add')
+    parser.add_argument('--reviews', type=int, help='Product reviews (default: orders / 10)')
+    parser.add_argument('--wishlists', type=int, help='Wishlist items (default: users * 2)')
+    parser.add_argument('--coupons', type=int, help='Coupons (default: 50 when generating orders)')
+    parser.add_argument('--days', type=int, default=730, help='Days of order history')
+    parser.add_argument('--end-date', type=date.fromisoformat, help='Last day of order history (default: today)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per INSERT/COPY and commit')
+    parser.add_argument('--keep', action='store_true', help='Keep existing data instead of re-seeding')
+    parser.add_argument('--no-rollup', action='store_true', help='Skip rebuilding the daily sales rollup')
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    if not args.keep:
+        seed_database(app)
+    if args.products or args.users or args.orders or args.reviews or args.wishlists or args.coupons:
+        started = time.perf_counter()
+        with app.app_context():
+            generate_data(products=args.products, users=args.users, orders=args.orders, reviews=args.reviews,
+                          wishlists=args.wishlists, coupons=args.coupons, seed=args.seed, days=args.days,
+                          end_date=args.end_date, chunk_size=args.chunk_size, rollup=not args.no_rollup)
+        print(f"✅ Synthetic data generated in {time.perf_counter() - started:.1f}s")
+
+
 if __name__ == "__main__":
-    seed_database()
+    main()
@@ -1,8 +1,12 @@
+import base64
+import json
 import uuid
 from datetime import datetime
+from decimal import Decimal
 from functools import wraps
 from flask import jsonify, request
-from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import and_, or_
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 
 def generate_order_number():
     """Generate a unique order number"""
@@ -14,18 +18,55 @@ def generate_sku():
     """Generate a unique SKU"""
     return f"SKU-{str(uuid.uuid4())[:8].upper()}"
 
+def _auth_versions():
+    from .cache import app_cache
+    return app_cache('auth_versions', 'AUTH_VERSION_CACHE_TTL', 30, maxsize=10000)
+
+def remember_auth_version(user):
+    """Cache a user's auth_version, e.g. right after issuing them a token"""
+    _auth_versions().set(str(user.id), user.auth_version)
+
+def forget_auth_version(user_id):
+    """Drop a cached auth_version after it was bumped (call after commit)"""
+    _auth_versions().delete(str(user_id))
+
+def current_user_role():
+    """Role of the user making the request, or None if they may not act.
+
+    Access tokens carry ``role`` and ``auth_version`` claims. While the
+    version still matches the user's (read through a short TTL cache) the
+    role claim is trusted without a query; older tokens, and tokens issued
+    before a role or status change, fall back to loading the user.
+    """
+    from .models.database import db, User, UserRole
+
+    claims = get_jwt()
+    identity = get_jwt_identity()
+    role = claims.get('role')
+
+    if role and 'auth_version' in claims:
+        current_version = _auth_versions().get_or_set(
+            str(identity),
+            lambda: db.session.query(User.auth_version).filter(User.id == identity).scalar()
+        )
+        if current_version == claims['auth_version']:
+            return UserRole(role)
+
+    user = db.session.get(User, identity)
+    if not user or not user.is_active:
+        return None
+    return user.role
+
 def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Import here to avoid circular imports
-        from .models.database import User, UserRole
+        from .models.database import UserRole
         
         verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         
-        if not user or user.role not in [UserRole.ADMIN, UserRole.MANAGER]:
+        if current_user_role() not in [UserRole.ADMIN, UserRole.MANAGER]:
             return jsonify({'message': 'Admin access required'}), 403
             
         return f(*args, **kwargs)
@@ -36,13 +77,11 @@ def manager_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Import here to avoid circular imports
-        from models.database import User, UserRole
+        from .models.database import UserRole
         
         verify_jwt_in_request()
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
         
-        if not user or user.role == UserRole.CUSTOMER:
+        if current_user_role() in [None, UserRole.CUSTOMER]:
             return jsonify({'message': 'Manager access required'}), 403
             
         return f(*args, **kwargs)
@@ -65,6 +104,110 @@ def paginate_query(query, page=1, per_page=20):
         }
     }
 
+def encode_cursor(state):
+    """Encode pagination state as an opaque, URL-safe cursor token"""
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """Decode a cursor token produced by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValidationError('Invalid cursor', 'cursor')
+    if not isinstance(state, dict) or 'id' not in state:
+        raise ValidationError('Invalid cursor', 'cursor')
+    return state
+
+def _dump_cursor_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def _load_cursor_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        return python_type(value)
+    except (ValueError, TypeError, NotImplementedError):
+        raise ValidationError('Invalid cursor', 'cursor')
+
+def cached_count(query):
+    """Count query results, reusing the result for identical queries for a short TTL"""
+    from .cache import app_cache
+
+    count_query = query.order_by(None)
+    compiled = count_query.statement.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    cache = app_cache('query_counts', 'PAGINATION_COUNT_CACHE_TTL', 60)
+    return cache.get_or_set(key, count_query.count)
+
+def keyset_paginate_query(query, sort_column, id_column, sort_key, sort_order='asc',
+                          cursor=None, per_page=20, include_total=False):
+    """Paginate with an opaque (sort value, id) cursor instead of OFFSET.
+
+    Every page costs the same regardless of depth. The total row count is
+    only computed when include_total is set, and is then served from a
+    short-lived cache.
+    """
+    base_query = query
+    descending = sort_order == 'desc'
+
+    if cursor:
+        state = decode_cursor(cursor)
+        if state.get('s') != sort_key or state.get('o') != sort_order:
+            raise ValidationError('Cursor does not match the requested sort order', 'cursor')
+        value = _load_cursor_value(sort_column, state.get('v'))
+        last_id = state['id']
+        if descending:
+            query = query.filter(or_(
+                sort_column < value,
+                and_(sort_column == value, id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > value,
+                and_(sort_column == value, id_column > last_id)
+            ))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor({
+            's': sort_key,
+            'o': sort_order,
+            'v': _dump_cursor_value(getattr(last, sort_column.key)),
+            'id': getattr(last, id_column.key)
+        })
+
+    pagination = {
+        'per_page': per_page,
+        'has_prev': bool(cursor),
+        'has_next': has_next,
+        'next_cursor': next_cursor
+    }
+    if include_total:
+        total = cached_count(base_query)
+        pagination['total'] = total
+        pagination['pages'] = (total + per_page - 1) // per_page
+
+    return {'items': items, 'pagination': pagination}
+
 def success_response(message, data=None, status_code=200):
     """Standard success response format"""
     response = {'success': True, 'message': message}
@@ -81,13 +224,15 @@ def error_response(message, status_code=400, errors=None):
 
 def calculate_tax(subtotal, tax_rate=0.08):
     """Calculate tax amount"""
+    if isinstance(subtotal, Decimal):
+        return (subtotal * Decimal(str(tax_rate))).quantize(Decimal('0.01'))
     return subtotal * tax_rate
 
 def calculate_shipping(subtotal, weight=None):
     """Calculate shipping cost"""
     if subtotal >= 100:  # Free shipping over $100
-        return 0
-    return 10.00  # Flat rate shipping
+        return Decimal('0.00') if isinstance(subtotal, Decimal) else 0
+    return Decimal('10.00') if isinstance(subtotal, Decimal) else 10.00  # Flat rate shipping
 
 class ValidationError(Exception):
     """Custom validation error exception"""
@@ -107,17 +252,27 @@ def validate_stock_quantity(product, requested_quantity):
         )
 
 def update_product_stock(product, quantity_sold):
-    """Update product stock after sale"""
-    from models.database import db
-    
+    """Update product stock after sale (caller commits).
+
+    Checkout uses server.checkout.place_order, which decrements stock for
+    the whole cart in one statement.
+    """
     product.stock_quantity -= quantity_sold
     product.sales_count += quantity_sold
-    db.session.commit()
 
 def restore_product_stock(product, quantity_restored):
-    """Restore product stock (e.g., when order is cancelled)"""
-    from models.database import db
-    
+    """Restore product stock, e.g. when an order is cancelled (caller commits)"""
     product.stock_quantity += quantity_restored
     product.sales_count = max(0, product.sales_count - quantity_restored)
-    db.session.commit()
\ No newline at end of file
+
+def dialect_insert(table):
+    """INSERT for the current database that supports ``on_conflict_do_update``"""
+    from .models.database import db
+    from sqlalchemy.dialects import postgresql, sqlite
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f'Upserts are not supported on {dialect}')
@@ -0,0 +1,123 @@
+"""
+Write-behind product view counter
+
+Product page views are accumulated in memory and written back in batches
+with one ``UPDATE products SET views_count = views_count + n`` per product,
+so GET /api/products/<id> never opens a write transaction.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from flask import current_app
+from sqlalchemy import bindparam, func, update
+from server.models.database import db, Product
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Per-app accumulator of product view increments"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 0
+        self.threshold = 0
+        self._pending = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', 10)
+        self.threshold = app.config.get('VIEW_COUNT_FLUSH_THRESHOLD', 1000)
+        app.extensions['view_counter'] = self
+        if self.interval > 0:
+            # With interval 0 flushing is left entirely to the caller
+            atexit.register(self.flush)
+
+    def record(self, product_id, count=1):
+        """Count a view; the database is updated on the next flush"""
+        self._check_fork()
+        with self._lock:
+            self._pending[product_id] = self._pending.get(product_id, 0) + count
+            self._pending_total += count
+            over_threshold = self.threshold and self._pending_total >= self.threshold
+        if self.interval > 0:
+            self._ensure_thread()
+            if over_threshold:
+                self._wake.set()
+
+    def pending(self, product_id):
+        """Views recorded for a product but not yet flushed"""
+        with self._lock:
+            return self._pending.get(product_id, 0)
+
+    def flush(self):
+        """Write all pending increments to the database, returning the number of products updated"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._pending_total = 0
+        if not batch or self.app is None:
+            return 0
+
+        products = Product.__table__
+        statement = (
+            update(products)
+            .where(products.c.id == bindparam('product_id'))
+            .values(views_count=func.coalesce(products.c.views_count, 0) + bindparam('increment'))
+        )
+        # Ordered by id so concurrent flushers lock rows in the same order
+        params = [
+            {'product_id': product_id, 'increment': increment}
+            for product_id, increment in sorted(batch.items())
+        ]
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(statement, params)
+        except Exception:
+            logger.exception('Failed to flush %d product view counts', len(params))
+            with self._lock:
+                for product_id, increment in batch.items():
+                    self._pending[product_id] = self._pending.get(product_id, 0) + increment
+                    self._pending_total += increment
+            return 0
+        return len(params)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='view-counter-flush', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def _check_fork(self):
+        # A forked worker must not re-flush counts inherited from its parent
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._pid = os.getpid()
+                    self._pending = {}
+                    self._pending_total = 0
+                    self._thread = None
+
+
+def get_view_counter():
+    """Return the view counter of the current app"""
+    return current_app.extensions['view_counter']
@@ -2,11 +2,17 @@
 Pytest configuration and fixtures for Electronics Shop API tests
 """
 
-import pytest
-import tempfile
 import os
+import sqlite3
+import pytest
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+import server.config
 from server import create_app
-from server.models.database import db
+from server.models.database import db, User, UserRole
+from server.instrumentation import collect_queries
+from server.utils import remember_auth_version
+from sqlalchemy.pool import StaticPool
 
 class TestConfig:
     """Test configuration"""
@@ -17,19 +23,117 @@ class TestConfig:
     SECRET_KEY = 'test-secret-key'
     WTF_CSRF_ENABLED = False
 
-@pytest.fixture
-def app():
-    """Create and configure a new app instance for each test."""
-    app = create_app('testing')
-    app.config.from_object(TestConfig)
-    
+
+class SharedConnection:
+    """The session's SQLite connection, shared by every test's app.
+
+    Between ``begin_test()`` and ``end_test()`` the whole test runs inside
+    a savepoint: ``commit()`` releases and reopens an inner savepoint and
+    ``rollback()`` rolls back to it, so sessions and ``engine.begin()``
+    blocks behave as usual and ``end_test()`` discards everything.
+    """
+
+    def __init__(self, path):
+        # Autocommit mode: transactions are only the savepoints issued here
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._in_test = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def begin_test(self):
+        self._connection.execute('SAVEPOINT test_case')
+        self._connection.execute('SAVEPOINT app_transaction')
+        self._in_test = True
+
+    def end_test(self):
+        self._in_test = False
+        self._connection.execute('ROLLBACK TO test_case')
+        self._connection.execute('RELEASE test_case')
+
+    def commit(self):
+        if self._in_test:
+            self._connection.execute('RELEASE app_transaction')
+            self._connection.execute('SAVEPOINT app_transaction')
+
+    def rollback(self):
+        if self._in_test:
+            self._connection.execute('ROLLBACK TO app_transaction')
+
+    def close(self):
+        # Engines of finished tests must not close the shared connection
+        pass
+
+
+def _test_app(connection):
+    """A testing app whose engine runs on the shared connection"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(server.config.TestingConfig, 'SQLALCHEMY_ENGINE_OPTIONS',
+                   {'poolclass': StaticPool, 'creator': lambda: connection})
+        # Pragmas cannot change inside the test's transaction and do nothing in memory
+        mp.setattr(server.config.TestingConfig, 'SQLITE_JOURNAL_MODE', '')
+        mp.setattr(server.config.TestingConfig, 'SQLITE_SYNCHRONOUS', '')
+        return create_app('testing')
+
+
+@pytest.fixture(scope='session')
+def database(tmp_path_factory):
+    """One SQLite database per test process, with the schema created once.
+
+    Runs in memory; under pytest-xdist (``pytest -n auto``) each worker
+    uses its own file in the worker's temp dir instead.
+    """
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    path = str(tmp_path_factory.getbasetemp() / f'shop-{worker}.db') if worker else ':memory:'
+    connection = SharedConnection(path)
+    app = _test_app(connection)
     with app.app_context():
-        # Create all database tables
         db.create_all()
-        yield app
-        # Clean up
-        db.session.remove()
-        db.drop_all()
+        db.engine.dispose()
+    yield connection
+    connection._connection.close()
+
+
+@pytest.fixture
+def app(database):
+    """Create and configure a new app instance for each test.
+
+    The schema already exists; whatever the test writes is rolled back.
+    """
+    app = _test_app(database)
+    app.config.from_object(TestConfig)
+
+    database.begin_test()
+    try:
+        with app.app_context():
+            yield app
+            db.session.remove()
+    finally:
+        database.end_test()
+
+
+@pytest.fixture(scope='session')
+def password_hashes():
+    """Password hashes computed once, at the testing hash cost"""
+    method = f'pbkdf2:sha256:{server.config.TestingConfig.PASSWORD_PBKDF2_ITERATIONS}'
+    return {password: generate_password_hash(password, method=method) for password in ('testpass123', 'admin123')}
+
+
+def _user_headers(password_hash, **fields):
+    user = User(password_hash=password_hash, **fields)
+    db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=user.id, additional_claims=user.jwt_claims())
+    remember_auth_version(user)
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager collecting SQL statements, e.g. ``with count_queries() as q``.
+
+    The result has ``statements``, ``parameters``, ``count`` and ``shapes()``.
+    """
+    return collect_queries
 
 @pytest.fixture
 def client(app):
@@ -42,56 +146,20 @@ def runner(app):
     return app.test_cli_runner()
 
 @pytest.fixture
-def auth_headers(client):
-    """Get authentication headers for testing protected routes."""
-    # Register a test user
-    client.post('/api/auth/register', json={
-        'email': 'testuser@example.com',
-        'password': 'testpass123',
-        'first_name': 'Test',
-        'last_name': 'User'
-    })
-    
-    # Login to get token
-    response = client.post('/api/auth/login', json={
-        'email': 'testuser@example.com',
-        'password': 'testpass123'
-    })
-    
-    if response.status_code == 200:
-        data = response.get_json()
-        token = data['data']['access_token']
-        return {'Authorization': f'Bearer {token}'}
-    return {}
+def auth_headers(app, password_hashes):
+    """Authentication headers for a regular user (testuser@example.com / testpass123).
+
+    The user is inserted with a cached password hash and the token is
+    issued as /api/auth/login would; test_auth covers the real login.
+    """
+    return _user_headers(password_hashes['testpass123'], email='testuser@example.com',
+                         first_name='Test', last_name='User')
 
 @pytest.fixture
-def admin_headers(client):
-    """Get admin authentication headers for testing admin routes."""
-    from server.models.database import User, UserRole
-    
-    # Create admin user directly in database
-    with client.application.app_context():
-        admin = User(
-            email='admin@test.com',
-            first_name='Admin',
-            last_name='User',
-            role=UserRole.ADMIN
-        )
-        admin.set_password('admin123')
-        db.session.add(admin)
-        db.session.commit()
-    
-    # Login as admin
-    response = client.post('/api/auth/login', json={
-        'email': 'admin@test.com',
-        'password': 'admin123'
-    })
-    
-    if response.status_code == 200:
-        data = response.get_json()
-        token = data['data']['access_token']
-        return {'Authorization': f'Bearer {token}'}
-    return {}
+def admin_headers(app, password_hashes):
+    """Authentication headers for an admin user (admin@test.com / admin123)."""
+    return _user_headers(password_hashes['admin123'], email='admin@test.com',
+                         first_name='Admin', last_name='User', role=UserRole.ADMIN)
 
 @pytest.fixture
 def sample_category(client):
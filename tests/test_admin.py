@@ -0,0 +1,71 @@
+"""
+Admin analytics tests for Electronics Shop API
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from server.models.database import db, User, Order, OrderStatus, PaymentStatus
+
+
+def create_order(user_id, number, status, payment_status, total, days_ago=0):
+    order = Order(
+        order_number=f'ORD-ADMIN-{number}',
+        user_id=user_id,
+        status=status,
+        payment_status=payment_status,
+        subtotal=Decimal(total),
+        total_amount=Decimal(total),
+        created_at=datetime.utcnow() - timedelta(days=days_ago)
+    )
+    db.session.add(order)
+    return order
+
+
+def seed_orders(app):
+    with app.app_context():
+        user_id = User.query.filter_by(email='admin@test.com').first().id
+        create_order(user_id, 1, OrderStatus.PENDING, PaymentStatus.PENDING, '40.00')
+        create_order(user_id, 2, OrderStatus.SHIPPED, PaymentStatus.COMPLETED, '100.00', days_ago=3)
+        create_order(user_id, 3, OrderStatus.DELIVERED, PaymentStatus.COMPLETED, '60.00', days_ago=20)
+        create_order(user_id, 4, OrderStatus.CANCELLED, PaymentStatus.REFUNDED, '25.00', days_ago=90)
+        db.session.commit()
+
+
+def test_dashboard_analytics_figures(app, client, admin_headers, sample_product):
+    seed_orders(app)
+    response = client.get('/api/admin/analytics/dashboard', headers=admin_headers)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+
+    assert data['users'] == {'total': 1, 'active': 1, 'new_30d': 1, 'new_7d': 1}
+    assert data['products'] == {'total': 1, 'active': 1, 'featured': 0, 'out_of_stock': 0}
+    assert data['categories'] == {'total': 1, 'active': 1}
+    assert data['orders'] == {
+        'total': 4, 'orders_30d': 3, 'orders_7d': 2, 'orders_today': 1,
+        'pending': 1, 'processing': 0, 'shipped': 1
+    }
+    assert data['revenue'] == {'total': 160.0, 'revenue_30d': 160.0, 'revenue_7d': 100.0, 'pending': 40.0}
+
+
+def test_dashboard_analytics_uses_few_queries_and_is_cached(app, client, admin_headers, count_queries):
+    seed_orders(app)
+    with count_queries() as first:
+        assert client.get('/api/admin/analytics/dashboard', headers=admin_headers).status_code == 200
+    # One aggregate query per entity; the admin role comes from the token
+    assert first.count <= 4
+
+    with count_queries() as second:
+        assert client.get('/api/admin/analytics/dashboard', headers=admin_headers).status_code == 200
+    assert second.count == 0
+
+
+def test_order_stats_share_the_analytics_service(app, client, admin_headers):
+    seed_orders(app)
+    response = client.get('/api/orders/stats', headers=admin_headers)
+    assert response.status_code == 200
+    stats = response.get_json()['data']
+    assert stats['orders'] == {
+        'total': 4, 'pending': 1, 'confirmed': 0, 'shipped': 1,
+        'delivered': 1, 'cancelled': 1, 'recent_30_days': 3
+    }
+    assert stats['revenue'] == {'total': 160.0, 'pending': 40.0, 'recent_30_days': 160.0}
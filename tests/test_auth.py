@@ -196,4 +196,73 @@ def test_update_profile_success(client):
     
 #     # Test login with new password
 #     login_response = login_user(client, email=email, password=new_password)
-#     assert login_response.status_code == 200
\ No newline at end of file
+#     assert login_response.status_code == 200
+
+def user_lookups(queries):
+    return [s for s in queries.statements if 'users.id = ' in s]
+
+def test_access_token_carries_role_claims(app, client):
+    """Access tokens embed the role and auth version checked by admin routes"""
+    from flask_jwt_extended import decode_token
+
+    register_user(client)
+    token = login_user(client).get_json()['data']['access_token']
+    with app.app_context():
+        claims = decode_token(token)
+    assert claims['role'] == 'customer'
+    assert claims['auth_version'] == 1
+
+def test_admin_routes_check_role_without_user_query(client, admin_headers, count_queries):
+    """A current role claim is trusted without loading the user"""
+    with count_queries() as queries:
+        response = client.get('/api/admin/analytics/dashboard', headers=admin_headers)
+    assert response.status_code == 200
+    assert user_lookups(queries) == []
+
+def test_fixed_admin_token_cannot_use_admin_routes(client):
+    """The fixed admin login has no user row, so role checks reject its token"""
+    response = login_user(client, email='admin@shop.com', password='admin123')
+    headers = {'Authorization': f"Bearer {response.get_json()['data']['access_token']}"}
+    assert client.get('/api/admin/users', headers=headers).status_code == 403
+
+def test_role_change_invalidates_issued_tokens(app, client, admin_headers):
+    """Demoting or deactivating a user stops their existing token from passing role checks"""
+    from server.models.database import db, User, UserRole
+
+    with app.app_context():
+        manager = User(email='manager@test.com', first_name='Man', last_name='Ager', role=UserRole.MANAGER)
+        manager.set_password('manager123')
+        db.session.add(manager)
+        db.session.commit()
+        manager_id = manager.id
+
+    token = login_user(client, email='manager@test.com', password='manager123').get_json()['data']['access_token']
+    manager_headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/orders/all', headers=manager_headers).status_code == 200
+
+    response = client.put(f'/api/admin/users/{manager_id}', json={'role': 'customer'}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get('/api/orders/all', headers=manager_headers).status_code == 403
+
+    response = client.put(f'/api/admin/users/{manager_id}', json={'role': 'manager'}, headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get('/api/orders/all', headers=manager_headers).status_code == 200
+
+    response = client.put(f'/api/admin/users/{manager_id}/toggle-status', headers=admin_headers)
+    assert response.status_code == 200
+    assert client.get('/api/orders/all', headers=manager_headers).status_code == 403
+
+def test_tokens_without_role_claims_fall_back_to_database(app, client):
+    """Tokens issued before role claims existed are still honoured"""
+    from flask_jwt_extended import create_access_token
+    from server.models.database import db, User, UserRole
+
+    with app.app_context():
+        admin = User(email='legacy@test.com', first_name='Leg', last_name='Acy', role=UserRole.ADMIN)
+        admin.set_password('legacy123')
+        db.session.add(admin)
+        db.session.commit()
+        token = create_access_token(identity=admin.id)
+
+    response = client.get('/api/admin/users', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
@@ -0,0 +1,75 @@
+"""
+Category tests for Electronics Shop API
+"""
+
+from server.models.database import db, Category, Product
+
+
+def create_catalog(app):
+    """Two categories: one with 3 active and 2 inactive products, one empty."""
+    with app.app_context():
+        phones = Category(name='Phones')
+        empty = Category(name='Empty')
+        db.session.add_all([phones, empty])
+        db.session.flush()
+        db.session.add_all([
+            Product(name=f'Phone {i}', price=100, sku=f'PHONE-{i}', stock_quantity=1,
+                    category_id=phones.id, is_active=i < 3)
+            for i in range(5)
+        ])
+        db.session.commit()
+        return phones.id, empty.id
+
+
+def product_counts(client):
+    response = client.get('/api/categories')
+    assert response.status_code == 200
+    return {category['name']: category['product_count'] for category in response.get_json()['data']}
+
+
+def test_category_product_counts_are_active_only(app, client):
+    create_catalog(app)
+    assert product_counts(client) == {'Empty': 0, 'Phones': 3}
+
+
+def test_categories_listing_uses_one_grouped_count_and_caches_it(app, client, count_queries):
+    create_catalog(app)
+    client.get('/api/categories')
+    with app.app_context():
+        db.session.add_all(Category(name=f'Extra {i}') for i in range(10))
+        db.session.commit()
+
+    with count_queries() as queries:
+        assert client.get('/api/categories').status_code == 200
+    # The category list only; counts come from the cache
+    assert queries.count == 1
+    assert not [statement for statement in queries.statements if 'FROM products' in statement]
+
+
+def test_product_writes_invalidate_category_counts(app, client, admin_headers):
+    phones_id, empty_id = create_catalog(app)
+    assert product_counts(client)['Empty'] == 0
+
+    response = client.post('/api/products', json={
+        'name': 'New Phone', 'price': 50, 'sku': 'PHONE-NEW', 'stock_quantity': 2, 'category_id': empty_id
+    }, headers=admin_headers)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    product_id = response.get_json()['data']['id']
+    assert product_counts(client) == {'Empty': 1, 'Phones': 3}
+
+    response = client.put(f'/api/products/{product_id}', json={'category_id': phones_id}, headers=admin_headers)
+    assert response.status_code == 200
+    assert product_counts(client) == {'Empty': 0, 'Phones': 4}
+
+    assert client.delete(f'/api/products/{product_id}', headers=admin_headers).status_code == 200
+    assert product_counts(client) == {'Empty': 0, 'Phones': 3}
+
+
+def test_delete_category_counts_active_products(app, client, admin_headers):
+    phones_id, empty_id = create_catalog(app)
+
+    response = client.delete(f'/api/categories/{phones_id}', headers=admin_headers)
+    assert response.status_code == 400
+    assert '3 active products' in response.get_json()['message']
+
+    assert client.delete(f'/api/categories/{empty_id}', headers=admin_headers).status_code == 200
@@ -0,0 +1,50 @@
+"""
+Engine options and SQLite pragma tests for Electronics Shop API
+"""
+
+import pytest
+import server.config
+from server.app import create_app
+from server.config import engine_options
+from server.db_engine import sqlite_pragmas
+from server.models.database import db
+
+
+def test_engine_options_from_environment(monkeypatch):
+    assert engine_options('sqlite:///:memory:') == {}
+    assert engine_options(None) == {}
+
+    monkeypatch.setenv('DB_POOL_SIZE', '25')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+    options = engine_options('postgresql://shop@db/shop')
+    assert options['pool_size'] == 25
+    assert options['max_overflow'] == 20
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args']['options'] == '-c statement_timeout=5000'
+
+    options = engine_options('sqlite:////var/lib/shop/app.db')
+    assert options['pool_size'] == 25
+    assert 'connect_args' not in options
+
+
+def test_sqlite_pragmas_validate_settings():
+    assert sqlite_pragmas({'SQLITE_JOURNAL_MODE': 'wal', 'SQLITE_BUSY_TIMEOUT_MS': '250'}) == [
+        'PRAGMA journal_mode=WAL', 'PRAGMA busy_timeout=250'
+    ]
+    assert sqlite_pragmas({'SQLITE_JOURNAL_MODE': '', 'SQLITE_SYNCHRONOUS': None}) == []
+    with pytest.raises(ValueError):
+        sqlite_pragmas({'SQLITE_JOURNAL_MODE': 'WAL; DROP TABLE users'})
+
+
+def test_sqlite_file_database_uses_wal(tmp_path, monkeypatch):
+    uri = f"sqlite:///{tmp_path / 'shop.db'}"
+    monkeypatch.setattr(server.config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', uri)
+    monkeypatch.setattr(server.config.TestingConfig, 'SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
+    app = create_app('testing')
+    with app.app_context():
+        assert db.engine.pool.size() == 10
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1
+            assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+        db.engine.dispose()
@@ -0,0 +1,84 @@
+"""
+Order export tests for Electronics Shop API
+"""
+
+import csv
+import io
+import json
+from datetime import date, timedelta
+import pytest
+from server.export import export_query, stream_csv
+from tests.test_orders import add_to_cart, checkout, checkout_products
+
+
+@pytest.fixture
+def placed_orders(client, auth_headers, checkout_products):
+    orders = []
+    for product_ids in (checkout_products[:2], checkout_products[2:]):
+        for product_id in product_ids:
+            add_to_cart(client, auth_headers, product_id, 1)
+        response = checkout(client, auth_headers)
+        assert response.status_code == 201, response.get_data(as_text=True)
+        orders.append(response.get_json()['data'])
+    return orders
+
+
+def test_export_csv_has_one_row_per_item(client, admin_headers, placed_orders):
+    response = client.get('/api/admin/orders/export', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename=orders-' in response.headers['Content-Disposition']
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['order_number'] for row in rows] == [
+        placed_orders[0]['order_number']] * 2 + [placed_orders[1]['order_number']]
+    assert rows[0]['status'] == 'pending'
+    assert rows[0]['sku'] == 'CHK-0'
+    assert rows[0]['unit_price'] == '20.00'
+    assert float(rows[2]['total_amount']) == pytest.approx(placed_orders[1]['total_amount'])
+
+
+def test_export_ndjson_nests_items(client, admin_headers, placed_orders):
+    response = client.get('/api/admin/orders/export?format=ndjson', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    orders = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [order['order_id'] for order in orders] == [order['id'] for order in placed_orders]
+    assert [len(order['items']) for order in orders] == [2, 1]
+    assert orders[0]['items'][1]['product_name'] == 'Checkout Item 1'
+    assert orders[1]['total_amount'] == pytest.approx(placed_orders[1]['total_amount'])
+
+
+def test_export_filters(client, admin_headers, placed_orders):
+    client.put(f"/api/orders/{placed_orders[1]['id']}/update-status",
+               json={'payment_status': 'completed'}, headers=admin_headers)
+
+    response = client.get('/api/admin/orders/export?format=ndjson&payment_status=completed',
+                          headers=admin_headers)
+    orders = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [order['order_id'] for order in orders] == [placed_orders[1]['id']]
+
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+    response = client.get(f'/api/admin/orders/export?format=ndjson&start_date={tomorrow}',
+                          headers=admin_headers)
+    assert response.get_data(as_text=True) == ''
+
+
+def test_export_streams_in_batches(app, placed_orders):
+    with app.test_request_context():
+        chunks = list(stream_csv(export_query(), batch_size=1))
+    # Header, then one chunk per line item
+    assert len(chunks) == 4
+
+
+def test_export_validation_and_permissions(client, auth_headers, admin_headers):
+    response = client.get('/api/admin/orders/export?format=xml', headers=admin_headers)
+    assert response.status_code == 400
+
+    response = client.get('/api/admin/orders/export?status=lost', headers=admin_headers)
+    assert response.status_code == 400
+
+    response = client.get('/api/admin/orders/export', headers=auth_headers)
+    assert response.status_code == 403
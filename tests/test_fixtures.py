@@ -0,0 +1,30 @@
+"""
+Tests for the per-test transaction used by the app fixture
+"""
+
+from server.models.database import db, Category
+from tests.conftest import _test_app
+
+
+def test_committed_writes_are_rolled_back(database):
+    database.begin_test()
+    try:
+        app = _test_app(database)
+        with app.app_context():
+            db.session.add(Category(name='Committed'))
+            db.session.commit()
+            with db.engine.begin() as conn:
+                conn.execute(Category.__table__.insert(), {'name': 'Engine Write', 'is_active': True})
+            # A failed transaction only loses its own writes
+            db.session.add(Category(name='Rolled Back'))
+            db.session.flush()
+            db.session.rollback()
+            assert sorted(c.name for c in Category.query) == ['Committed', 'Engine Write']
+            db.session.remove()
+    finally:
+        database.end_test()
+
+    app = _test_app(database)
+    with app.app_context():
+        assert Category.query.count() == 0
+        db.session.remove()
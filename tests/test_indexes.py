@@ -0,0 +1,150 @@
+"""
+Index coverage tests: every statement a hot route runs is EXPLAINed against
+a seeded dataset and must not fall back to a full table scan.
+"""
+
+import random
+import re
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy import insert
+from server.models.database import (db, User, Category, Product, Address, CartItem, Order, OrderItem,
+                                    OrderStatus, PaymentStatus)
+
+CATEGORIES = 20
+PRODUCTS = 4000
+USERS = 400
+ORDERS = 6000
+
+# Tables large enough that a full scan is a regression
+LARGE_TABLES = {'users', 'products', 'addresses', 'cart_items', 'orders', 'order_items'}
+
+
+@pytest.fixture
+def large_dataset(app, auth_headers):
+    """Bulk-seed a shop; the registered test user gets a share of the orders."""
+    rng = random.Random(8)
+    now = datetime.utcnow()
+    with app.app_context():
+        test_user_id = User.query.filter_by(email='testuser@example.com').one().id
+        db.session.execute(insert(User), [
+            {'email': f'seed{i}@example.com', 'password_hash': 'x', 'first_name': 'Seed', 'last_name': str(i)}
+            for i in range(USERS)
+        ])
+        user_ids = [test_user_id] + [user.id for user in User.query.filter(User.id != test_user_id)]
+
+        db.session.execute(insert(Category), [{'name': f'Seed Category {i}'} for i in range(CATEGORIES)])
+        category_ids = [category.id for category in Category.query]
+
+        db.session.execute(insert(Product), [
+            {
+                'name': f'Seed Product {i}',
+                'description': 'Seeded product',
+                'price': Decimal(rng.randint(5, 2000)),
+                'sku': f'SEED-{i:05d}',
+                'stock_quantity': rng.randint(0, 50),
+                'brand': f'Brand {i % 30}',
+                'category_id': rng.choice(category_ids),
+                'is_active': rng.random() < 0.9,
+                'is_featured': rng.random() < 0.05,
+                'created_at': now - timedelta(minutes=i)
+            }
+            for i in range(PRODUCTS)
+        ])
+        product_ids = [product.id for product in Product.query.with_entities(Product.id)]
+
+        db.session.execute(insert(Address), [
+            {
+                'user_id': user_id, 'type': address_type, 'first_name': 'Seed', 'last_name': 'User',
+                'address_line_1': '1 Seed St', 'city': 'Seed', 'state': 'SD',
+                'postal_code': '00000', 'country': 'Seedland'
+            }
+            for user_id in user_ids for address_type in ('shipping', 'billing')
+        ])
+        db.session.execute(insert(CartItem), [
+            {'user_id': user_id, 'product_id': product_id, 'quantity': 1}
+            for user_id in user_ids for product_id in rng.sample(product_ids, 3)
+        ])
+
+        db.session.execute(insert(Order), [
+            {
+                'order_number': f'ORD-SEED-{i:06d}',
+                'user_id': user_ids[0] if i % 50 == 0 else rng.choice(user_ids),
+                'status': rng.choice(list(OrderStatus)),
+                'payment_status': rng.choice(list(PaymentStatus)),
+                'subtotal': Decimal('100.00'),
+                'total_amount': Decimal('118.00'),
+                'created_at': now - timedelta(hours=i)
+            }
+            for i in range(ORDERS)
+        ])
+        order_ids = [order.id for order in Order.query.with_entities(Order.id)]
+        db.session.execute(insert(OrderItem), [
+            {
+                'order_id': order_id, 'product_id': product_id, 'quantity': 1,
+                'unit_price': Decimal('50.00'), 'total_price': Decimal('50.00')
+            }
+            for order_id in order_ids for product_id in rng.sample(product_ids, 2)
+        ])
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        return {
+            'category_id': category_ids[0],
+            'product_id': Product.query.filter_by(is_active=True).first().id,
+            'order_id': Order.query.filter_by(user_id=test_user_id).first().id,
+            'user_id': test_user_id
+        }
+
+
+def full_scans(statement, parameters):
+    """Tables the database would read in full to run a statement"""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            plan = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).scalars().all()
+            return {match.group(1) for line in plan
+                    for match in [re.search(r'Seq Scan on (\w+)', line)] if match}
+        plan = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        return {match.group(1) for row in plan
+                for match in [re.fullmatch(r'SCAN (\w+)', row[-1])] if match}
+
+
+ROUTES = [
+    ('/api/products', None),
+    ('/api/products?category_id={category_id}', None),
+    ('/api/products?sort_by=price&sort_order=asc', None),
+    ('/api/products?cursor=', None),
+    ('/api/products/featured', None),
+    ('/api/products/categories/{category_id}', None),
+    ('/api/products/{product_id}', None),
+    ('/api/products/search?q=seed', None),
+    ('/api/cart', 'user'),
+    ('/api/addresses?type=shipping', 'user'),
+    ('/api/orders', 'user'),
+    ('/api/orders/{order_id}', 'user'),
+    ('/api/orders/all', 'admin'),
+    ('/api/orders/all?status=pending', 'admin'),
+    ('/api/orders/all?payment_status=completed', 'admin'),
+    ('/api/orders/all?user_id={user_id}', 'admin'),
+    ('/api/admin/orders/export?status=pending', 'admin'),
+]
+
+
+def test_hot_routes_use_indexes(client, auth_headers, admin_headers, large_dataset, count_queries):
+    headers = {'user': auth_headers, 'admin': admin_headers}
+    failures = []
+    for route, role in ROUTES:
+        url = route.format(**large_dataset)
+        with count_queries() as queries:
+            response = client.get(url, headers=headers.get(role, {}))
+            response.get_data()
+        assert response.status_code == 200, (url, response.get_data(as_text=True))
+
+        for statement, parameters in zip(queries.statements, queries.parameters):
+            if not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            scanned = full_scans(statement, parameters) & LARGE_TABLES
+            if scanned:
+                failures.append(f'{url}: full scan of {sorted(scanned)} in {statement}')
+
+    assert not failures, '\n'.join(failures)
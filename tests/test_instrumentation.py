@@ -0,0 +1,84 @@
+"""
+SQL instrumentation tests for Electronics Shop API
+"""
+
+import json
+import logging
+import pytest
+from server.instrumentation import NPlusOneDetected, statement_shape
+from server.models.database import db, Category, Product
+
+
+@pytest.fixture
+def many_products(client):
+    """Twelve products spread over six categories."""
+    with client.application.app_context():
+        categories = [Category(name=f'Instrumented {i}') for i in range(6)]
+        db.session.add_all(categories)
+        db.session.flush()
+        db.session.add_all([
+            Product(name=f'Instrumented Product {i}', price=10 + i, sku=f'INS-{i}',
+                    stock_quantity=5, category_id=categories[i % 6].id)
+            for i in range(12)
+        ])
+        db.session.commit()
+
+
+def server_timing(response):
+    metrics = {}
+    for metric in response.headers['Server-Timing'].split(','):
+        name, *params = [part.strip() for part in metric.split(';')]
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+def test_server_timing_reports_request_queries(client, many_products, count_queries):
+    with count_queries() as queries:
+        response = client.get('/api/products?per_page=12')
+    assert response.status_code == 200
+    timing = server_timing(response)
+    assert float(timing['app']['dur']) >= float(timing['db']['dur']) > 0
+    assert timing['db']['desc'] == f'"{queries.count} queries"'
+
+
+def test_request_log_line(client, many_products, caplog):
+    with caplog.at_level(logging.INFO, logger='server.instrumentation'):
+        client.get('/api/categories')
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record['endpoint'] == 'categories.get_categories'
+    assert record['status'] == 200
+    assert record['db_queries'] >= 1
+    assert record['repeated_queries'] == 0
+
+
+def add_lazy_route(app):
+    @app.route('/test/lazy-categories')
+    def lazy_categories():
+        return {'categories': [product.category.name for product in Product.query.all()]}
+
+
+def test_n_plus_one_fails_in_testing(app, client, many_products):
+    add_lazy_route(app)
+    with pytest.raises(NPlusOneDetected, match='6x SELECT categories'):
+        client.get('/test/lazy-categories')
+
+
+def test_n_plus_one_is_logged_in_production(app, client, many_products, caplog):
+    app.extensions['query_instrumentation'].raise_on_repeat = False
+    add_lazy_route(app)
+    with caplog.at_level(logging.WARNING, logger='server.instrumentation'):
+        response = client.get('/test/lazy-categories')
+    assert response.status_code == 200
+    assert 'Possible N+1 queries in GET /test/lazy-categories' in caplog.text
+
+
+def test_catalog_routes_have_no_repeated_queries(client, many_products):
+    # NPlusOneDetected is raised by the testing config if any of these loop
+    for url in ('/api/products?per_page=12', '/api/products/featured', '/api/categories',
+                '/api/products/search?q=instrumented'):
+        assert client.get(url).status_code == 200
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape('SELECT * FROM t WHERE id IN (?, ?, ?)') == 'SELECT * FROM t WHERE id IN (?)'
+    assert statement_shape('WHERE id IN (%(id_1_1)s, %(id_1_2)s)') == 'WHERE id IN (?)'
@@ -0,0 +1,96 @@
+"""
+Bulk inventory update tests for Electronics Shop API
+"""
+
+from decimal import Decimal
+import pytest
+from server.models.database import db, Product
+
+
+@pytest.fixture
+def inventory_products(client, sample_category):
+    with client.application.app_context():
+        products = [
+            Product(name=f'Stock Item {i}', price=100 + i, sku=f'INV-{i}', stock_quantity=10,
+                    category_id=sample_category)
+            for i in range(4)
+        ]
+        db.session.add_all(products)
+        db.session.commit()
+        return {product.sku: product.id for product in products}
+
+
+def patch_inventory(client, headers, items):
+    return client.patch('/api/products/inventory', json={'items': items}, headers=headers)
+
+
+def product_state(app, sku):
+    with app.app_context():
+        product = Product.query.filter_by(sku=sku).one()
+        return product.stock_quantity, product.price, product.sale_price
+
+
+def test_inventory_update_applies_values_and_deltas(app, client, admin_headers, inventory_products, count_queries):
+    with count_queries() as queries:
+        response = patch_inventory(client, admin_headers, [
+            {'sku': 'INV-0', 'stock_quantity': 3},
+            {'sku': 'INV-1', 'stock_quantity_delta': -4, 'price': '89.50'},
+            {'sku': 'INV-2', 'sale_price': '79.99', 'price_delta': 5},
+            {'sku': 'INV-3', 'sale_price_delta': 10},
+        ])
+    assert response.status_code == 200, response.get_data(as_text=True)
+    summary = response.get_json()['data']
+    assert summary['updated'] == 4
+    assert summary['not_found'] == summary['conflicts'] == summary['rejected'] == summary['invalid'] == []
+    assert 'products' not in summary
+    # Lock/select plus one UPDATE for the whole batch
+    assert len([s for s in queries.statements if s.lstrip().upper().startswith('UPDATE PRODUCTS')]) == 1
+
+    assert product_state(app, 'INV-0') == (3, Decimal('100.00'), None)
+    assert product_state(app, 'INV-1') == (6, Decimal('89.50'), None)
+    assert product_state(app, 'INV-2') == (10, Decimal('107.00'), Decimal('79.99'))
+    assert product_state(app, 'INV-3') == (10, Decimal('103.00'), Decimal('10.00'))
+
+
+def test_inventory_update_reports_skipped_items(app, client, admin_headers, inventory_products):
+    response = patch_inventory(client, admin_headers, [
+        {'sku': 'INV-0', 'stock_quantity_delta': -11},
+        {'sku': 'NOPE', 'stock_quantity': 1},
+        {'sku': 'INV-1', 'stock_quantity': 1, 'stock_quantity_delta': 1},
+        {'sku': 'INV-2'},
+        {'sku': 'INV-3', 'stock_quantity': 1},
+        {'sku': 'INV-3', 'stock_quantity': 2},
+    ])
+    summary = response.get_json()['data']
+    assert summary['updated'] == 1
+    assert summary['rejected'] == ['INV-0']
+    assert summary['not_found'] == ['NOPE']
+    assert [item['index'] for item in summary['invalid']] == [2, 3, 5]
+    assert product_state(app, 'INV-0')[0] == 10
+    assert product_state(app, 'INV-3')[0] == 1
+
+
+def test_inventory_update_checks_expected_version(app, client, admin_headers, inventory_products):
+    with app.app_context():
+        version = db.session.get(Product, inventory_products['INV-0']).updated_at.isoformat()
+
+    response = patch_inventory(client, admin_headers, [{'sku': 'INV-0', 'stock_quantity': 5,
+                                                        'expected_updated_at': version}])
+    summary = response.get_json()['data']
+    assert summary['updated'] == 1
+    assert summary['updated_at'] != version
+
+    # The same version is now stale
+    response = patch_inventory(client, admin_headers, [{'sku': 'INV-0', 'stock_quantity': 7,
+                                                        'expected_updated_at': version}])
+    assert response.get_json()['data']['conflicts'] == ['INV-0']
+    assert product_state(app, 'INV-0')[0] == 5
+
+    response = patch_inventory(client, admin_headers, [{'sku': 'INV-0', 'stock_quantity': 7,
+                                                        'expected_updated_at': summary['updated_at']}])
+    assert response.get_json()['data']['updated'] == 1
+
+
+def test_inventory_update_requires_admin(client, auth_headers, admin_headers):
+    assert patch_inventory(client, auth_headers, [{'sku': 'X', 'stock_quantity': 1}]).status_code == 403
+    assert patch_inventory(client, admin_headers, []).status_code == 400
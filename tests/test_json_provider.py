@@ -0,0 +1,50 @@
+"""
+JSON provider tests
+"""
+
+import enum
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from server.json_provider import StdlibJSONProvider, OrjsonProvider, orjson
+
+
+class Colour(enum.Enum):
+    RED = 'red'
+
+
+PAYLOAD = {
+    'price': Decimal('19.99'),
+    'created_at': datetime(2026, 10, 18, 12, 30, 5, 120000),
+    'day': date(2026, 10, 18),
+    'colour': Colour.RED,
+    'nested': [{'amount': Decimal('0.10')}]
+}
+EXPECTED = {
+    'price': 19.99,
+    'created_at': '2026-10-18T12:30:05.120000',
+    'day': '2026-10-18',
+    'colour': 'red',
+    'nested': [{'amount': 0.1}]
+}
+
+PROVIDERS = [StdlibJSONProvider]
+if orjson is not None:
+    PROVIDERS.append(OrjsonProvider)
+
+
+@pytest.mark.parametrize('provider_class', PROVIDERS)
+def test_providers_serialize_raw_model_values(app, provider_class):
+    provider = provider_class(app)
+    assert provider.loads(provider.dumps(PAYLOAD)) == EXPECTED
+
+    response = provider.response(PAYLOAD)
+    assert response.mimetype == 'application/json'
+    assert provider.loads(response.get_data()) == EXPECTED
+
+
+def test_app_uses_configured_provider(app):
+    use_orjson = app.config['JSON_PROVIDER'] == 'orjson' or (
+        app.config['JSON_PROVIDER'] == 'auto' and orjson is not None)
+    expected = OrjsonProvider if use_orjson else StdlibJSONProvider
+    assert type(app.json) is expected
@@ -0,0 +1,102 @@
+"""
+Metrics endpoint tests for Electronics Shop API
+"""
+
+import json
+import os
+import pytest
+import server.config
+from server.app import create_app
+from server.models.database import db
+
+
+def scrape(client, headers=None):
+    response = client.get('/metrics', headers=headers or {})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_requests_per_route(client, sample_category):
+    for _ in range(3):
+        client.get('/api/categories')
+    client.get('/api/products/999999')
+    client.get('/no-such-page')
+
+    samples = scrape(client)
+    route = 'blueprint="categories",endpoint="categories.get_categories",method="GET"'
+    assert samples[f'http_requests_total{{{route},status="200"}}'] == 3
+    assert samples[f'http_request_duration_seconds_count{{{route}}}'] == 3
+    assert samples[f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] == 3
+    assert samples[f'http_response_size_bytes_count{{{route}}}'] == 3
+    assert samples[f'http_request_db_queries_count{{{route}}}'] == 3
+    assert samples['http_requests_total{blueprint="products",endpoint="products.get_product",'
+                   'method="GET",status="404"}'] == 1
+    assert samples['http_requests_total{blueprint="",endpoint="unmatched",method="GET",status="404"}'] == 1
+    # The scrape itself is in progress
+    assert samples['http_requests_in_progress'] == 1
+    assert samples['db_pool_checkout_seconds_count{bind="default"}'] >= 1
+
+
+def test_metrics_count_unhandled_exceptions(app, client):
+    @app.route('/test/boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        client.get('/test/boom')
+    samples = scrape(client)
+    assert samples['http_request_exceptions_total{blueprint="",endpoint="boom",method="GET"}'] == 1
+    assert samples['http_requests_in_progress'] == 1
+
+
+def test_metrics_token(app, client):
+    app.config['METRICS_TOKEN'] = 'scrape-secret'
+    assert client.get('/metrics').status_code == 401
+    scrape(client, {'Authorization': 'Bearer scrape-secret'})
+
+
+def dead_pid():
+    pid = 4_000_000
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def test_metrics_merge_worker_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(server.config.TestingConfig, 'METRICS_MULTIPROC_DIR', str(tmp_path))
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.get('/api/health')
+
+        route = [['blueprint', ''], ['endpoint', 'health_check'], ['method', 'GET']]
+        for pid, requests in ((os.getppid(), 2), (dead_pid(), 5)):
+            (tmp_path / f'metrics-{pid}.json').write_text(json.dumps({
+                'counters': [['http_requests_total', route + [['status', '200']], requests]],
+                'gauges': [['http_requests_in_progress', [], 4]],
+                'histograms': [['http_request_duration_seconds', route, [requests] + [0] * 11, 0.5, requests]],
+            }))
+
+        samples = scrape(client)
+        labels = 'blueprint="",endpoint="health_check",method="GET"'
+        assert samples[f'http_requests_total{{{labels},status="200"}}'] == 1 + 2 + 5
+        assert samples[f'http_request_duration_seconds_count{{{labels}}}'] == 8
+        assert samples[f'http_request_duration_seconds_bucket{{{labels},le="0.005"}}'] >= 7
+        # Gauges only come from running workers: this one plus the parent
+        assert samples['http_requests_in_progress'] == 1 + 4
+
+        app.extensions['metrics'].write_snapshot()
+        assert (tmp_path / f'metrics-{os.getpid()}.json').exists()
+        db.drop_all()
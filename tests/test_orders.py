@@ -0,0 +1,191 @@
+"""
+Checkout and order tests for Electronics Shop API
+"""
+
+import pytest
+from sqlalchemy import event
+from server.models.database import db, Product, Category, Order, OrderItem, CartItem
+
+SHIPPING_ADDRESS = {
+    'type': 'shipping',
+    'first_name': 'John',
+    'last_name': 'Doe',
+    'address_line_1': '123 Main St',
+    'city': 'Test City',
+    'state': 'Test State',
+    'postal_code': '12345',
+    'country': 'Test Country'
+}
+
+
+@pytest.fixture
+def checkout_products(client, sample_category):
+    """Three products with limited stock."""
+    with client.application.app_context():
+        products = [
+            Product(name=f'Checkout Item {i}', price=20 + i, sku=f'CHK-{i}',
+                    stock_quantity=5, category_id=sample_category)
+            for i in range(3)
+        ]
+        db.session.add_all(products)
+        db.session.commit()
+        return [product.id for product in products]
+
+
+def add_to_cart(client, headers, product_id, quantity):
+    response = client.post('/api/cart/add', json={'product_id': product_id, 'quantity': quantity},
+                           headers=headers)
+    assert response.status_code in (200, 201), response.get_data(as_text=True)
+
+
+def checkout(client, headers):
+    return client.post('/api/orders/create', json={
+        'payment_method': 'credit_card',
+        'shipping_address': SHIPPING_ADDRESS
+    }, headers=headers)
+
+
+def test_checkout_creates_order_and_decrements_stock(app, client, auth_headers, checkout_products):
+    for product_id in checkout_products:
+        add_to_cart(client, auth_headers, product_id, 2)
+
+    response = checkout(client, auth_headers)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    order = response.get_json()['data']
+    assert len(order['items']) == 3
+    assert order['subtotal'] == pytest.approx(2 * (20 + 21 + 22))
+    assert order['total_amount'] == pytest.approx(order['subtotal'] + order['tax_amount'] + order['shipping_amount'])
+
+    with app.app_context():
+        for product_id in checkout_products:
+            product = db.session.get(Product, product_id)
+            assert product.stock_quantity == 3
+            assert product.sales_count == 2
+        assert CartItem.query.count() == 0
+        assert OrderItem.query.count() == 3
+
+
+def test_checkout_is_all_or_nothing_when_stock_runs_out(app, client, auth_headers, checkout_products):
+    for product_id in checkout_products:
+        add_to_cart(client, auth_headers, product_id, 4)
+
+    # Another buyer takes most of the last product's stock after it was carted
+    with app.app_context():
+        db.session.get(Product, checkout_products[-1]).stock_quantity = 1
+        db.session.commit()
+
+    response = checkout(client, auth_headers)
+    assert response.status_code == 400
+    assert 'Not enough stock' in response.get_json()['message']
+
+    with app.app_context():
+        assert [db.session.get(Product, pid).stock_quantity for pid in checkout_products] == [5, 5, 1]
+        assert Order.query.count() == 0
+        assert CartItem.query.count() == 3
+
+
+def test_checkout_is_all_or_nothing_when_stock_is_lost_to_a_race(app, client, auth_headers, checkout_products):
+    for product_id in checkout_products:
+        add_to_cart(client, auth_headers, product_id, 4)
+
+    # Another buyer takes the last product's stock after the pre-check,
+    # just before the guarded UPDATE runs
+    raced = []
+
+    def concurrent_sale(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith('UPDATE products') and 'stock_quantity >=' in statement and not raced:
+            cursor.execute('UPDATE products SET stock_quantity = 1 WHERE id = ?', (checkout_products[-1],))
+            raced.append(True)
+
+    event.listen(db.engine, 'before_cursor_execute', concurrent_sale)
+    try:
+        response = checkout(client, auth_headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', concurrent_sale)
+    assert raced
+    assert response.status_code == 400
+    assert 'Not enough stock' in response.get_json()['message']
+
+    with app.app_context():
+        assert [db.session.get(Product, pid).stock_quantity for pid in checkout_products] == [5, 5, 5]
+        assert [db.session.get(Product, pid).sales_count for pid in checkout_products] == [0, 0, 0]
+        assert Order.query.count() == 0
+        assert OrderItem.query.count() == 0
+        assert CartItem.query.count() == 3
+
+
+def test_checkout_statement_count_does_not_grow_with_cart_size(app, client, auth_headers,
+                                                              checkout_products, count_queries):
+    add_to_cart(client, auth_headers, checkout_products[0], 1)
+    with count_queries() as small:
+        assert checkout(client, auth_headers).status_code == 201
+
+    for product_id in checkout_products:
+        add_to_cart(client, auth_headers, product_id, 1)
+    with count_queries() as large:
+        assert checkout(client, auth_headers).status_code == 201
+
+    writes = lambda q: [s for s in q.statements if not s.lstrip().upper().startswith('SELECT')]
+    assert len(writes(large)) == len(writes(small))
+
+
+def test_checkout_response_does_not_refresh_products_one_by_one(app, client, auth_headers, sample_category,
+                                                               count_queries):
+    with app.app_context():
+        products = [Product(name=f'Big Cart Item {i}', price=10, sku=f'BIG-{i}', stock_quantity=5,
+                            category_id=sample_category) for i in range(8)]
+        db.session.add_all(products)
+        db.session.commit()
+        product_ids = [product.id for product in products]
+    for product_id in product_ids:
+        add_to_cart(client, auth_headers, product_id, 1)
+
+    with count_queries() as queries:
+        response = checkout(client, auth_headers)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert len(response.get_json()['data']['items']) == 8
+    assert max(queries.shapes().values()) <= 2
+
+
+def test_cancel_order_restores_stock(app, client, auth_headers, checkout_products):
+    add_to_cart(client, auth_headers, checkout_products[0], 3)
+    order_id = checkout(client, auth_headers).get_json()['data']['id']
+
+    response = client.put(f'/api/orders/{order_id}/cancel', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data']['status'] == 'cancelled'
+
+    with app.app_context():
+        product = db.session.get(Product, checkout_products[0])
+        assert product.stock_quantity == 5
+        assert product.sales_count == 0
+
+
+def test_order_history_is_summarized_from_snapshots(app, client, auth_headers, checkout_products, count_queries):
+    add_to_cart(client, auth_headers, checkout_products[0], 2)
+    add_to_cart(client, auth_headers, checkout_products[1], 1)
+    assert checkout(client, auth_headers).status_code == 201
+
+    # Renaming the product later doesn't change what was ordered
+    with app.app_context():
+        db.session.get(Product, checkout_products[0]).name = 'Renamed'
+        db.session.commit()
+
+    with count_queries() as queries:
+        response = client.get('/api/orders', headers=auth_headers)
+    assert response.status_code == 200
+    order = response.get_json()['data']['orders'][0]
+    assert 'items' not in order and 'shipping_address' not in order
+    assert order['item_count'] == 2
+    assert order['total_items'] == 3
+    assert order['coupon_code'] is None
+    assert not any('FROM products' in statement for statement in queries.statements)
+
+    response = client.get('/api/orders?expand=items', headers=auth_headers)
+    items = response.get_json()['data']['orders'][0]['items']
+    assert [(item['name'], item['sku'], item['quantity']) for item in items] == [
+        ('Checkout Item 0', 'CHK-0', 2), ('Checkout Item 1', 'CHK-1', 1)
+    ]
+    assert items[0]['total_price'] == pytest.approx(40)
+
+    assert client.get('/api/orders?expand=product', headers=auth_headers).status_code == 400
@@ -0,0 +1,72 @@
+"""
+Password hashing tests for Electronics Shop API
+"""
+
+import threading
+from werkzeug.security import generate_password_hash
+from server.models.database import db, User
+
+
+def _create_user(password_hash, email='hash@example.com'):
+    user = User(email=email, password_hash=password_hash, first_name='Hash', last_name='User')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _login(client, email='hash@example.com', password='secret123'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password})
+
+
+def test_needs_rehash_follows_settings(app):
+    hasher = app.extensions['password_hasher']
+    current = hasher.hash('secret123')
+    assert current.startswith('pbkdf2:sha256:1000$')
+    assert hasher.verify(current, 'secret123')
+    assert not hasher.verify(current, 'wrong')
+    assert not hasher.needs_rehash(current)
+    assert hasher.needs_rehash(generate_password_hash('secret123', method='pbkdf2:sha256:2000'))
+    assert hasher.needs_rehash(generate_password_hash('secret123', method='scrypt'))
+
+    hasher.method = 'bcrypt'
+    bcrypt_hash = hasher.hash('secret123')
+    assert bcrypt_hash.startswith('$2b$04$')
+    assert hasher.verify(bcrypt_hash, 'secret123')
+    assert not hasher.verify('$2b$04$not-a-hash', 'secret123')
+    assert not hasher.needs_rehash(bcrypt_hash)
+    assert hasher.needs_rehash(current)
+
+
+def test_login_upgrades_old_hashes(app, client):
+    user = _create_user(generate_password_hash('secret123', method='pbkdf2:sha256:2000'))
+    assert _login(client).status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+
+    app.extensions['password_hasher'].method = 'bcrypt'
+    assert _login(client, password='wrong').status_code == 401
+    db.session.refresh(user)
+    assert user.password_hash.startswith('pbkdf2:')
+
+    assert _login(client).status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith('$2b$04$')
+    assert _login(client).status_code == 200
+
+
+def test_full_hashing_queue_returns_503(app, client):
+    hasher = app.extensions['password_hasher']
+    hasher._slots = threading.BoundedSemaphore(1)
+    hasher._slots.acquire()
+    try:
+        response = client.post('/api/auth/register', json={
+            'email': 'busy@example.com', 'password': 'secret123', 'first_name': 'Busy', 'last_name': 'User'
+        })
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert User.query.filter_by(email='busy@example.com').first() is None
+    finally:
+        hasher._slots.release()
+
+    _create_user(hasher.hash('secret123'))
+    assert _login(client).status_code == 200
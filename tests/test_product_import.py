@@ -0,0 +1,88 @@
+"""
+Bulk product import tests for Electronics Shop API
+"""
+
+import json
+from decimal import Decimal
+from server.models.database import db, Product
+
+
+def import_products(client, headers, body, content_type):
+    return client.post('/api/products/bulk', data=body, content_type=content_type, headers=headers)
+
+
+def test_json_import_creates_and_updates(app, client, admin_headers, sample_category, sample_product):
+    rows = [
+        {'name': 'Updated Product', 'price': 150, 'sku': 'TEST-PHONE-001', 'category_id': sample_category},
+        {'name': 'Bulk Phone', 'price': '299.99', 'sku': 'BULK-1', 'stock_quantity': 4,
+         'category_id': sample_category, 'specifications': {'ram': '8GB'}},
+        {'name': 'No Category', 'price': 10, 'sku': 'BULK-2', 'category_id': 9999},
+        {'name': 'Bad Price', 'price': -1, 'sku': 'BULK-3', 'category_id': sample_category},
+        {'name': 'Duplicate', 'price': 5, 'sku': 'BULK-1', 'category_id': sample_category},
+    ]
+    response = client.post('/api/products/bulk', json=rows, headers=admin_headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    report = response.get_json()['data']
+    assert (report['created'], report['updated'], report['failed']) == (1, 1, 3)
+    assert [(error['row'], error['sku'], list(error['errors'])) for error in report['errors']] == [
+        (3, 'BULK-2', ['category_id']),
+        (4, 'BULK-3', ['price']),
+        (5, 'BULK-1', ['sku']),
+    ]
+
+    with app.app_context():
+        updated = Product.query.filter_by(sku='TEST-PHONE-001').one()
+        assert (updated.name, updated.price, updated.stock_quantity) == ('Updated Product', 150, 10)
+        created = Product.query.filter_by(sku='BULK-1').one()
+        assert created.price == Decimal('299.99')
+        assert created.specifications == {'ram': '8GB'}
+        assert created.is_active is True
+
+
+def test_csv_import_in_batches(app, client, admin_headers, sample_category):
+    app.config['PRODUCT_IMPORT_BATCH_SIZE'] = 2
+    lines = ['sku,name,price,stock_quantity,image_urls,category_id']
+    lines += [f'CSV-{i},CSV Product {i},{10 + i},{i},,{sample_category}' for i in range(4)]
+    lines.append(f'CSV-9,With Images,5,,"[""https://cdn.example.com/1.jpg""]",{sample_category}')
+    lines.append(f'CSV-10,Broken Images,5,,not json,{sample_category}')
+    response = import_products(client, admin_headers, '\n'.join(lines), 'text/csv')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    report = response.get_json()['data']
+    assert (report['created'], report['failed']) == (5, 1)
+    assert report['errors'][0]['row'] == 6
+
+    with app.app_context():
+        assert Product.query.filter(Product.sku.like('CSV-%')).count() == 5
+        product = Product.query.filter_by(sku='CSV-9').one()
+        assert product.image_urls == ['https://cdn.example.com/1.jpg']
+        assert product.stock_quantity == 0
+
+
+def test_ndjson_import(app, client, admin_headers, sample_category):
+    body = '\n'.join([
+        json.dumps({'sku': 'ND-1', 'name': 'Line One', 'price': 1, 'category_id': sample_category}),
+        '{not json',
+        '',
+        json.dumps({'sku': 'ND-2', 'name': 'Line Two', 'price': 2, 'category_id': sample_category}),
+    ])
+    response = import_products(client, admin_headers, body, 'application/x-ndjson')
+    report = response.get_json()['data']
+    assert (report['created'], report['failed']) == (2, 1)
+    assert report['errors'][0]['row'] == 2
+
+
+def test_import_refreshes_catalog_counts(client, admin_headers, sample_category):
+    before = client.get(f'/api/categories/{sample_category}').get_json()['data']['product_count']
+    rows = [{'sku': f'CNT-{i}', 'name': 'Counted', 'price': 1, 'category_id': sample_category} for i in range(3)]
+    client.post('/api/products/bulk', json=rows, headers=admin_headers)
+    after = client.get(f'/api/categories/{sample_category}').get_json()['data']['product_count']
+    assert after == before + 3
+
+
+def test_import_rejects_bad_bodies(client, auth_headers, admin_headers):
+    response = import_products(client, admin_headers, '<products/>', 'application/xml')
+    assert response.status_code == 400
+    response = client.post('/api/products/bulk', json={'sku': 'X'}, headers=admin_headers)
+    assert response.status_code == 400
+    response = client.post('/api/products/bulk', json=[], headers=auth_headers)
+    assert response.status_code == 403
@@ -0,0 +1,170 @@
+"""
+Product listing tests for Electronics Shop API
+"""
+
+import pytest
+from server.models.database import db, Product
+
+
+@pytest.fixture
+def many_products(client, sample_category):
+    """Create a batch of products with distinct prices for pagination tests."""
+    with client.application.app_context():
+        for i in range(25):
+            db.session.add(Product(
+                name=f'Gadget {i:02d}',
+                description='Pagination test product',
+                price=100 + (i % 5),
+                sku=f'PAGE-{i:03d}',
+                stock_quantity=5,
+                category_id=sample_category,
+                brand='PageBrand'
+            ))
+        db.session.commit()
+    return 25
+
+
+def collect_cursor_pages(client, url):
+    """Follow next_cursor links until exhausted, returning all product ids."""
+    ids = []
+    cursor = ''
+    while True:
+        separator = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separator}cursor={cursor}')
+        assert response.status_code == 200, response.get_data(as_text=True)
+        data = response.get_json()['data']
+        ids.extend(product['id'] for product in data['products'])
+        cursor = data['pagination']['next_cursor']
+        if not data['pagination']['has_next']:
+            assert cursor is None
+            return ids
+
+
+def test_cursor_pagination_walks_all_products(client, many_products):
+    ids = collect_cursor_pages(client, '/api/products?per_page=7&sort_by=price&sort_order=desc')
+    assert len(ids) == many_products
+    assert len(set(ids)) == many_products
+
+    offset_ids = []
+    for page in range(1, 5):
+        response = client.get(f'/api/products?per_page=7&page={page}&sort_by=price&sort_order=desc')
+        offset_ids.extend(p['id'] for p in response.get_json()['data']['products'])
+    assert sorted(offset_ids) == sorted(ids)
+
+
+def test_cursor_pagination_orders_by_sort_key(client, many_products):
+    response = client.get('/api/products?per_page=50&sort_by=price&cursor=')
+    prices = [p['price'] for p in response.get_json()['data']['products']]
+    assert prices == sorted(prices)
+
+
+def test_cursor_pagination_total_is_optional(client, many_products):
+    response = client.get('/api/products?per_page=10&cursor=')
+    pagination = response.get_json()['data']['pagination']
+    assert 'total' not in pagination
+    assert pagination['has_next'] is True
+
+    response = client.get('/api/products?per_page=10&cursor=&include_total=true')
+    pagination = response.get_json()['data']['pagination']
+    assert pagination['total'] == many_products
+    assert pagination['pages'] == 3
+
+
+def test_cursor_pagination_on_category_and_search(client, sample_category, many_products):
+    ids = collect_cursor_pages(client, f'/api/products/categories/{sample_category}?per_page=10')
+    assert len(ids) == many_products
+
+    ids = collect_cursor_pages(client, '/api/products/search?q=gadget&per_page=10&sort_by=name')
+    assert len(ids) == many_products
+
+
+def test_cursor_rejects_tampered_or_mismatched_tokens(client, many_products):
+    response = client.get('/api/products?cursor=not-a-cursor')
+    assert response.status_code == 400
+
+    first = client.get('/api/products?per_page=5&sort_by=price&cursor=').get_json()
+    token = first['data']['pagination']['next_cursor']
+    response = client.get(f'/api/products?per_page=5&sort_by=name&cursor={token}')
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def search_catalog(client, sample_category):
+    """Products whose names/brands/descriptions exercise ranking and prefixes."""
+    rows = [
+        ('Galaxy Buds Pro', 'Samsung', 'Wireless earbuds', 149),
+        ('Samsung Galaxy S24', 'Samsung', 'Flagship phone', 999),
+        ('Pixel 8', 'Google', 'Phone with a great camera, rivals the galaxy line', 699),
+        ('Walkman', 'Sony', 'Retro music player', 99),
+    ]
+    with client.application.app_context():
+        for i, (name, brand, description, price) in enumerate(rows):
+            db.session.add(Product(
+                name=name, brand=brand, description=description, price=price,
+                sku=f'SEARCH-{i}', stock_quantity=3, category_id=sample_category
+            ))
+        db.session.commit()
+
+
+def search_names(client, query):
+    response = client.get(f'/api/products/search?{query}')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [p['name'] for p in response.get_json()['data']['products']]
+
+
+def test_search_ranks_name_matches_first(client, search_catalog):
+    names = search_names(client, 'q=galaxy')
+    assert set(names) == {'Galaxy Buds Pro', 'Samsung Galaxy S24', 'Pixel 8'}
+    assert names[-1] == 'Pixel 8'
+
+
+def test_search_matches_word_prefixes_and_all_terms(client, search_catalog):
+    assert set(search_names(client, 'q=sams%20gal')) == {'Samsung Galaxy S24', 'Galaxy Buds Pro'}
+    assert search_names(client, 'q=walk') == ['Walkman']
+    assert search_names(client, 'q=nothing-like-this') == []
+
+
+def test_search_applies_filters_on_top(client, search_catalog):
+    assert search_names(client, 'q=galaxy&max_price=500') == ['Galaxy Buds Pro']
+    assert set(search_names(client, 'q=galaxy&brand=Samsung')) == {'Galaxy Buds Pro', 'Samsung Galaxy S24'}
+    assert search_names(client, 'q=galaxy&sort_by=price&sort_order=asc') == [
+        'Galaxy Buds Pro', 'Pixel 8', 'Samsung Galaxy S24'
+    ]
+
+
+def test_search_index_follows_product_updates(client, admin_headers, search_catalog):
+    with client.application.app_context():
+        product_id = Product.query.filter_by(sku='SEARCH-3').first().id
+    response = client.put(f'/api/products/{product_id}', json={'name': 'Discman'}, headers=admin_headers)
+    assert response.status_code == 200
+    assert search_names(client, 'q=walkman') == []
+    assert search_names(client, 'q=discman') == ['Discman']
+
+
+def test_product_views_are_buffered_until_flushed(app, client, sample_product, count_queries):
+    from server.view_counter import get_view_counter
+
+    with count_queries() as queries:
+        for _ in range(3):
+            response = client.get(f'/api/products/{sample_product}')
+            assert response.status_code == 200
+    assert not any(s.lstrip().upper().startswith('UPDATE') for s in queries.statements)
+    assert response.get_json()['data']['views_count'] == 3
+
+    with app.app_context():
+        assert db.session.get(Product, sample_product).views_count == 0
+        assert get_view_counter().flush() == 1
+        db.session.expire_all()
+        assert db.session.get(Product, sample_product).views_count == 3
+        assert get_view_counter().pending(sample_product) == 0
+
+
+def test_admin_most_viewed_includes_buffered_views(client, admin_headers, sample_product):
+    client.get(f'/api/products/{sample_product}')
+    client.get(f'/api/products/{sample_product}')
+
+    response = client.get('/api/admin/analytics/products', headers=admin_headers)
+    assert response.status_code == 200
+    most_viewed = response.get_json()['data']['most_viewed']
+    assert most_viewed[0]['id'] == sample_product
+    assert most_viewed[0]['views_count'] == 2
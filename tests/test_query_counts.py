@@ -0,0 +1,137 @@
+"""
+Query-count regression tests: list endpoints must run a bounded number of
+SQL statements regardless of how many rows they return.
+"""
+
+from decimal import Decimal
+import pytest
+from server.models.database import db, User, Category, Product, CartItem, Order, OrderItem
+
+
+def create_products(app, count, prefix):
+    """Create products, each in its own category so lazy loads can't hit the identity map."""
+    with app.app_context():
+        ids = []
+        for i in range(count):
+            category = Category(name=f'{prefix} Category {i}')
+            db.session.add(category)
+            db.session.flush()
+            product = Product(
+                name=f'{prefix} Product {i}',
+                description='Query count product',
+                price=Decimal('10.00') + i,
+                sku=f'{prefix}-{i:03d}',
+                stock_quantity=100,
+                category_id=category.id,
+                is_featured=True
+            )
+            db.session.add(product)
+            db.session.flush()
+            ids.append(product.id)
+        db.session.commit()
+        return ids
+
+
+def create_orders(app, email, product_ids, order_count):
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        for n in range(order_count):
+            order = Order(
+                order_number=f'ORD-QC-{len(product_ids)}-{n}',
+                user_id=user.id,
+                subtotal=Decimal('10.00'),
+                total_amount=Decimal('10.00')
+            )
+            db.session.add(order)
+            db.session.flush()
+            for product_id in product_ids:
+                db.session.add(OrderItem(
+                    order_id=order.id,
+                    product_id=product_id,
+                    quantity=1,
+                    unit_price=Decimal('10.00'),
+                    total_price=Decimal('10.00')
+                ))
+        db.session.commit()
+
+
+def statements_for(client, count_queries, url, headers=None):
+    with count_queries() as queries:
+        response = client.get(url, headers=headers or {})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return queries.count
+
+
+def test_product_listings_query_count_is_constant(app, client, count_queries):
+    create_products(app, 2, 'Small')
+    urls = ('/api/products', '/api/products/featured', '/api/products/search?q=product')
+    for url in urls:
+        client.get(url)  # warm per-app caches (search backend detection)
+    small = {
+        url: statements_for(client, count_queries, url)
+        for url in urls
+    }
+
+    create_products(app, 15, 'Large')
+    for url, expected in small.items():
+        assert statements_for(client, count_queries, url) == expected, url
+
+
+def test_cart_query_count_is_constant(app, client, auth_headers, count_queries):
+    product_ids = create_products(app, 12, 'Cart')
+
+    client.post('/api/cart/add', json={'product_id': product_ids[0], 'quantity': 1}, headers=auth_headers)
+    single = statements_for(client, count_queries, '/api/cart', auth_headers)
+
+    for product_id in product_ids[1:]:
+        client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1}, headers=auth_headers)
+    assert statements_for(client, count_queries, '/api/cart', auth_headers) == single
+
+
+def test_cart_totals_are_computed_in_one_query(app, client, auth_headers, count_queries):
+    product_ids = create_products(app, 50, 'Totals')
+    with app.app_context():
+        # Half the products are on sale
+        for product_id in product_ids[::2]:
+            product = db.session.get(Product, product_id)
+            product.sale_price = product.price - 5
+        db.session.commit()
+        expected_subtotal = sum(
+            float(db.session.get(Product, product_id).current_price) * 2 for product_id in product_ids
+        )
+
+    for product_id in product_ids:
+        client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 2}, headers=auth_headers)
+
+    with count_queries() as queries:
+        response = client.get('/api/cart', headers=auth_headers)
+    assert queries.count == 1
+    data = response.get_json()['data']
+    assert len(data['items']) == 50
+    assert data['summary']['item_count'] == 50
+    assert data['summary']['total_items'] == 100
+    assert data['summary']['subtotal'] == pytest.approx(expected_subtotal)
+    assert sum(item['total_price'] for item in data['items']) == pytest.approx(expected_subtotal)
+
+    with count_queries() as queries:
+        response = client.get('/api/cart?fields=summary', headers=auth_headers)
+    assert queries.count == 1
+    assert response.get_json()['data'] == {'summary': data['summary']}
+
+
+def test_empty_cart_summary(client, auth_headers):
+    for url in ('/api/cart', '/api/cart?fields=summary'):
+        summary = client.get(url, headers=auth_headers).get_json()['data']['summary']
+        assert summary == {'item_count': 0, 'total_items': 0, 'subtotal': 0.0}
+
+
+def test_order_history_query_count_is_constant(app, client, auth_headers, count_queries):
+    product_ids = create_products(app, 6, 'Order')
+
+    urls = ('/api/orders', '/api/orders?expand=items')
+    create_orders(app, 'testuser@example.com', product_ids[:1], 1)
+    single = {url: statements_for(client, count_queries, url, auth_headers) for url in urls}
+
+    create_orders(app, 'testuser@example.com', product_ids, 8)
+    for url, expected in single.items():
+        assert statements_for(client, count_queries, url, auth_headers) == expected, url
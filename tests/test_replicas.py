@@ -0,0 +1,124 @@
+"""
+Read-replica routing tests for Electronics Shop API
+
+The primary and the replica are two SQLite files holding different data,
+so each response shows which database served it.
+"""
+
+import pytest
+import server.config
+from server.app import create_app
+from server.config import replica_binds
+from server.models.database import db, Category, Product, User, UserRole
+from server.replicas import STICKY_COOKIE
+from server.view_counter import get_view_counter
+
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    primary = f"sqlite:///{tmp_path / 'primary.db'}"
+    replica = f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(server.config.TestingConfig, 'SQLALCHEMY_DATABASE_URI', primary)
+    monkeypatch.setattr(server.config.TestingConfig, 'SQLALCHEMY_ENGINE_OPTIONS', {})
+    monkeypatch.setattr(server.config.TestingConfig, 'SQLALCHEMY_BINDS', {'replica_0': replica})
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica_0'])
+
+        category = Category(name='Primary Category')
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(Product(name='Primary Phone', price=100, sku='PRIMARY-1', stock_quantity=10,
+                               category_id=category.id))
+        admin = User(email='admin@test.com', first_name='Admin', last_name='User', role=UserRole.ADMIN)
+        admin.set_password('adminpass123')
+        db.session.add(admin)
+        db.session.commit()
+        with db.engines['replica_0'].begin() as conn:
+            conn.execute(Category.__table__.insert(), {'name': 'Replica Category', 'is_active': True})
+
+    # Each request gets its own app context and session, as in production
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _category_names(client, **kwargs):
+    response = client.get('/api/categories', **kwargs)
+    assert response.status_code == 200
+    return [category['name'] for category in response.get_json()['data']]
+
+
+def _login(client):
+    client.post('/api/auth/register', json={
+        'email': 'reader@example.com', 'password': 'testpass123', 'first_name': 'Read', 'last_name': 'Er'
+    })
+    response = client.post('/api/auth/login', json={'email': 'reader@example.com', 'password': 'testpass123'})
+    return {'Authorization': f"Bearer {response.get_json()['data']['access_token']}"}
+
+
+def test_replica_binds_from_environment():
+    assert replica_binds(None) == {}
+    binds = replica_binds('sqlite:////srv/a.db, postgresql://shop@replica/shop')
+    assert list(binds) == ['replica_0', 'replica_1']
+    assert binds['replica_0']['url'] == 'sqlite:////srv/a.db'
+    assert binds['replica_1']['pool_pre_ping'] is True
+
+
+def test_get_requests_read_from_replica(replica_app):
+    client = replica_app.test_client()
+    assert _category_names(client) == ['Replica Category']
+    # Routes without @replica_read use the primary
+    response = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass123'})
+    assert response.status_code == 200
+
+
+def test_writer_is_pinned_to_primary(replica_app):
+    client = replica_app.test_client()
+    headers = _login(client)
+    # Registering pinned this client; start from a clean slate
+    client.delete_cookie(STICKY_COOKIE)
+    assert _category_names(client, headers=headers) == ['Replica Category']
+
+    with replica_app.app_context():
+        product_id = Product.query.filter_by(sku='PRIMARY-1').one().id
+    response = client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1}, headers=headers)
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+
+    # Pinned by the cookie...
+    assert _category_names(client, headers=headers) == ['Primary Category']
+    # ...and by user id when the cookie is not sent back
+    client.delete_cookie(STICKY_COOKIE)
+    assert _category_names(client, headers=headers) == ['Primary Category']
+    # Other clients still read the replica
+    assert _category_names(replica_app.test_client()) == ['Replica Category']
+
+
+def test_flushing_views_sends_product_analytics_to_primary(replica_app):
+    client = replica_app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'admin@test.com', 'password': 'adminpass123'})
+    headers = {'Authorization': f"Bearer {response.get_json()['data']['access_token']}"}
+    client.delete_cookie(STICKY_COOKIE)
+
+    with replica_app.app_context():
+        product_id = Product.query.filter_by(sku='PRIMARY-1').one().id
+        get_view_counter().record(product_id, 2)
+    response = client.get('/api/admin/analytics/products', headers=headers)
+    assert response.status_code == 200
+    most_viewed = response.get_json()['data']['most_viewed']
+    assert [(product['id'], product['views_count']) for product in most_viewed] == [(product_id, 2)]
+
+
+def test_unhealthy_replica_falls_back_to_primary(replica_app):
+    with replica_app.app_context():
+        with db.engines['replica_0'].begin() as conn:
+            conn.exec_driver_sql('DROP TABLE categories')
+    client = replica_app.test_client()
+    assert _category_names(client) == ['Primary Category']
+
+    router = replica_app.extensions['replica_router']
+    assert router.healthy_replicas() == []
+    assert _category_names(client) == ['Primary Category']
@@ -0,0 +1,118 @@
+"""
+HTTP response cache tests for the public catalog endpoints
+"""
+
+import pytest
+from server.cache import LRUByteCache, CachedResponse
+from server.models.database import db, Product
+
+
+@pytest.fixture
+def cached_app(app):
+    app.config['RESPONSE_CACHE_TTL'] = 60
+    return app
+
+
+def test_catalog_responses_are_cached_with_etags(cached_app, client, sample_product, count_queries):
+    first = client.get('/api/products?per_page=5&page=1')
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.headers['Cache-Control'] == 'public, max-age=60'
+    etag = first.headers['ETag']
+    assert etag.startswith('"') and not etag.startswith('W/')
+
+    with count_queries() as queries:
+        # Same arguments in a different order hit the same entry
+        second = client.get('/api/products?page=1&per_page=5')
+        not_modified = client.get('/api/products?per_page=5&page=1', headers={'If-None-Match': etag})
+    assert queries.count == 0
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data() == first.get_data()
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == etag
+
+
+def test_conditional_request_on_a_miss_returns_304(cached_app, client, sample_category):
+    etag = client.get('/api/categories').headers['ETag']
+    cached_app.extensions['response_cache'].delete_prefix('')
+    response = client.get('/api/categories', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['X-Cache'] == 'MISS'
+
+
+def test_errors_are_not_cached(cached_app, client):
+    assert client.get('/api/products/999').status_code == 404
+    response = client.get('/api/products/999')
+    assert response.status_code == 404
+    assert 'X-Cache' not in response.headers
+
+
+def test_cached_product_views_are_still_counted(cached_app, client, sample_product):
+    for _ in range(3):
+        assert client.get(f'/api/products/{sample_product}').status_code == 200
+    with cached_app.app_context():
+        from server.view_counter import get_view_counter
+        get_view_counter().flush()
+        assert db.session.get(Product, sample_product).views_count == 3
+
+
+def test_admin_writes_invalidate_catalog_responses(cached_app, client, admin_headers, sample_product):
+    before = client.get(f'/api/products/{sample_product}').get_json()['data']
+    response = client.put(f'/api/products/{sample_product}', json={'name': 'Renamed Phone'}, headers=admin_headers)
+    assert response.status_code == 200
+
+    after = client.get(f'/api/products/{sample_product}')
+    assert after.headers['X-Cache'] == 'MISS'
+    assert after.get_json()['data']['name'] == 'Renamed Phone' != before['name']
+
+    client.get('/api/categories')
+    category_id = before['category_id']
+    response = client.put(f'/api/categories/{category_id}', json={'name': 'Renamed Category'}, headers=admin_headers)
+    assert response.status_code == 200
+    names = [category['name'] for category in client.get('/api/categories').get_json()['data']]
+    assert names == ['Renamed Category']
+
+
+def test_checkout_and_cancel_invalidate_cached_stock(cached_app, client, auth_headers, sample_product):
+    assert client.get(f'/api/products/{sample_product}').get_json()['data']['stock_quantity'] == 10
+    client.post('/api/cart/add', json={'product_id': sample_product, 'quantity': 3}, headers=auth_headers)
+    response = client.post('/api/orders/create', json={
+        'payment_method': 'credit_card',
+        'shipping_address': {'type': 'shipping', 'first_name': 'A', 'last_name': 'B', 'address_line_1': '1 St',
+                             'city': 'C', 'state': 'S', 'postal_code': '12345', 'country': 'X'}
+    }, headers=auth_headers)
+    assert response.status_code == 201, response.get_data(as_text=True)
+
+    after_sale = client.get(f'/api/products/{sample_product}')
+    assert after_sale.headers['X-Cache'] == 'MISS'
+    assert after_sale.get_json()['data']['stock_quantity'] == 7
+
+    order_id = response.get_json()['data']['id']
+    assert client.put(f'/api/orders/{order_id}/cancel', headers=auth_headers).status_code == 200
+    after_cancel = client.get(f'/api/products/{sample_product}')
+    assert after_cancel.headers['X-Cache'] == 'MISS'
+    assert after_cancel.get_json()['data']['stock_quantity'] == 10
+
+
+def test_lru_byte_cache_evicts_least_recently_used():
+    cache = LRUByteCache(max_bytes=400)
+    for key in 'abc':
+        cache.set(key, CachedResponse(b'x' * 100, key, 'application/json'), 60)
+    cache.get('a')
+    cache.set('d', CachedResponse(b'x' * 100, 'd', 'application/json'), 60)
+    cache.set('e', CachedResponse(b'x' * 100, 'e', 'application/json'), 60)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.size <= 400
+
+    # Responses over a quarter of the budget are not cached
+    cache.set('big', CachedResponse(b'x' * 101, 'big', 'application/json'), 60)
+    assert cache.get('big') is None
+
+
+def test_response_cache_backend_is_pluggable(cached_app, client, sample_category):
+    backend = LRUByteCache(max_bytes=1024 * 1024)
+    cached_app.config['RESPONSE_CACHE_BACKEND'] = lambda app: backend
+    client.get('/api/categories')
+    assert len(backend) == 1
@@ -0,0 +1,95 @@
+"""
+Daily sales rollup tests for Electronics Shop API
+"""
+
+import pytest
+from server.models.database import db, DailySalesRollup, PaymentStatus
+from server.rollup import rebuild_sales_rollup
+from tests.test_orders import add_to_cart, checkout, checkout_products
+
+
+def rollup_rows():
+    return {
+        (row.category_id, row.payment_status): (row.order_count, row.units, float(row.revenue))
+        for row in DailySalesRollup.query.all()
+        if row.order_count or row.units or row.revenue
+    }
+
+
+def place_orders(client, auth_headers, checkout_products):
+    orders = []
+    for quantity in (1, 2):
+        for product_id in checkout_products[:2]:
+            add_to_cart(client, auth_headers, product_id, quantity)
+        response = checkout(client, auth_headers)
+        assert response.status_code == 201, response.get_data(as_text=True)
+        orders.append(response.get_json()['data'])
+    return orders
+
+
+def test_rollup_tracks_order_lifecycle(app, client, auth_headers, admin_headers,
+                                       sample_category, checkout_products):
+    first, second = place_orders(client, auth_headers, checkout_products)
+
+    with app.app_context():
+        rows = rollup_rows()
+        assert rows[(0, PaymentStatus.PENDING)] == (
+            2, 6, pytest.approx(first['total_amount'] + second['total_amount'])
+        )
+        assert rows[(sample_category, PaymentStatus.PENDING)] == (
+            2, 6, pytest.approx(first['subtotal'] + second['subtotal'])
+        )
+
+    response = client.put(f"/api/orders/{first['id']}/update-status",
+                          json={'payment_status': 'completed'}, headers=admin_headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    with app.app_context():
+        rows = rollup_rows()
+        assert rows[(0, PaymentStatus.PENDING)] == (1, 4, pytest.approx(second['total_amount']))
+        assert rows[(0, PaymentStatus.COMPLETED)] == (1, 2, pytest.approx(first['total_amount']))
+
+    response = client.put(f"/api/orders/{first['id']}/cancel", headers=auth_headers)
+    assert response.status_code == 200
+
+    with app.app_context():
+        rows = rollup_rows()
+        assert (0, PaymentStatus.COMPLETED) not in rows
+        assert rows[(0, PaymentStatus.REFUNDED)] == (1, 2, pytest.approx(first['total_amount']))
+
+        incremental = rollup_rows()
+        rebuild_sales_rollup()
+        assert rollup_rows() == incremental
+
+
+def test_revenue_analytics_read_rollup(app, client, auth_headers, admin_headers, checkout_products):
+    first, second = place_orders(client, auth_headers, checkout_products)
+    client.put(f"/api/orders/{second['id']}/update-status",
+               json={'payment_status': 'completed'}, headers=admin_headers)
+
+    response = client.get('/api/admin/analytics/revenue', headers=admin_headers)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['current_month_revenue'] == pytest.approx(second['total_amount'])
+    assert sum(month['order_count'] for month in data['monthly_revenue']) == 1
+    assert data['revenue_by_category'][0]['revenue'] == pytest.approx(second['subtotal'])
+
+    response = client.get('/api/admin/analytics/orders', headers=admin_headers)
+    daily = response.get_json()['data']['daily_orders']
+    assert [day['order_count'] for day in daily] == [2]
+
+
+def test_backfill_command_rebuilds_rollup(app, client, auth_headers, checkout_products, runner):
+    place_orders(client, auth_headers, checkout_products)
+
+    with app.app_context():
+        expected = rollup_rows()
+        DailySalesRollup.query.delete()
+        db.session.commit()
+
+    result = runner.invoke(args=['backfill-sales-rollup'])
+    assert result.exit_code == 0, result.output
+    assert 'Wrote 2 daily sales rollup rows' in result.output
+
+    with app.app_context():
+        assert rollup_rows() == expected
@@ -0,0 +1,71 @@
+"""
+Synthetic data generator tests for Electronics Shop API
+"""
+
+from datetime import date
+from sqlalchemy import func
+from server.app import create_app
+from server.models.database import (db, Order, OrderItem, Product, ProductReview, User, WishlistItem,
+                                    DailySalesRollup, Coupon)
+from server.seed import GENERATED_PASSWORD, generate_data
+
+END_DATE = date(2026, 6, 30)
+
+
+def generate(**kwargs):
+    options = dict(products=300, users=40, orders=400, seed=7, days=365, end_date=END_DATE, chunk_size=64,
+                   log=lambda message: None)
+    options.update(kwargs)
+    return generate_data(**options)
+
+
+def test_generated_data_is_consistent(app, client):
+    generate()
+
+    assert Product.query.count() == 300
+    assert User.query.count() == 40
+    assert Order.query.count() == 400
+    assert ProductReview.query.count() == 40
+    assert WishlistItem.query.count() == 80
+
+    for order in Order.query.limit(50):
+        line_total = sum(item.total_price for item in order.order_items)
+        assert 1 <= len(order.order_items) <= 6
+        assert order.subtotal == line_total
+        assert order.total_amount == (order.subtotal - order.coupon_discount + order.tax_amount
+                                      + order.shipping_amount)
+        assert order.created_at.date() <= END_DATE
+        assert order.order_items[0].to_summary_dict()['sku'].startswith('GEN-')
+
+    units = db.session.scalar(func.sum(OrderItem.quantity))
+    assert db.session.scalar(func.sum(Product.sales_count)) == units
+    assert db.session.scalar(func.sum(Coupon.used_count)) == Order.query.filter(Order.coupon_id.isnot(None)).count()
+    assert DailySalesRollup.query.count() > 0
+
+    # Popularity is skewed: the top tenth of products sells far more than a tenth
+    top = sum(sorted((product.sales_count for product in Product.query), reverse=True)[:30])
+    assert top > units * 0.4
+
+    email = User.query.order_by(User.id).first().email
+    response = client.post('/api/auth/login', json={'email': email, 'password': GENERATED_PASSWORD})
+    assert response.status_code == 200
+
+
+def test_generation_is_deterministic_per_seed(app):
+    generate()
+    first = [(o.order_number, o.user_id, o.total_amount) for o in Order.query.order_by(Order.id)]
+
+    other = create_app('testing')
+    with other.app_context():
+        db.create_all()
+        generate()
+        assert [(o.order_number, o.user_id, o.total_amount) for o in Order.query.order_by(Order.id)] == first
+        db.session.remove()
+        db.drop_all()
+
+    with create_app('testing').app_context():
+        db.create_all()
+        generate(seed=8)
+        assert [(o.order_number, o.user_id, o.total_amount) for o in Order.query.order_by(Order.id)] != first
+        db.session.remove()
+        db.drop_all()